@@ -1,151 +1,276 @@
+from __future__ import annotations
+
 import logging
-import traceback
-from datetime import datetime, timezone, timedelta
+from collections.abc import Iterable
+from datetime import datetime, timedelta
+from functools import partial
+from typing import TYPE_CHECKING
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
-from homeassistant.helpers import device_registry as dr
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import config_validation as cv, device_registry as dr
+from homeassistant.helpers.typing import ConfigType
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
-from pyhkc.hkc_api import HKCAlarm
 
+from .circuit_breaker import HKCCircuitBreaker
+from .command_queue import HKCCommandQueue
 from .config_flow import HKCAlarmConfigFlow
 from .const import (
+    CONF_ADAPTIVE_POLLING,
     CONF_ADDITIONAL_USER_CODES,
+    CONF_BASE_URL,
     CONF_REQUIRE_USER_PIN,
     CONF_UPDATE_INTERVAL,
+    DEFAULT_ADAPTIVE_POLLING,
     DEFAULT_REQUIRE_USER_PIN,
     DEFAULT_UPDATE_INTERVAL,
     DOMAIN,
-    MIN_UPDATE_INTERVAL,
+    INPUT_OPEN_WINDOW,
+    MAX_CONCURRENT_REQUESTS,
 )
 from .helpers import normalize_configured_user_codes
-from .helpers import build_alarm_views, build_device_metadata
+from .helpers import (
+    async_gather_limited,
+    build_alarm_views,
+    build_device_metadata,
+    build_input_index,
+    build_input_topology,
+    build_metadata_signature,
+    diff_input_index,
+    parse_input_timestamp,
+)
+from .inputs import HKCInput
+from .manager import HKCConnectionManager, async_get_manager, credential_key
+from .metadata_cache import HKCMetadataCache
+from .metrics import HKCMetrics
+from .scheduler import HKCPanelScheduler
+from .services import async_setup_services
 from .pyhkc_compat import (
     build_hkc_alarm,
+    build_user_access_summary,
+    get_capabilities,
     get_device_details,
     get_home_assistant_entity_map,
-    get_inputs_for_user,
     get_outputs,
     get_status_for_user,
     get_temporary_user,
-    get_user_access_summary,
 )
 
+if TYPE_CHECKING:
+    from pyhkc.hkc_api import HKCAlarm
+
+    from .hkc_client import HKCAsyncClient
+
 _logger = logging.getLogger(__name__)
 
-class HKCAlarmCoordinator(DataUpdateCoordinator):
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
+class HKCSchedulerCoordinator(DataUpdateCoordinator):
+    """Coordinator fed by the panel's shared ``HKCPanelScheduler``.
+
+    The scheduler owns polling and pushes every refresh to its coordinators,
+    so these never poll on their own. Entities are added without
+    ``update_before_add`` for the same reason: the scheduler has either
+    refreshed already (cold start) or refreshes in the background (warm
+    start), and setup should not wait on the cloud.
+    """
+
     def __init__(
         self,
         hass: HomeAssistant,
         config_entry: ConfigEntry,
-        hkc_alarm: HKCAlarm,
-        configured_user_codes: list[str],
-        update_interval,
+        scheduler: HKCPanelScheduler,
+        name: str,
     ) -> None:
         super().__init__(
             hass,
             _logger,
             config_entry=config_entry,
-            name="hkc_alarm_data",
-            update_interval=timedelta(seconds=update_interval),
+            name=name,
+            update_interval=None,
         )
-        self._last_update = None
-        self._hkc_alarm = hkc_alarm
-        self._configured_user_codes = configured_user_codes
+        self._scheduler = scheduler
+        self._configured_user_codes = scheduler.configured_user_codes
+        scheduler.async_add_coordinator(self)
+
+    @property
+    def panel_id(self) -> int | str:
+        return self._scheduler.panel_id
+
+    @property
+    def metrics(self) -> HKCMetrics:
+        return self._scheduler.metrics
+
+    @property
+    def stale_since(self) -> datetime | None:
+        """Return when the served data went stale, if the cloud is failing."""
+        return self._scheduler.stale_since
+
+    def build_data(self):
+        raise NotImplementedError
+
+    @callback
+    def async_handle_scheduler_refresh(self) -> None:
+        """Pick up the results of the scheduler's latest refresh."""
+        raise NotImplementedError
+
+    async def _async_update_data(self):
+        try:
+            await self._scheduler.async_refresh(requester=self)
+        except Exception as e:
+            # The scheduler logs outages once; serve stale data while we can
+            if not self._scheduler.has_usable_data:
+                raise UpdateFailed(f"Failed to update: {e}") from e
+        return self.build_data()
+
+class HKCAlarmCoordinator(HKCSchedulerCoordinator):
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        config_entry: ConfigEntry,
+        scheduler: HKCPanelScheduler,
+    ) -> None:
         self.panel_time = None
-        self._panel_time_delta = timedelta()
         self.status = None
         self.status_by_user: dict[str, dict] = {}
         self.access_summary: dict[int, dict] = {}
         self.panel_data = None
+        self.command_queue = HKCCommandQueue(self)
+        super().__init__(hass, config_entry, scheduler, "hkc_alarm_data")
 
-    async def async_force_refresh(self):
-        """Force refresh alarm coordinator, ignoring debounce."""
-        self._last_update = None
-        return await self.async_refresh()
+    @property
+    def breaker(self) -> HKCCircuitBreaker:
+        return self._scheduler.breaker
 
-    async def _async_update_data(self):
-        def fetch_data():
-            self.status_by_user = {
-                code: get_status_for_user(self._hkc_alarm, code)
-                for code in self._configured_user_codes
-            }
-            self.status = self.status_by_user[self._configured_user_codes[0]]
-            self.access_summary = get_user_access_summary(
-                self._hkc_alarm,
-                self._configured_user_codes,
-                self.status_by_user,
-            )
-            self.panel_data = self._hkc_alarm.get_panel()
-
-        def parse_panel_time():
-            panel_time_str = self.panel_data.get("display", "")
-            now = datetime.now(timezone.utc)
-            try:
-                self.panel_time = datetime.strptime(
-                    panel_time_str, "%a %d %b %H:%M"
-                ).replace(year=now.year, tzinfo=timezone.utc)
-                self._panel_time_delta = self.panel_time - now
-            except ValueError:
-                _logger.debug(f"Failed to parse panel time: {panel_time_str}")
-                self.panel_time = now + self._panel_time_delta
+    @property
+    def hkc_alarm(self) -> HKCAlarm | None:
+        """Return the panel's HKCAlarm, or None until it has logged in."""
+        return self._scheduler.hkc_alarm
+
+    @property
+    def hkc_client(self) -> HKCAsyncClient | None:
+        return self._scheduler.client
 
+    async def async_refresh_statuses(self, user_codes: Iterable[str]) -> None:
+        """Refresh only the given users' statuses, ignoring debounce."""
         try:
-            now = datetime.now(timezone.utc)
-            if self._last_update is None or now > self._last_update + timedelta(seconds=MIN_UPDATE_INTERVAL):
-                self._last_update = now
-                await self.hass.async_add_executor_job(fetch_data)
-                parse_panel_time()
-            return self.status_by_user, self.panel_data
-        except Exception as e:
-            _logger.error(f"Exception occurred while fetching HKC data: {e}")
-            _logger.error(traceback.format_exc())
-            raise UpdateFailed(f"Failed to update: {e}")
+            await self._scheduler.async_refresh_statuses(user_codes, requester=self)
+        except Exception:
+            # The next attempt, or the regular poll, picks the panel up again
+            _logger.debug("Status refresh failed", exc_info=True)
+
+    @callback
+    def async_note_command(self) -> None:
+        """Tell the scheduler an arm or disarm command was just sent."""
+        self._scheduler.async_note_command()
+
+    def build_data(self):
+        return self.status_by_user, self.panel_data
 
-class HKCSensorCoordinator(DataUpdateCoordinator):
+    @callback
+    def async_handle_scheduler_refresh(self) -> None:
+        """Pick up the statuses and panel data from the latest refresh."""
+        self.status_by_user = self._scheduler.status_by_user
+        self.status = self.status_by_user[self._configured_user_codes[0]]
+        self.access_summary = build_user_access_summary(
+            self._configured_user_codes,
+            self.status_by_user,
+        )
+        self.panel_data = self._scheduler.panel_data
+        self.panel_time = self._scheduler.panel_time
+
+class HKCSensorCoordinator(HKCSchedulerCoordinator):
     def __init__(
         self,
         hass: HomeAssistant,
         config_entry: ConfigEntry,
-        hkc_alarm: HKCAlarm,
-        configured_user_codes: list[str],
-        alarm_coordinator: DataUpdateCoordinator,
-        update_interval,
+        scheduler: HKCPanelScheduler,
     ) -> None:
-        super().__init__(
-            hass,
-            _logger,
-            config_entry=config_entry,
-            name="hkc_sensor_data",
-            update_interval=timedelta(seconds=update_interval),
-        )
-        self._last_update = None
-        self._hkc_alarm = hkc_alarm
-        self._configured_user_codes = configured_user_codes
-        self._alarm_coordinator = alarm_coordinator
         self.sensor_data = None
-        self.inputs_by_user: dict[str, list[dict]] = {}
+        self.inputs_by_user: dict[str, list[HKCInput]] = {}
+        self.input_index: dict[str, dict[str, HKCInput]] = {}
+        # Inputs whose listeners run on the next notification; None wakes all
+        self._inputs_to_wake: set[tuple[str, str]] | None = None
+        # Changed inputs the panel clock has not yet moved a minute past,
+        # with their trigger timestamps
+        self._recent_changes: dict[tuple[str, str], datetime] = {}
+        self._notified_success: bool | None = None
+        super().__init__(hass, config_entry, scheduler, "hkc_sensor_data")
 
-    async def _async_update_data(self):
-        def fetch_data():
-            self.inputs_by_user = {
-                code: get_inputs_for_user(self._hkc_alarm, code)
-                for code in self._configured_user_codes
-            }
-            self.sensor_data = self.inputs_by_user[self._configured_user_codes[0]]
+    def build_data(self):
+        return self.sensor_data
 
-        try:
-            await self._alarm_coordinator.async_refresh()
-            now = datetime.now(timezone.utc)
-            if self._last_update is None or now > self._last_update + timedelta(seconds=MIN_UPDATE_INTERVAL):
-                self._last_update = now
-                await self.hass.async_add_executor_job(fetch_data)
-            return self.sensor_data
-        except Exception as e:
-            _logger.error(f"Exception occurred while fetching HKC sensor data: {e}")
-            _logger.error(traceback.format_exc())
-            raise UpdateFailed(f"Failed to update: {e}")
+    def get_input(self, user_code: str, input_id) -> HKCInput | None:
+        """Return the latest payload for an input as seen by a user."""
+        inputs = self.input_index.get(user_code)
+        if inputs is None:
+            inputs = self.input_index.get(self._configured_user_codes[0], {})
+        return inputs.get(str(input_id))
+
+    def _resolve_context(self, context: tuple[str, str]) -> tuple[str, str]:
+        # Mirrors get_input's fallback to the primary user's inputs
+        user_code, input_id = context
+        if user_code not in self.input_index:
+            user_code = self._configured_user_codes[0]
+        return user_code, input_id
+
+    @callback
+    def async_handle_scheduler_refresh(self) -> None:
+        """Pick up the inputs from the latest refresh and note what changed."""
+        self.inputs_by_user = self._scheduler.inputs_by_user
+        self.sensor_data = self.inputs_by_user[self._configured_user_codes[0]]
+        input_index = build_input_index(self.inputs_by_user)
+        changed = diff_input_index(self.input_index, input_index)
+        self.input_index = input_index
+
+        # A zone that just triggered reads as open until the panel clock is
+        # a minute past its timestamp, however long the poll interval, so
+        # keep waking it up to and including the refresh that closes it
+        for user_code, input_id in changed:
+            input_data = input_index.get(user_code, {}).get(input_id)
+            timestamp = parse_input_timestamp(
+                input_data.get("timestamp") if input_data else None
+            )
+            if timestamp is not None:
+                self._recent_changes[(user_code, input_id)] = timestamp
+            else:
+                self._recent_changes.pop((user_code, input_id), None)
+        if self._inputs_to_wake is not None:
+            self._inputs_to_wake |= self._recent_changes.keys()
+        panel_time = self._scheduler.panel_time
+        window = timedelta(seconds=INPUT_OPEN_WINDOW)
+        self._recent_changes = {
+            key: timestamp
+            for key, timestamp in self._recent_changes.items()
+            if panel_time - timestamp < window
+        }
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Wake only the sensors whose input changed since the last update.
+
+        Sensors register with a ``(user_code, input_id)`` context. Everyone
+        is woken on the first update and whenever availability flips.
+        """
+        inputs_to_wake = self._inputs_to_wake
+        if self.last_update_success != self._notified_success:
+            inputs_to_wake = None
+        self._notified_success = self.last_update_success
+        self._inputs_to_wake = set()
 
+        for update_callback, context in list(self._listeners.values()):
+            if (
+                inputs_to_wake is None
+                or context is None
+                or self._resolve_context(context) in inputs_to_wake
+            ):
+                update_callback()
+
+
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    """Register the integration's services."""
+    async_setup_services(hass)
+    return True
 
 async def async_migrate_entry(hass: HomeAssistant, entry: ConfigEntry):
     if entry.version > 3:
@@ -178,13 +303,146 @@ async def async_migrate_entry(hass: HomeAssistant, entry: ConfigEntry):
     )
     return True
 
+async def async_fetch_panel_metadata(
+    hass: HomeAssistant,
+    hkc_alarm: HKCAlarm,
+    configured_user_codes: list[str],
+    metrics: HKCMetrics | None = None,
+    known_statuses: dict[str, dict] | None = None,
+) -> tuple[dict, dict[str, dict]]:
+    """Fetch static panel metadata and the statuses used to derive views.
+
+    Statuses already in ``known_statuses`` (by user code) are not fetched
+    again.
+    """
+    known_statuses = known_statuses or {}
+    status_codes = [code for code in configured_user_codes if code not in known_statuses]
+    timed_job = (metrics or HKCMetrics()).timed_job
+    # These lookups do not depend on one another, so fetch them together
+    # rather than paying one cloud round trip per call.
+    jobs = [
+        timed_job(
+            "device_details",
+            partial(hass.async_add_executor_job, get_device_details, hkc_alarm),
+        ),
+        timed_job(
+            "outputs", partial(hass.async_add_executor_job, get_outputs, hkc_alarm)
+        ),
+        timed_job(
+            "entity_map",
+            partial(
+                hass.async_add_executor_job,
+                get_home_assistant_entity_map,
+                hkc_alarm,
+                configured_user_codes,
+            ),
+        ),
+    ]
+    jobs.extend(
+        timed_job(
+            "temporary_user",
+            partial(hass.async_add_executor_job, get_temporary_user, hkc_alarm, code),
+        )
+        for code in configured_user_codes
+    )
+    jobs.extend(
+        timed_job(
+            "status",
+            partial(hass.async_add_executor_job, get_status_for_user, hkc_alarm, code),
+        )
+        for code in status_codes
+    )
+    device_details, outputs, entity_map, *per_user_results = await async_gather_limited(
+        jobs, MAX_CONCURRENT_REQUESTS, async_get_manager(hass).limiter
+    )
+    user_count = len(configured_user_codes)
+    fetched_statuses = dict(zip(status_codes, per_user_results[user_count:]))
+    initial_statuses = {
+        code: known_statuses.get(code) or fetched_statuses[code]
+        for code in configured_user_codes
+    }
+    access_summary = build_user_access_summary(configured_user_codes, initial_statuses)
+    metadata = {
+        # pyhkc's form of the id, which entity and device ids are built from
+        "panel_id": hkc_alarm.panel_id,
+        "device_details": device_details,
+        "outputs": outputs,
+        "temporary_user_by_code": dict(
+            zip(configured_user_codes, per_user_results[:user_count])
+        ),
+        "entity_map": entity_map,
+        "views": build_alarm_views(
+            configured_user_codes,
+            access_summary,
+            entity_map=entity_map,
+            supports_multi_view=get_capabilities(hkc_alarm).user_access_summary,
+        ),
+    }
+    return metadata, initial_statuses
+
+
+async def _async_warm_start(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    configured_user_codes: list[str],
+    metadata_cache: HKCMetadataCache,
+    cached_metadata: dict,
+) -> None:
+    """Log in, refresh coordinators and revalidate cached metadata.
+
+    Runs in the background after a warm start. The scheduler's first
+    refresh also builds the HKCAlarm, logging the panel in; if that fails,
+    the cached metadata is kept and the login is retried with the next poll.
+    """
+    entry_data = hass.data[DOMAIN][entry.entry_id]
+    sensor_coordinator = entry_data["sensor_coordinator"]
+    await entry_data["scheduler"].async_update_coordinators()
+    if (hkc_alarm := entry_data["scheduler"].hkc_alarm) is None:
+        return
+
+    try:
+        metadata, _ = await async_fetch_panel_metadata(
+            hass, hkc_alarm, configured_user_codes, entry_data["scheduler"].metrics
+        )
+    except Exception:
+        _logger.warning(
+            "Failed to revalidate cached metadata for panel %s; keeping cached copy",
+            hkc_alarm.panel_id,
+            exc_info=True,
+        )
+        return
+
+    metadata["input_topology"] = (
+        build_input_topology(sensor_coordinator.inputs_by_user)
+        if sensor_coordinator.last_update_success and sensor_coordinator.inputs_by_user
+        else cached_metadata.get("input_topology", {})
+    )
+    await metadata_cache.async_save(configured_user_codes, metadata)
+
+    if build_metadata_signature(metadata) != build_metadata_signature(cached_metadata):
+        _logger.info(
+            "Panel %s metadata changed since it was cached; reloading entry",
+            hkc_alarm.panel_id,
+        )
+        hass.config_entries.async_schedule_reload(entry.entry_id)
+        return
+
+    entry_data.update(
+        {
+            "device_details": metadata["device_details"],
+            "device_metadata": build_device_metadata(
+                metadata["device_details"], metadata["outputs"]
+            ),
+            "outputs": metadata["outputs"],
+            "temporary_user_by_code": metadata["temporary_user_by_code"],
+        }
+    )
+
+
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     panel_id = entry.data["panel_id"]
-    if any(
-        existing_entry_id != entry.entry_id
-        and existing_data.get("panel_id") == panel_id
-        for existing_entry_id, existing_data in hass.data.get(DOMAIN, {}).items()
-    ):
+    manager = async_get_manager(hass)
+    if not manager.async_claim_panel(entry.entry_id, panel_id):
         _logger.error(
             "Duplicate HKC Alarm entry detected for panel %s; refusing to set up entry %s",
             panel_id,
@@ -192,6 +450,17 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         )
         return False
 
+    try:
+        return await _async_setup_panel(hass, entry, manager)
+    except BaseException:
+        await manager.async_release(entry.entry_id)
+        raise
+
+
+async def _async_setup_panel(
+    hass: HomeAssistant, entry: ConfigEntry, manager: HKCConnectionManager
+) -> bool:
+    panel_id = entry.data["panel_id"]
     panel_password = entry.data["panel_password"]
     user_code = entry.data["user_code"]
     configured_user_codes = normalize_configured_user_codes(
@@ -199,87 +468,113 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         entry.options.get(CONF_ADDITIONAL_USER_CODES, []),
     )
 
-    hkc_alarm = await hass.async_add_executor_job(
+    metadata_cache = HKCMetadataCache(hass, entry.entry_id)
+    metadata = await metadata_cache.async_load(configured_user_codes)
+
+    base_url = entry.data.get(CONF_BASE_URL)
+    build_alarm = partial(
         build_hkc_alarm,
         panel_id,
         panel_password,
         user_code,
         configured_user_codes[1:],
+        base_url,
     )
 
     update_interval = entry.options.get(CONF_UPDATE_INTERVAL, DEFAULT_UPDATE_INTERVAL)
     require_user_pin = entry.options.get(
         CONF_REQUIRE_USER_PIN, DEFAULT_REQUIRE_USER_PIN
     )
-    device_details = await hass.async_add_executor_job(get_device_details, hkc_alarm)
-    outputs = await hass.async_add_executor_job(get_outputs, hkc_alarm)
-    temporary_user_by_code = await hass.async_add_executor_job(
-        lambda: {
-            code: get_temporary_user(hkc_alarm, code) for code in configured_user_codes
-        }
-    )
-    device_metadata = build_device_metadata(device_details, outputs)
-    initial_statuses = await hass.async_add_executor_job(
-        lambda: {
-            code: get_status_for_user(hkc_alarm, code) for code in configured_user_codes
-        }
-    )
-    access_summary = await hass.async_add_executor_job(
-        get_user_access_summary,
-        hkc_alarm,
-        configured_user_codes,
-        initial_statuses,
-    )
-    entity_map = await hass.async_add_executor_job(
-        get_home_assistant_entity_map,
-        hkc_alarm,
-        configured_user_codes,
-    )
-    views = build_alarm_views(
-        configured_user_codes,
-        access_summary,
-        entity_map=entity_map,
-        supports_multi_view=hasattr(hkc_alarm, "get_user_access_summary"),
-    )
+    metrics = HKCMetrics()
+    # With cached metadata the HKCAlarm, and so the login, is left to the
+    # first background refresh
+    hkc_alarm = None
+    hkc_client = None
+    initial_statuses = None
+    if metadata is None:
+        hkc_alarm, known_statuses = await manager.async_get_alarm(
+            entry.entry_id,
+            panel_id,
+            credential_key(
+                panel_id, panel_password, user_code, configured_user_codes[1:], base_url
+            ),
+            build_alarm,
+        )
+        metadata, initial_statuses = await async_fetch_panel_metadata(
+            hass, hkc_alarm, configured_user_codes, metrics, known_statuses
+        )
+        hkc_client = manager.async_get_client(entry.entry_id, hkc_alarm)
 
-    alarm_coordinator = HKCAlarmCoordinator(
-        hass,
-        entry,
-        hkc_alarm,
-        configured_user_codes,
-        update_interval,
-    )
-    sensor_coordinator = HKCSensorCoordinator(
+    scheduler = HKCPanelScheduler(
         hass,
-        entry,
         hkc_alarm,
         configured_user_codes,
-        alarm_coordinator,
         update_interval,
+        hkc_client,
+        entry.options.get(CONF_ADAPTIVE_POLLING, DEFAULT_ADAPTIVE_POLLING),
+        metrics,
+        manager.limiter,
+        metadata["panel_id"],
+        build_alarm,
+        partial(manager.async_get_client, entry.entry_id),
     )
-    await alarm_coordinator.async_config_entry_first_refresh()
-    await sensor_coordinator.async_config_entry_first_refresh()
+    alarm_coordinator = HKCAlarmCoordinator(hass, entry, scheduler)
+    sensor_coordinator = HKCSensorCoordinator(hass, entry, scheduler)
+    if initial_statuses is not None:
+        scheduler.async_set_initial_statuses(initial_statuses)
+        await alarm_coordinator.async_config_entry_first_refresh()
+        await sensor_coordinator.async_config_entry_first_refresh()
+        metadata["input_topology"] = build_input_topology(
+            sensor_coordinator.inputs_by_user
+        )
+        await metadata_cache.async_save(configured_user_codes, metadata)
 
+    views = metadata["views"]
     hass.data.setdefault(DOMAIN, {})[entry.entry_id] = {
-        "hkc_alarm": hkc_alarm,
         "update_interval": update_interval,
         "require_user_pin": require_user_pin,
         "configured_user_codes": configured_user_codes,
-        "device_details": device_details,
-        "device_metadata": device_metadata,
-        "outputs": outputs,
-        "temporary_user_by_code": temporary_user_by_code,
-        "entity_map": entity_map,
+        "device_details": metadata["device_details"],
+        "device_metadata": build_device_metadata(
+            metadata["device_details"], metadata["outputs"]
+        ),
+        "outputs": metadata["outputs"],
+        "temporary_user_by_code": metadata["temporary_user_by_code"],
+        "entity_map": metadata["entity_map"],
         "views": views,
+        "input_topology": metadata.get("input_topology", {}),
+        "scheduler": scheduler,
         "alarm_coordinator": alarm_coordinator,
         "sensor_coordinator": sensor_coordinator,
     }
+    entry.async_on_unload(
+        scheduler.async_start(
+            manager.async_poll_offset(entry.entry_id, update_interval)
+        )
+    )
+
+    if initial_statuses is None:
+        # Warm start: entities are built from the cache straight away and
+        # the cloud, login included, is only consulted in the background.
+        entry.async_create_background_task(
+            hass,
+            _async_warm_start(
+                hass,
+                entry,
+                configured_user_codes,
+                metadata_cache,
+                metadata,
+            ),
+            f"{DOMAIN}_{entry.entry_id}_warm_start",
+        )
 
     # clean up orphaned devices from pre-fix multi-view code
     expected_identifiers = {
-        (DOMAIN, v["key"] if v["multi_view"] else hkc_alarm.panel_id)
+        (DOMAIN, v["key"] if v["multi_view"] else scheduler.panel_id)
         for v in views
     }
+    # the panel device also carries the diagnostic sensors
+    expected_identifiers.add((DOMAIN, scheduler.panel_id))
     device_registry = dr.async_get(hass)
     for device in dr.async_entries_for_config_entry(device_registry, entry.entry_id):
         if not any(ident in expected_identifiers for ident in device.identifiers):
@@ -297,8 +592,13 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     unload_ok = await hass.config_entries.async_unload_platforms(entry, ["sensor", "alarm_control_panel"])
     if unload_ok:
         hass.data[DOMAIN].pop(entry.entry_id)
+        await async_get_manager(hass).async_release(entry.entry_id)
     return unload_ok
 
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Drop cached panel metadata when an entry is removed."""
+    await HKCMetadataCache(hass, entry.entry_id).async_remove()
+
 async def async_remove_config_entry_device(
     hass: HomeAssistant, entry: ConfigEntry, device_entry: dr.DeviceEntry,
 ) -> bool:
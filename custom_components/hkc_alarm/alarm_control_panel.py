@@ -1,6 +1,7 @@
-import asyncio
 import logging
+import time
 from datetime import datetime, timezone
+from functools import partial
 
 from homeassistant.components.alarm_control_panel import (
     AlarmControlPanelEntity,
@@ -12,14 +13,15 @@ from homeassistant.core import callback
 from homeassistant.exceptions import HomeAssistantError, ServiceValidationError
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
-from .const import DOMAIN
+from .const import COMMAND_CONFIRM_TIMEOUT, DOMAIN
+from .entity import HKCViewEntity
 from .pyhkc_compat import build_block_alarm_command
 
 
 _logger = logging.getLogger(__name__)
 
 
-class HKCAlarmControlPanel(CoordinatorEntity, AlarmControlPanelEntity):
+class HKCAlarmControlPanel(HKCViewEntity, CoordinatorEntity, AlarmControlPanelEntity):
     _attr_supported_features = (
         AlarmControlPanelEntityFeature.ARM_HOME
         | AlarmControlPanelEntityFeature.ARM_AWAY
@@ -30,13 +32,13 @@ class HKCAlarmControlPanel(CoordinatorEntity, AlarmControlPanelEntity):
 
     def __init__(
         self,
-        hkc_alarm,
+        panel_id,
         view,
         alarm_coordinator,
         require_user_pin,
     ):
         super().__init__(alarm_coordinator)
-        self._hkc_alarm = hkc_alarm
+        self._panel_id = panel_id
         self._view = view
         self._alarm_coordinator = alarm_coordinator
         self._configured_user_codes = [str(code) for code in view["allowed_user_codes"]]
@@ -49,6 +51,10 @@ class HKCAlarmControlPanel(CoordinatorEntity, AlarmControlPanelEntity):
         self._last_command_result = None
         self._last_command_result_code = None
         self._last_command_acknowledged = None
+        self._last_command_confirmed = None
+        self._last_command_confirmation_latency = None
+        self._written_state = None
+        self._static_attributes_cache = None
 
         self._attr_has_entity_name = True
         self._attr_name = None if not view["multi_view"] else view["label"]
@@ -67,29 +73,19 @@ class HKCAlarmControlPanel(CoordinatorEntity, AlarmControlPanelEntity):
     def unique_id(self):
         """Return the unique ID of the sensor."""
         if not self._view["multi_view"]:
-            return str(self._hkc_alarm.panel_id) + "panel"
-        return f"{self._hkc_alarm.panel_id}panel_{self._view['key']}"
-
-    @property
-    def extra_state_attributes(self):
-        """Return the state attributes of the alarm control panel."""
-        if self._alarm_coordinator.panel_data is None:
-            return None
-
-        entry_data = {}
-        if getattr(self, "hass", None) is not None and self.coordinator.config_entry is not None:
-            entry_data = self.hass.data[DOMAIN][self.coordinator.config_entry.entry_id]
-        metadata = entry_data.get("device_metadata", {})
-        temporary_user = entry_data.get("temporary_user_by_code", {}).get(self._primary_user_code, {})
-        attributes = {
-            "Green LED": self._alarm_coordinator.panel_data["greenLed"],
-            "Red LED": self._alarm_coordinator.panel_data["redLed"],
-            "Amber LED": self._alarm_coordinator.panel_data["amberLed"],
-            "Cursor On": self._alarm_coordinator.panel_data["cursorOn"],
-            "Cursor Index": self._alarm_coordinator.panel_data["cursorIndex"],
-            "Display": self._alarm_coordinator.panel_data["display"],
-            "Blink": self._alarm_coordinator.panel_data["blink"],
-        }
+            return str(self._panel_id) + "panel"
+        return f"{self._panel_id}panel_{self._view['key']}"
+
+    def _static_attributes(self) -> dict:
+        """Return the attributes that only change with the panel metadata."""
+        metadata = self._device_metadata
+        temporary_users = self._entry_data.get("temporary_user_by_code")
+        cached = self._static_attributes_cache
+        if cached is not None and cached[0] is metadata and cached[1] is temporary_users:
+            return cached[2]
+
+        temporary_user = (temporary_users or {}).get(self._primary_user_code, {})
+        attributes = {}
         if metadata.get("panel_name"):
             attributes["Panel Name"] = metadata["panel_name"]
         if metadata.get("installation_name"):
@@ -104,6 +100,18 @@ class HKCAlarmControlPanel(CoordinatorEntity, AlarmControlPanelEntity):
             ]
         if self._block_numbers:
             attributes["Blocks"] = self._block_numbers
+        self._static_attributes_cache = (metadata, temporary_users, attributes)
+        return attributes
+
+    @property
+    def extra_state_attributes(self):
+        """Return the state attributes of the alarm control panel."""
+        if self._alarm_coordinator.panel_data is None:
+            return None
+
+        # The keypad display and LEDs change with the panel clock, so they
+        # live on the panel display diagnostic sensor instead
+        attributes = dict(self._static_attributes())
         if self._last_command is not None:
             attributes["Last Command"] = self._last_command
         if self._last_command_state is not None:
@@ -116,28 +124,16 @@ class HKCAlarmControlPanel(CoordinatorEntity, AlarmControlPanelEntity):
             attributes["Last Command Acknowledged"] = self._last_command_acknowledged
         if self._last_command_at is not None:
             attributes["Last Command At"] = self._last_command_at.isoformat()
+        if self._last_command_confirmed is not None:
+            attributes["Last Command Confirmed"] = self._last_command_confirmed
+        if self._last_command_confirmation_latency is not None:
+            attributes["Last Command Confirmation Latency"] = (
+                self._last_command_confirmation_latency
+            )
+        if (stale_since := self._alarm_coordinator.stale_since) is not None:
+            attributes["Stale Since"] = stale_since.isoformat()
         return attributes
 
-    @property
-    def device_info(self):
-        entry_data = {}
-        if getattr(self, "hass", None) is not None and self.coordinator.config_entry is not None:
-            entry_data = self.hass.data[DOMAIN][self.coordinator.config_entry.entry_id]
-        metadata = entry_data.get("device_metadata", {})
-        identifier = (
-            (DOMAIN, self._hkc_alarm.panel_id)
-            if not self._view["multi_view"]
-            else (DOMAIN, f"{self._hkc_alarm.panel_id}_{self._view['key']}")
-        )
-        return {
-            "identifiers": {identifier},
-            "name": self._view["label"],
-            "manufacturer": "HKC",
-            "model": metadata.get("model", "HKC Alarm"),
-            "sw_version": metadata.get("sw_version", "1.0.0"),
-            "serial_number": metadata.get("serial_number"),
-        }
-
     @property
     def available(self) -> bool:
         """Return True if alarm is available."""
@@ -186,36 +182,92 @@ class HKCAlarmControlPanel(CoordinatorEntity, AlarmControlPanelEntity):
         self._last_command_result = result
         self._last_command_result_code = result_code
         self._last_command_acknowledged = acknowledged
+        self._last_command_confirmed = None
+        self._last_command_confirmation_latency = None
+
+        self._written_state = None
+        self.async_write_ha_state()
+
+    async def _async_confirm_command(self, command_name: str, acknowledged_at: float) -> None:
+        """Wait for the panel's shared refreshes to show the commanded state."""
+        target_state = self._state_for_command(command_name)
+        confirmed = await self._alarm_coordinator.command_queue.async_confirm(
+            lambda: self._derive_alarm_state() == target_state,
+            [self._primary_user_code],
+        )
 
+        self._last_command_confirmed = confirmed
+        if confirmed:
+            self._last_command_confirmation_latency = round(
+                time.monotonic() - acknowledged_at, 1
+            )
+        else:
+            _logger.warning(
+                "Panel %s did not confirm %s within %s seconds",
+                self._panel_id,
+                command_name,
+                COMMAND_CONFIRM_TIMEOUT,
+            )
+        self._written_state = None
         self.async_write_ha_state()
 
     async def _send_alarm_command(
         self,
         command_name: str,
-        refresh_delay: int,
         code: str | None,
     ) -> None:
         """Send alarm command and check response."""
-        if (alarm_command := getattr(self._hkc_alarm, command_name)) is None:
+        if (hkc_alarm := self._alarm_coordinator.hkc_alarm) is None:
+            # A warm start only logs in with the first refresh
+            raise HomeAssistantError(
+                translation_domain=DOMAIN,
+                translation_key="not_connected",
+            )
+        if (alarm_command := getattr(hkc_alarm, command_name)) is None:
             raise RuntimeError(f"unknown alarm command {command_name}")
         user_code = self._resolve_command_user_code(code)
-        try:
-            command = build_block_alarm_command(
-                self._hkc_alarm,
+        block_number = self._block_numbers[0] if len(self._block_numbers) == 1 else None
+        if (hkc_client := self._alarm_coordinator.hkc_client) is not None:
+            command = partial(
+                hkc_client.async_send_command,
                 command_name,
                 user_code,
-                self._primary_user_code,
-                self._block_numbers[0] if len(self._block_numbers) == 1 else None,
+                block_number,
             )
-        except TypeError:
-            raise ServiceValidationError(
-                translation_domain=DOMAIN,
-                translation_key="block_commands_not_supported",
-            ) from None
-        res = await self.hass.async_add_executor_job(command)
+        else:
+            try:
+                command = partial(
+                    self.hass.async_add_executor_job,
+                    build_block_alarm_command(
+                        hkc_alarm,
+                        command_name,
+                        user_code,
+                        self._primary_user_code,
+                        block_number,
+                    ),
+                )
+            except TypeError:
+                raise ServiceValidationError(
+                    translation_domain=DOMAIN,
+                    translation_key="block_commands_not_supported",
+                ) from None
+        # Commands for the same block and state are only sent once
+        command_key = (command_name, block_number, None if block_number else user_code)
+
+        async def timed_command():
+            with self._alarm_coordinator.metrics.timed("command"):
+                return await command()
+
+        res = await self._alarm_coordinator.command_queue.async_send(
+            command_key, timed_command
+        )
+        # Confirmation latency runs from the panel's acknowledgement, not
+        # from when the command joined the queue
+        acknowledged_at = time.monotonic()
         command_type = command_name.split("_")[0]
         result_code = res.get("resultCode")
         if result_code == 5:  # alarm command successful
+            self._alarm_coordinator.async_note_command()
             self._attr_alarm_state = self._state_for_command(command_name)
             self._update_command_feedback(
                 command_name,
@@ -257,35 +309,32 @@ class HKCAlarmControlPanel(CoordinatorEntity, AlarmControlPanelEntity):
                 translation_placeholders={"response": res},
             )
 
-        # Refresh alarm status on successful command
-        if refresh_delay:
-            await asyncio.sleep(refresh_delay)
-            await self._alarm_coordinator.async_force_refresh()
+        # Refresh alarm status until the panel confirms the command
+        await self._async_confirm_command(command_name, acknowledged_at)
 
     async def async_alarm_disarm(self, code: str | None = None) -> None:
         """Send disarm command."""
-        await self._send_alarm_command("disarm", 3, code)
+        await self._send_alarm_command("disarm", code)
 
     async def async_alarm_arm_home(self, code: str | None = None) -> None:
         """Send arm home command."""
-        await self._send_alarm_command("arm_partset_a", 10, code)
+        await self._send_alarm_command("arm_partset_a", code)
 
     async def async_alarm_arm_night(self, code: str | None = None) -> None:
         """Send arm night command."""
-        await self._send_alarm_command("arm_partset_b", 10, code)
+        await self._send_alarm_command("arm_partset_b", code)
 
     async def async_alarm_arm_away(self, code: str | None = None) -> None:
         """Send arm away command."""
-        await self._send_alarm_command("arm_fullset", 10, code)
+        await self._send_alarm_command("arm_fullset", code)
 
-    @callback
-    def _handle_coordinator_update(self) -> None:
-        """Handle updated data from the coordinator."""
+    def _derive_alarm_state(self) -> AlarmControlPanelState:
+        """Return the alarm state of the targeted blocks from coordinator data."""
         status = self._alarm_coordinator.status_by_user.get(
             self._primary_user_code,
             self._alarm_coordinator.status,
         )
-        blocks = status.get("blocks", [])
+        blocks = (status or {}).get("blocks", [])
         if self._block_numbers:
             selected_blocks = []
             for block_number in self._block_numbers:
@@ -295,32 +344,51 @@ class HKCAlarmControlPanel(CoordinatorEntity, AlarmControlPanelEntity):
             blocks = selected_blocks
 
         if any(block["inAlarm"] for block in blocks):
-            self._attr_alarm_state = AlarmControlPanelState.TRIGGERED
-        elif any(block["armState"] == 3 for block in blocks):
-            self._attr_alarm_state = AlarmControlPanelState.ARMED_AWAY
-        elif any(block["armState"] == 2 for block in blocks):
-            self._attr_alarm_state = AlarmControlPanelState.ARMED_NIGHT
-        elif any(block["armState"] == 1 for block in blocks):
-            self._attr_alarm_state = AlarmControlPanelState.ARMED_HOME
-        else:
-            self._attr_alarm_state = AlarmControlPanelState.DISARMED
+            return AlarmControlPanelState.TRIGGERED
+        if any(block["armState"] == 3 for block in blocks):
+            return AlarmControlPanelState.ARMED_AWAY
+        if any(block["armState"] == 2 for block in blocks):
+            return AlarmControlPanelState.ARMED_NIGHT
+        if any(block["armState"] == 1 for block in blocks):
+            return AlarmControlPanelState.ARMED_HOME
+        return AlarmControlPanelState.DISARMED
+
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        # Entities are not refreshed on add, so pick up any state known now
+        if self._alarm_coordinator.status_by_user:
+            self._attr_alarm_state = self._derive_alarm_state()
 
-        self.async_write_ha_state()  # Update the state with the latest data
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Handle updated data from the coordinator."""
+        with self._alarm_coordinator.metrics.timed("alarm_entity_update"):
+            self._attr_alarm_state = self._derive_alarm_state()
+
+            # Skip the write when neither the state nor the attributes changed
+            written_state = (
+                self.available,
+                self._attr_alarm_state,
+                self.extra_state_attributes,
+            )
+            if written_state == self._written_state:
+                return
+            self._written_state = written_state
+            self.async_write_ha_state()
 
 
 async def async_setup_entry(hass, entry, async_add_entities):
     entry_data = hass.data[DOMAIN][entry.entry_id]
-    hkc_alarm = entry_data["hkc_alarm"]
     alarm_coordinator = entry_data["alarm_coordinator"]
     async_add_entities(
         [
             HKCAlarmControlPanel(
-                hkc_alarm,
+                alarm_coordinator.panel_id,
                 view,
                 alarm_coordinator,
                 entry_data["require_user_pin"],
             )
             for view in entry_data["views"]
         ],
-        True,
+        update_before_add=False,
     )
@@ -0,0 +1,102 @@
+"""Circuit breaker guarding the HKC cloud for one panel."""
+
+from __future__ import annotations
+
+import random
+import time
+
+from .const import (
+    BREAKER_BASE_BACKOFF,
+    BREAKER_FAILURE_THRESHOLD,
+    BREAKER_JITTER,
+    BREAKER_MAX_BACKOFF,
+)
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+
+class HKCCircuitOpenError(Exception):
+    """Raised instead of calling the HKC cloud while the breaker is open."""
+
+
+class HKCCircuitBreaker:
+    """Stop polling a failing cloud and probe it again with backoff.
+
+    After ``failure_threshold`` consecutive failures the breaker opens and
+    no requests are allowed until the backoff expires. The next request is
+    then let through as a single half-open probe: success closes the
+    breaker, failure opens it again with twice the backoff (plus jitter, so
+    many panels do not retry in lockstep).
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+        base_backoff: float = BREAKER_BASE_BACKOFF,
+        max_backoff: float = BREAKER_MAX_BACKOFF,
+        jitter: float = BREAKER_JITTER,
+    ) -> None:
+        self.failure_threshold = failure_threshold
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.state = STATE_CLOSED
+        self.failures = 0
+        self.trips = 0
+        self.retry_at: float | None = None
+
+    @property
+    def retry_in(self) -> float:
+        """Return the seconds left until the next probe is allowed."""
+        if self.state != STATE_OPEN or self.retry_at is None:
+            return 0.0
+        return max(self.retry_at - time.monotonic(), 0.0)
+
+    def allow_request(self) -> bool:
+        """Return True if a cloud request may be made now."""
+        if self.state == STATE_CLOSED:
+            return True
+        if self.state == STATE_OPEN and self.retry_in == 0:
+            self.state = STATE_HALF_OPEN
+            return True
+        return False
+
+    def record_success(self) -> bool:
+        """Close the breaker; return True if it was not already closed."""
+        recovered = self.state != STATE_CLOSED
+        self.state = STATE_CLOSED
+        self.failures = 0
+        self.trips = 0
+        self.retry_at = None
+        return recovered
+
+    def record_failure(self) -> bool:
+        """Count a failure; return True if this opened the breaker."""
+        self.failures += 1
+        if self.state == STATE_HALF_OPEN or self.failures >= self.failure_threshold:
+            self._trip()
+            return self.trips == 1
+        return False
+
+    def abandon_probe(self) -> None:
+        """Let another probe through after one ended without an answer."""
+        if self.state == STATE_HALF_OPEN:
+            # retry_at has passed, so the next request probes again
+            self.state = STATE_OPEN
+
+    def _trip(self) -> None:
+        self.trips += 1
+        backoff = min(self.base_backoff * 2 ** (self.trips - 1), self.max_backoff)
+        backoff *= 1 + random.uniform(-self.jitter, self.jitter)
+        self.retry_at = time.monotonic() + backoff
+        self.state = STATE_OPEN
+
+    def as_dict(self) -> dict:
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "trips": self.trips,
+            "retry_in": round(self.retry_in, 1),
+        }
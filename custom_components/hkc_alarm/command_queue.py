@@ -0,0 +1,148 @@
+"""Serialised arm/disarm commands for a single HKC panel."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable, Callable, Hashable, Iterable
+from dataclasses import dataclass
+
+from .const import (
+    COMMAND_CONFIRM_INITIAL_DELAY,
+    COMMAND_CONFIRM_MAX_DELAY,
+    COMMAND_CONFIRM_TIMEOUT,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@dataclass
+class _Confirmation:
+    is_confirmed: Callable[[], bool]
+    user_codes: frozenset[str]
+    future: asyncio.Future
+    deadline: float
+
+
+class HKCCommandQueue:
+    """Send a panel's commands one at a time and confirm them together.
+
+    Commands go out in the order they were submitted. A command whose key
+    (target block and state) matches one that is still waiting or in
+    flight is not sent again; the caller shares the earlier result. Once a
+    burst has been sent, a single confirmation loop refreshes the statuses
+    of the users every waiting command was sent as, instead of one loop per
+    command.
+    """
+
+    def __init__(self, coordinator) -> None:
+        self._coordinator = coordinator
+        self._lock = asyncio.Lock()
+        self._pending: dict[Hashable, asyncio.Future] = {}
+        self._confirmations: list[_Confirmation] = []
+        self._confirm_task: asyncio.Task | None = None
+
+    async def async_send(
+        self, key: Hashable, send: Callable[[], Awaitable[dict]]
+    ) -> dict:
+        """Send a command after those before it, or join an identical one."""
+        if (pending := self._pending.get(key)) is not None:
+            _LOGGER.debug("Coalescing duplicate command %s", key)
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending[key] = future
+        try:
+            async with self._lock:
+                result = await send()
+        except BaseException as err:
+            if isinstance(err, Exception):
+                future.set_exception(err)
+                # Only coalesced callers care; don't warn if there were none
+                future.exception()
+            else:
+                future.cancel()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._pending[key]
+
+    async def async_confirm(
+        self, is_confirmed: Callable[[], bool], user_codes: Iterable[str]
+    ) -> bool:
+        """Wait until ``is_confirmed`` holds after a refresh, or time out.
+
+        Only the statuses of ``user_codes`` are refreshed for it.
+
+        The shared refresh loop runs in its own task, so a cancelled caller
+        only drops its own confirmation. The loop stops once nobody waits.
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._confirmations.append(
+            _Confirmation(
+                is_confirmed,
+                frozenset(user_codes),
+                future,
+                time.monotonic() + COMMAND_CONFIRM_TIMEOUT,
+            )
+        )
+        if self._confirm_task is None:
+            self._confirm_task = asyncio.get_running_loop().create_task(
+                self._async_run_confirmations(), name="hkc_alarm_command_confirm"
+            )
+        try:
+            return await future
+        finally:
+            if self._confirm_task is not None and all(
+                confirmation.future.done() for confirmation in self._confirmations
+            ):
+                # Every caller is gone; the next confirmation starts afresh
+                self._confirm_task.cancel()
+                self._confirm_task = None
+                self._confirmations.clear()
+
+    async def _async_run_confirmations(self) -> None:
+        try:
+            await self._async_confirm_loop()
+        finally:
+            if self._confirm_task is asyncio.current_task():
+                self._confirm_task = None
+                for confirmation in self._confirmations:
+                    if not confirmation.future.done():
+                        confirmation.future.set_result(False)
+                self._confirmations.clear()
+
+    async def _async_confirm_loop(self) -> None:
+        delay = COMMAND_CONFIRM_INITIAL_DELAY
+        while self._confirmations:
+            # Deadlines are wall time, so refreshes count against them too
+            next_deadline = min(
+                confirmation.deadline for confirmation in self._confirmations
+            )
+            await asyncio.sleep(max(min(delay, next_deadline - time.monotonic()), 0))
+            # Let the rest of a burst go out before the shared refresh
+            async with self._lock:
+                pass
+            await self._coordinator.async_refresh_statuses(
+                frozenset().union(
+                    *(confirmation.user_codes for confirmation in self._confirmations)
+                )
+            )
+
+            now = time.monotonic()
+            remaining = []
+            for confirmation in self._confirmations:
+                if confirmation.future.done():
+                    # The caller was cancelled
+                    continue
+                if confirmation.is_confirmed():
+                    confirmation.future.set_result(True)
+                elif now >= confirmation.deadline:
+                    confirmation.future.set_result(False)
+                else:
+                    remaining.append(confirmation)
+            self._confirmations = remaining
+            delay = min(delay * 2, COMMAND_CONFIRM_MAX_DELAY)
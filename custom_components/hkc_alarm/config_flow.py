@@ -7,9 +7,11 @@ from homeassistant import config_entries
 from homeassistant.core import callback
 
 from .const import (
+    CONF_ADAPTIVE_POLLING,
     CONF_ADDITIONAL_USER_CODES,
     CONF_REQUIRE_USER_PIN,
     CONF_UPDATE_INTERVAL,
+    DEFAULT_ADAPTIVE_POLLING,
     DEFAULT_REQUIRE_USER_PIN,
     DEFAULT_UPDATE_INTERVAL,
     DOMAIN,
@@ -20,7 +22,8 @@ from .helpers import (
     parse_additional_user_codes,
     serialize_user_codes,
 )
-from .pyhkc_compat import build_hkc_alarm
+from .manager import async_get_manager, credential_key
+from .pyhkc_compat import build_hkc_alarm, get_status_for_user
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -47,6 +50,10 @@ def _get_user_schema(defaults: dict | None = None) -> vol.Schema:
                 CONF_UPDATE_INTERVAL,
                 default=defaults.get(CONF_UPDATE_INTERVAL, DEFAULT_UPDATE_INTERVAL),
             ): int,
+            vol.Optional(
+                CONF_ADAPTIVE_POLLING,
+                default=defaults.get(CONF_ADAPTIVE_POLLING, DEFAULT_ADAPTIVE_POLLING),
+            ): bool,
         }
     )
 
@@ -93,9 +100,13 @@ class HKCAlarmConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                     user_codes[1:],
                 )
 
-                is_authenticated = await self.hass.async_add_executor_job(api.check_login)
+                # Same check as pyhkc's check_login, but the status is kept
+                # so setup can reuse it along with the login
+                status = await self.hass.async_add_executor_job(
+                    get_status_for_user, api, alarm_code
+                )
 
-                if not is_authenticated:
+                if "userOptions" not in status:
                     errors["base"] = "invalid_auth"
                 else:
                     if self._find_existing_entry_for_panel(panel_id) is not None:
@@ -103,6 +114,14 @@ class HKCAlarmConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                     await self.async_set_unique_id(panel_id)
                     self._abort_if_unique_id_configured()
 
+                    async_get_manager(self.hass).async_offer_login(
+                        panel_id,
+                        credential_key(
+                            panel_id, panel_password, alarm_code, user_codes[1:]
+                        ),
+                        api,
+                        {user_codes[0]: status},
+                    )
                     return self.async_create_entry(
                         title=f"HKC Alarm {panel_id}",
                         data={
@@ -118,6 +137,11 @@ class HKCAlarmConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                                     CONF_REQUIRE_USER_PIN, DEFAULT_REQUIRE_USER_PIN
                                 )
                             ),
+                            CONF_ADAPTIVE_POLLING: bool(
+                                user_input.get(
+                                    CONF_ADAPTIVE_POLLING, DEFAULT_ADAPTIVE_POLLING
+                                )
+                            ),
                         },
                     )
 
@@ -158,6 +182,9 @@ class HKCAlarmOptionsFlow(config_entries.OptionsFlow):
             CONF_REQUIRE_USER_PIN: self.config_entry.options.get(
                 CONF_REQUIRE_USER_PIN, DEFAULT_REQUIRE_USER_PIN
             ),
+            CONF_ADAPTIVE_POLLING: self.config_entry.options.get(
+                CONF_ADAPTIVE_POLLING, DEFAULT_ADAPTIVE_POLLING
+            ),
         }
 
         if user_input is not None:
@@ -178,6 +205,11 @@ class HKCAlarmOptionsFlow(config_entries.OptionsFlow):
                                 CONF_REQUIRE_USER_PIN, DEFAULT_REQUIRE_USER_PIN
                             )
                         ),
+                        CONF_ADAPTIVE_POLLING: bool(
+                            user_input.get(
+                                CONF_ADAPTIVE_POLLING, DEFAULT_ADAPTIVE_POLLING
+                            )
+                        ),
                     }
                 )
 
@@ -189,6 +221,10 @@ class HKCAlarmOptionsFlow(config_entries.OptionsFlow):
                     default=DEFAULT_REQUIRE_USER_PIN,
                 ): bool,
                 vol.Optional(CONF_UPDATE_INTERVAL, default=DEFAULT_UPDATE_INTERVAL): int,
+                vol.Optional(
+                    CONF_ADAPTIVE_POLLING,
+                    default=DEFAULT_ADAPTIVE_POLLING,
+                ): bool,
             }
         )
 
@@ -4,7 +4,34 @@
 DOMAIN = "hkc_alarm"
 DEFAULT_UPDATE_INTERVAL = 60  # Default update interval in seconds
 MIN_UPDATE_INTERVAL = 30  # Minimum update interval in seconds
+MAX_CONCURRENT_REQUESTS = 4  # Maximum in-flight HKC cloud calls per panel
+MAX_GLOBAL_REQUESTS = 8  # Maximum in-flight HKC cloud calls across all panels
+POLL_SPREAD = 7  # Seconds between the poll slots of different panels
+LOGIN_HANDOFF_TTL = 120  # Seconds a login validated by the config flow waits for setup
+DATA_MANAGER = "manager"  # hass.data[DOMAIN] key of the shared connection manager
+REQUEST_TIMEOUT = 30  # Timeout for a single HKC cloud request in seconds
+REQUEST_RETRIES = 2  # Extra attempts after a connection error or 5xx, as pyhkc retries
+REQUEST_RETRY_DELAY = 1  # Seconds before the first retry, doubled for each one after
 CONF_UPDATE_INTERVAL = "update_interval"
+CONF_BASE_URL = "base_url"  # Optional HKC cloud URL override, e.g. a local simulator
 CONF_ADDITIONAL_USER_CODES = "additional_user_codes"
 CONF_REQUIRE_USER_PIN = "require_user_pin"
 DEFAULT_REQUIRE_USER_PIN = False
+CONF_ADAPTIVE_POLLING = "adaptive_polling"
+DEFAULT_ADAPTIVE_POLLING = False
+FAST_UPDATE_INTERVAL = 10  # Adaptive polling interval after commands or during alarms
+FAST_POLLING_WINDOW = 120  # Seconds of fast polling after an arm/disarm command
+IDLE_BACKOFF_CYCLES = 5  # Unchanged refreshes before the adaptive interval doubles
+MAX_IDLE_UPDATE_INTERVAL = 600  # Longest adaptive polling interval in seconds
+COMMAND_CONFIRM_TIMEOUT = 30  # Seconds to wait for the panel to confirm a command
+COMMAND_CONFIRM_INITIAL_DELAY = 1  # First confirmation poll delay in seconds
+COMMAND_CONFIRM_MAX_DELAY = 5  # Longest delay between confirmation polls
+BREAKER_FAILURE_THRESHOLD = 3  # Consecutive failed refreshes before the breaker opens
+BREAKER_BASE_BACKOFF = 60  # First breaker backoff in seconds, doubled per failed probe
+BREAKER_MAX_BACKOFF = 1800  # Longest breaker backoff in seconds
+BREAKER_JITTER = 0.2  # Random +/- fraction applied to each breaker backoff
+STALE_DATA_MAX_AGE = 900  # Seconds the last good data is served during an outage
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)  # Histogram bounds in seconds
+METADATA_CACHE_VERSION = 2  # Bump when the cached metadata layout changes
+TIMESTAMP_CACHE_SIZE = 4096  # Distinct input timestamp strings kept parsed
+INPUT_OPEN_WINDOW = 60  # Seconds an input reads as open around its timestamp (panel clock resolution)
@@ -0,0 +1,49 @@
+"""Diagnostics support for the HKC Alarm integration."""
+
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import CONF_ADDITIONAL_USER_CODES, CONF_BASE_URL, DOMAIN
+
+TO_REDACT = {
+    "panel_id",
+    "panel_password",
+    "user_code",
+    CONF_ADDITIONAL_USER_CODES,
+    CONF_BASE_URL,
+}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    entry_data = hass.data[DOMAIN][entry.entry_id]
+    scheduler = entry_data["scheduler"]
+    return {
+        "entry": {
+            "data": async_redact_data(dict(entry.data), TO_REDACT),
+            "options": async_redact_data(dict(entry.options), TO_REDACT),
+        },
+        "scheduler": {
+            "last_update": scheduler.last_update.isoformat()
+            if scheduler.last_update
+            else None,
+            "update_interval": scheduler.update_interval.total_seconds(),
+            "current_interval": scheduler.current_interval.total_seconds(),
+            "adaptive_polling": scheduler.adaptive_polling,
+            "async_client": scheduler.client is not None,
+            "shared_input_fetch": scheduler.inputs_source is not None,
+            "stale_since": scheduler.stale_since.isoformat()
+            if scheduler.stale_since
+            else None,
+        },
+        "circuit_breaker": scheduler.breaker.as_dict(),
+        "views": len(entry_data["views"]),
+        "metrics": scheduler.metrics.as_dict(),
+    }
@@ -0,0 +1,69 @@
+"""Shared behaviour for HKC Alarm entities."""
+
+from __future__ import annotations
+
+from homeassistant.helpers.device_registry import DeviceInfo
+
+from .const import DOMAIN
+
+# Stand-in until the entity is added, kept as one object so caches hold
+_NO_ENTRY_DATA: dict = {}
+
+
+def build_view_device_info(panel_id: str, view: dict, metadata: dict) -> DeviceInfo:
+    """Return the device an alarm view's entities belong to."""
+    identifier = (
+        (DOMAIN, panel_id)
+        if not view["multi_view"]
+        else (DOMAIN, f"{panel_id}_{view['key']}")
+    )
+    device_info = DeviceInfo(
+        identifiers={identifier},
+        name=view["label"],
+        manufacturer="HKC",
+        model=metadata.get("model", "HKC Alarm"),
+        sw_version=metadata.get("sw_version", "1.0.0"),
+    )
+    if metadata.get("serial_number"):
+        device_info["serial_number"] = metadata["serial_number"]
+    return device_info
+
+
+class HKCViewEntity:
+    """Mixin for coordinator entities shown on an alarm view's device.
+
+    Home Assistant reads ``device_info`` and the state attributes on every
+    state write. The entry data lookup and the device info are therefore
+    built once, and rebuilt only when a metadata revalidation replaces the
+    entry's ``device_metadata``.
+    """
+
+    _entry_data_cache: dict | None = None
+    _device_info_cache: tuple[dict, DeviceInfo] | None = None
+
+    @property
+    def _entry_data(self) -> dict:
+        if self._entry_data_cache is None:
+            if (
+                getattr(self, "hass", None) is None
+                or self.coordinator.config_entry is None
+            ):
+                return _NO_ENTRY_DATA
+            self._entry_data_cache = self.hass.data[DOMAIN][
+                self.coordinator.config_entry.entry_id
+            ]
+        return self._entry_data_cache
+
+    @property
+    def _device_metadata(self) -> dict:
+        return self._entry_data.get("device_metadata", _NO_ENTRY_DATA)
+
+    @property
+    def device_info(self) -> DeviceInfo:
+        metadata = self._device_metadata
+        if self._device_info_cache is None or self._device_info_cache[0] is not metadata:
+            self._device_info_cache = (
+                metadata,
+                build_view_device_info(self._panel_id, self._view, metadata),
+            )
+        return self._device_info_cache[1]
@@ -2,8 +2,25 @@
 
 from __future__ import annotations
 
+import asyncio
 import re
-from collections.abc import Iterable
+from collections.abc import Awaitable, Callable, Iterable
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import TypeVar
+
+from .const import TIMESTAMP_CACHE_SIZE
+
+_T = TypeVar("_T")
+
+_WEEKDAYS = frozenset(("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"))
+_MONTHS = {
+    name: number
+    for number, name in enumerate(
+        ("Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"),
+        start=1,
+    )
+}
 
 
 class InvalidUserCodeError(ValueError):
@@ -46,6 +63,28 @@ def normalize_configured_user_codes(
     return unique_codes
 
 
+async def async_gather_limited(
+    jobs: Iterable[Callable[[], Awaitable[_T]]],
+    limit: int,
+    shared_limiter: asyncio.Semaphore | None = None,
+) -> list[_T]:
+    """Run job factories concurrently with at most ``limit`` in flight.
+
+    ``shared_limiter`` additionally caps jobs across every caller holding
+    the same semaphore. Results are returned in the same order as ``jobs``.
+    """
+    semaphore = asyncio.Semaphore(max(limit, 1))
+
+    async def _run(job: Callable[[], Awaitable[_T]]) -> _T:
+        async with semaphore:
+            if shared_limiter is None:
+                return await job()
+            async with shared_limiter:
+                return await job()
+
+    return list(await asyncio.gather(*(_run(job) for job in jobs)))
+
+
 def serialize_user_codes(user_codes: Iterable[str]) -> str:
     """Convert stored user codes to an options-form string."""
     return ", ".join(str(code) for code in user_codes)
@@ -150,3 +189,191 @@ def build_alarm_views(
         )
 
     return views
+
+
+@lru_cache(maxsize=TIMESTAMP_CACHE_SIZE)
+def parse_input_timestamp(timestamp: str) -> datetime | None:
+    """Parse an input timestamp such as ``2024-05-12T20:55:00Z`` as UTC.
+
+    The trailing ``Z`` is optional. Returns None if the value is not in
+    that fixed format. Inputs report the same timestamp until they trigger
+    again, so each distinct string is only parsed once.
+    """
+    if (
+        not isinstance(timestamp, str)
+        or len(timestamp) not in (19, 20)
+        or timestamp[19:] not in ("", "Z")
+        or timestamp[4] != "-"
+        or timestamp[7] != "-"
+        or timestamp[10] != "T"
+        or timestamp[13] != ":"
+        or timestamp[16] != ":"
+    ):
+        return None
+    try:
+        return datetime(
+            int(timestamp[0:4]),
+            int(timestamp[5:7]),
+            int(timestamp[8:10]),
+            int(timestamp[11:13]),
+            int(timestamp[14:16]),
+            int(timestamp[17:19]),
+            tzinfo=timezone.utc,
+        )
+    except ValueError:
+        return None
+
+
+@lru_cache(maxsize=32)
+def parse_panel_time(display: str, year: int) -> datetime | None:
+    """Parse the keypad display clock (``Sun 12 May 20:55``) as UTC.
+
+    The panel always shows English day and month names, so this does not
+    depend on the host locale the way ``strptime`` does. Returns None when
+    the display is showing something other than the clock.
+    """
+    parts = display.split()
+    if len(parts) != 4 or parts[0] not in _WEEKDAYS or parts[2] not in _MONTHS:
+        return None
+    hour, _, minute = parts[3].partition(":")
+    try:
+        return datetime(
+            year, _MONTHS[parts[2]], int(parts[1]), int(hour), int(minute),
+            tzinfo=timezone.utc,
+        )
+    except ValueError:
+        return None
+
+
+def input_identifier(input_data: dict):
+    """Return a stable input identifier from HKC payloads."""
+    return input_data.get("inputId", input_data.get("input"))
+
+
+def build_input_index(
+    inputs_by_user: dict[str, list[dict]],
+) -> dict[str, dict[str, dict]]:
+    """Index each user's inputs by their string input identifier."""
+    index: dict[str, dict[str, dict]] = {}
+    for code, inputs in inputs_by_user.items():
+        user_index: dict[str, dict] = {}
+        for input_data in inputs or []:
+            input_id = input_identifier(input_data)
+            if input_id is not None:
+                user_index.setdefault(str(input_id), input_data)
+        index[code] = user_index
+    return index
+
+
+def diff_input_index(
+    previous: dict[str, dict[str, dict]],
+    current: dict[str, dict[str, dict]],
+) -> set[tuple[str, str]]:
+    """Return the ``(user_code, input_id)`` pairs that differ between indexes.
+
+    Inputs that appeared or disappeared count as changed.
+    """
+    changed: set[tuple[str, str]] = set()
+    for code in previous.keys() | current.keys():
+        previous_inputs = previous.get(code, {})
+        current_inputs = current.get(code, {})
+        for input_id, input_data in current_inputs.items():
+            if previous_inputs.get(input_id) != input_data:
+                changed.add((code, input_id))
+        changed.update(
+            (code, input_id)
+            for input_id in previous_inputs.keys() - current_inputs.keys()
+        )
+    return changed
+
+
+def split_inputs_by_visibility(
+    inputs: list[dict],
+    user_codes: Iterable[str],
+) -> dict[str, list[dict]] | None:
+    """Build each user's input list from the inputs' ``visibleUserCodes``.
+
+    Returns None if any input does not say which users can see it.
+    """
+    inputs_by_user: dict[str, list[dict]] = {str(code): [] for code in user_codes}
+    for input_data in inputs:
+        visible_user_codes = input_data.get("visibleUserCodes")
+        if visible_user_codes is None:
+            return None
+        for code in visible_user_codes:
+            if (user_inputs := inputs_by_user.get(str(code))) is not None:
+                user_inputs.append(input_data)
+    return inputs_by_user
+
+
+def find_inputs_source(inputs_by_user: dict[str, list[dict]]) -> str | None:
+    """Return a user code whose inputs can stand in for every user's fetch.
+
+    A code qualifies when splitting its input list by ``visibleUserCodes``
+    gives back exactly the inputs each user fetched for themselves, payloads
+    included: the split hands everyone the source user's copy, so a zone
+    whose state or inhibit differs per user rules the shortcut out.
+    """
+
+    def inputs_by_id(inputs: Iterable[dict]) -> dict[str, dict]:
+        return {str(input_identifier(input_data)): input_data for input_data in inputs}
+
+    expected = {
+        code: inputs_by_id(inputs or []) for code, inputs in inputs_by_user.items()
+    }
+    # Try the user who sees the most first; they are the likeliest to cover everyone
+    for code in sorted(expected, key=lambda code: len(expected[code]), reverse=True):
+        split = split_inputs_by_visibility(inputs_by_user[code] or [], expected)
+        if split is not None and all(
+            inputs_by_id(split[user_code]) == user_inputs
+            for user_code, user_inputs in expected.items()
+        ):
+            return code
+    return None
+
+
+def build_input_topology(inputs_by_user: dict[str, list[dict]]) -> dict[str, list[dict]]:
+    """Keep only the input fields needed to create sensor entities."""
+    topology: dict[str, list[dict]] = {}
+    for code, inputs in inputs_by_user.items():
+        topology[code] = [
+            {
+                key: input_data[key]
+                for key in ("inputId", "input", "description")
+                if key in input_data
+            }
+            for input_data in inputs or []
+        ]
+    return topology
+
+
+def build_metadata_signature(metadata: dict) -> tuple:
+    """Return the parts of cached metadata that decide which entities exist."""
+
+    def input_keys(inputs: Iterable[dict]) -> tuple:
+        return tuple(
+            sorted(
+                (str(input_identifier(input_data)), input_data.get("description"))
+                for input_data in inputs
+            )
+        )
+
+    entity_map = metadata.get("entity_map") or {}
+    return (
+        tuple(
+            (
+                view["key"],
+                view["label"],
+                tuple(view["block_numbers"]),
+                tuple(str(code) for code in view["allowed_user_codes"]),
+                input_keys(view.get("inputs", [])),
+            )
+            for view in metadata.get("views", [])
+        ),
+        input_keys(entity_map.get("sharedInputs", [])),
+        input_keys(entity_map.get("ambiguousInputs", [])),
+        tuple(
+            (code, input_keys(inputs))
+            for code, inputs in sorted((metadata.get("input_topology") or {}).items())
+        ),
+    )
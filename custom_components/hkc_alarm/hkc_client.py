@@ -0,0 +1,159 @@
+"""Asyncio transport for the HKC cloud API."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import TYPE_CHECKING
+
+import aiohttp
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.aiohttp_client import async_create_clientsession
+
+from .const import REQUEST_RETRIES, REQUEST_RETRY_DELAY, REQUEST_TIMEOUT
+from .pyhkc_compat import ALARM_COMMANDS
+
+if TYPE_CHECKING:
+    from pyhkc.hkc_api import HKCAlarm
+
+_LOGGER = logging.getLogger(__name__)
+
+_IDENTITY_ATTRIBUTES = (
+    "base_url",
+    "headers",
+    "hardware_id",
+    "device_id",
+    "panel_password",
+    "user_code",
+)
+
+
+class HKCAsyncClient:
+    """Non-blocking access to the HKC endpoints polled by the integration.
+
+    Login (the device id lookup) is still done by pyhkc when the HKCAlarm is
+    built. This client reuses that identity and sends every later request
+    over a pooled, keep-alive aiohttp session (shared by all panels when
+    built by the connection manager) instead of tying up an executor thread
+    for each round trip.
+
+    Like pyhkc, a request that hits a connection error or a 5xx response is
+    retried, so one dropped request does not fail a whole refresh. The
+    retries are fewer and shorter than pyhkc's, since a refresh waits on
+    them.
+    """
+
+    def __init__(self, session: aiohttp.ClientSession, hkc_alarm: HKCAlarm) -> None:
+        self._session = session
+        self._hkc_alarm = hkc_alarm
+        self._timeout = aiohttp.ClientTimeout(total=REQUEST_TIMEOUT)
+        self.panel_id = hkc_alarm.panel_id
+
+    def _device_payload(self, user_code: str | None = None) -> dict:
+        user_code = self._hkc_alarm.user_code if user_code is None else user_code
+        return {
+            "hardwareId": self._hkc_alarm.hardware_id,
+            "deviceId": self._hkc_alarm.device_id,
+            "devicePassword": self._hkc_alarm.panel_password,
+            "userCode": str(int(user_code)),
+        }
+
+    async def _async_request(self, path: str, data: dict):
+        delay = REQUEST_RETRY_DELAY
+        for attempt in range(REQUEST_RETRIES + 1):
+            try:
+                return await self._async_post(path, data)
+            except (aiohttp.ClientConnectionError, aiohttp.ClientResponseError) as err:
+                if attempt == REQUEST_RETRIES or not _is_transient(err):
+                    raise
+                _LOGGER.debug("Retrying %s in %s seconds: %s", path, delay, err)
+            await asyncio.sleep(delay)
+            delay *= 2
+
+    async def _async_post(self, path: str, data: dict):
+        _LOGGER.debug("Making POST request to %s", path)
+        async with self._session.post(
+            f"{self._hkc_alarm.base_url}{path}",
+            json=data,
+            headers=self._hkc_alarm.headers,
+            timeout=self._timeout,
+        ) as response:
+            response.raise_for_status()
+            return await response.json(content_type=None)
+
+    async def async_get_system_status(self, user_code: str | None = None) -> dict:
+        """Return the system status as seen by a user."""
+        data = self._device_payload(user_code)
+        data["includeDescriptions"] = True
+        return await self._async_request("/AppV3/Device/Status", data)
+
+    async def async_get_all_inputs(self, user_code: str | None = None) -> list[dict]:
+        """Return every input visible to a user, following pagination."""
+        all_inputs: list[dict] = []
+        first_input = 1
+        while True:
+            data = self._device_payload(user_code)
+            data["firstInput"] = first_input
+            response = await self._async_request("/AppV3/Device/Inputs", data)
+            current_inputs = response.get("inputs", [])
+            all_inputs.extend(current_inputs)
+            if not response.get("moreInputs", False) or not current_inputs:
+                return all_inputs
+            first_input = current_inputs[-1].get("input", 1) + 1
+
+    async def async_get_panel(self) -> dict:
+        """Return the remote keypad state."""
+        data = self._device_payload()
+        data["keys"] = ""
+        return await self._async_request("/AppV3/Device/RemoteKeypad", data)
+
+    async def async_send_command(
+        self,
+        command_name: str,
+        user_code: str,
+        block_number: int | None = None,
+    ) -> dict:
+        """Send an arm or disarm command, optionally to a single block."""
+        data = self._device_payload(user_code)
+        data.update(
+            {
+                "command": ALARM_COMMANDS[command_name],
+                "block": max(block_number - 1, 0) if block_number else 0,
+                "inhibit": False,
+            }
+        )
+        return await self._async_request("/AppV3/Device/Arming", data)
+
+    async def async_close(self) -> None:
+        """Close the pooled session."""
+        await self._session.close()
+
+
+def _is_transient(err: aiohttp.ClientError) -> bool:
+    if isinstance(err, aiohttp.ClientResponseError):
+        return err.status >= 500
+    return True
+
+
+def supports_async_client(hkc_alarm: HKCAlarm) -> bool:
+    """Return True if the HKCAlarm exposes the identity the client reuses."""
+    return all(hasattr(hkc_alarm, attribute) for attribute in _IDENTITY_ATTRIBUTES)
+
+
+def build_client_session(hass: HomeAssistant) -> aiohttp.ClientSession:
+    """Return a pooled session for talking to the HKC cloud."""
+    return async_create_clientsession(hass)
+
+
+def build_async_client(
+    hass: HomeAssistant,
+    hkc_alarm: HKCAlarm,
+    session: aiohttp.ClientSession | None = None,
+) -> HKCAsyncClient | None:
+    """Return an async client when the installed pyhkc exposes its identity."""
+    if not supports_async_client(hkc_alarm):
+        _LOGGER.debug(
+            "installed pyhkc does not expose AppV3 identity; using executor transport"
+        )
+        return None
+    return HKCAsyncClient(session or build_client_session(hass), hkc_alarm)
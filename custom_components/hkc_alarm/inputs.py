@@ -0,0 +1,109 @@
+"""Compact, shared records for HKC panel inputs."""
+
+from __future__ import annotations
+
+import sys
+from collections.abc import Iterator, Mapping
+from typing import Any
+
+# Upstream payload keys the integration reads, in record field order
+INPUT_FIELDS = (
+    "inputId",
+    "input",
+    "description",
+    "inputState",
+    "inputType",
+    "timestamp",
+    "actionInhibit",
+    "cameraId",
+    "visibleUserCodes",
+)
+_FIELD_INDEX = {key: index for index, key in enumerate(INPUT_FIELDS)}
+
+
+def _input_values(payload: Mapping[str, Any]) -> tuple:
+    values = []
+    for key in INPUT_FIELDS:
+        value = payload.get(key)
+        if isinstance(value, str) and key in ("inputId", "description"):
+            value = sys.intern(value)
+        elif isinstance(value, list):
+            value = tuple(value)
+        values.append(value)
+    return tuple(values)
+
+
+class HKCInput(Mapping):
+    """One panel input, keeping only the payload fields the integration reads.
+
+    Records are read-only mappings over the upstream keys, so code written
+    against the raw payload dicts keeps working. Missing fields are stored
+    as None and left out of the mapping.
+    """
+
+    __slots__ = ("_values", "_hash")
+
+    def __init__(self, values: tuple) -> None:
+        self._values = values
+        self._hash = hash(values)
+
+    @classmethod
+    def from_payload(cls, payload: Mapping[str, Any]) -> HKCInput:
+        if isinstance(payload, cls):
+            return payload
+        return cls(_input_values(payload))
+
+    def __getitem__(self, key: str) -> Any:
+        index = _FIELD_INDEX.get(key)
+        if index is None or self._values[index] is None:
+            raise KeyError(key)
+        return self._values[index]
+
+    def __iter__(self) -> Iterator[str]:
+        return (key for key, value in zip(INPUT_FIELDS, self._values) if value is not None)
+
+    def __len__(self) -> int:
+        return sum(value is not None for value in self._values)
+
+    def __eq__(self, other: object) -> bool:
+        if self is other:
+            return True
+        if isinstance(other, HKCInput):
+            return self._hash == other._hash and self._values == other._values
+        if isinstance(other, Mapping):
+            return dict(self) == dict(other)
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return self._hash
+
+    def __repr__(self) -> str:
+        return f"HKCInput({dict(self)!r})"
+
+
+class HKCInputPool:
+    """Hand out one shared ``HKCInput`` per distinct input payload.
+
+    Users that can see the same zone get the same record, and a zone that
+    did not change between refreshes keeps its record from the last one.
+    Only the records seen in the latest refresh are kept.
+    """
+
+    def __init__(self) -> None:
+        self._records: dict[tuple, HKCInput] = {}
+
+    def intern(self, inputs_by_user: dict[str, list[dict]]) -> dict[str, list[HKCInput]]:
+        previous = self._records
+        records: dict[tuple, HKCInput] = {}
+        interned: dict[str, list[HKCInput]] = {}
+        for code, inputs in inputs_by_user.items():
+            user_inputs = []
+            for payload in inputs or []:
+                values = _input_values(payload)
+                record = records.get(values)
+                if record is None:
+                    record = records[values] = previous.get(values) or HKCInput(values)
+                user_inputs.append(record)
+            interned[code] = user_inputs
+        self._records = records
+        return interned
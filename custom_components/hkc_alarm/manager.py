@@ -0,0 +1,160 @@
+"""HKC cloud resources shared by every configured panel."""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import time
+from collections.abc import Callable, Iterable
+from typing import TYPE_CHECKING
+
+import aiohttp
+from homeassistant.core import HomeAssistant, callback
+
+from .const import (
+    DATA_MANAGER,
+    DOMAIN,
+    LOGIN_HANDOFF_TTL,
+    MAX_GLOBAL_REQUESTS,
+    POLL_SPREAD,
+)
+from .hkc_client import (
+    HKCAsyncClient,
+    build_async_client,
+    build_client_session,
+    supports_async_client,
+)
+
+if TYPE_CHECKING:
+    from pyhkc.hkc_api import HKCAlarm
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def credential_key(
+    panel_id: str,
+    panel_password: str,
+    user_code: str,
+    additional_user_codes: Iterable[str] = (),
+    base_url: str | None = None,
+) -> str:
+    """Return a digest identifying one set of panel credentials."""
+    parts = [str(panel_id), panel_password, str(user_code), *map(str, additional_user_codes)]
+    parts.append(base_url or "")
+    return hashlib.sha256("\0".join(parts).encode()).hexdigest()
+
+
+class HKCConnectionManager:
+    """Own the HKC cloud connections for all config entries.
+
+    Panels share one pooled HTTP session and a global limit on in-flight
+    cloud requests, and each panel gets its own poll slot so panels do not
+    all refresh at the same moment.
+
+    The config flow hands over the login it validated, together with the
+    statuses it fetched, so setting up a new entry does not log in again.
+    Logins are not kept past that: every other setup logs in afresh, so
+    reloading an entry always clears a stale HKC session.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        self.hass = hass
+        self.limiter = asyncio.Semaphore(MAX_GLOBAL_REQUESTS)
+        self._session: aiohttp.ClientSession | None = None
+        self._session_users: set[str] = set()
+        # panel id -> (credential digest, alarm, statuses by user, expiry)
+        self._handoffs: dict[str, tuple[str, HKCAlarm, dict[str, dict], float]] = {}
+        self._panels: dict[str, str] = {}
+        self._poll_slots: dict[str, int] = {}
+
+    @callback
+    def async_claim_panel(self, entry_id: str, panel_id: str) -> bool:
+        """Reserve a panel for an entry; False if another entry has it."""
+        owner = self._panels.setdefault(str(panel_id), entry_id)
+        return owner == entry_id
+
+    @callback
+    def async_offer_login(
+        self,
+        panel_id: str,
+        credentials: str,
+        hkc_alarm: HKCAlarm,
+        statuses_by_user: dict[str, dict],
+    ) -> None:
+        """Keep a freshly validated login for the entry about to be set up."""
+        now = time.monotonic()
+        self._handoffs = {
+            handoff_panel_id: handoff
+            for handoff_panel_id, handoff in self._handoffs.items()
+            if handoff[3] > now
+        }
+        self._handoffs[str(panel_id)] = (
+            credentials,
+            hkc_alarm,
+            statuses_by_user,
+            now + LOGIN_HANDOFF_TTL,
+        )
+
+    async def async_get_alarm(
+        self,
+        entry_id: str,
+        panel_id: str,
+        credentials: str,
+        build: Callable[[], HKCAlarm],
+    ) -> tuple[HKCAlarm, dict[str, dict]]:
+        """Return an HKCAlarm for the entry, using the config flow's if offered.
+
+        Also returns any statuses handed over with the login, by user code.
+        """
+        handoff = self._handoffs.pop(str(panel_id), None)
+        if (
+            handoff is not None
+            and handoff[0] == credentials
+            and handoff[3] > time.monotonic()
+        ):
+            _LOGGER.debug("Using the config flow's HKC login for entry %s", entry_id)
+            hkc_alarm, statuses_by_user = handoff[1], handoff[2]
+        else:
+            hkc_alarm = await self.hass.async_add_executor_job(build)
+            statuses_by_user = {}
+        return hkc_alarm, statuses_by_user
+
+    @callback
+    def async_get_client(self, entry_id: str, hkc_alarm: HKCAlarm) -> HKCAsyncClient | None:
+        """Return an async client for the panel on the shared session."""
+        if not supports_async_client(hkc_alarm):
+            return build_async_client(self.hass, hkc_alarm)
+        if self._session is None or self._session.closed:
+            self._session = build_client_session(self.hass)
+        self._session_users.add(entry_id)
+        return build_async_client(self.hass, hkc_alarm, self._session)
+
+    @callback
+    def async_poll_offset(self, entry_id: str, update_interval: float) -> float:
+        """Return how far to push back an entry's polls, in seconds."""
+        if entry_id not in self._poll_slots:
+            taken = set(self._poll_slots.values())
+            self._poll_slots[entry_id] = next(
+                slot for slot in range(len(taken) + 1) if slot not in taken
+            )
+        return (self._poll_slots[entry_id] * POLL_SPREAD) % max(update_interval, 1)
+
+    async def async_release(self, entry_id: str) -> None:
+        """Free everything an unloaded entry held."""
+        for panel_id, owner in list(self._panels.items()):
+            if owner == entry_id:
+                del self._panels[panel_id]
+        self._poll_slots.pop(entry_id, None)
+        self._session_users.discard(entry_id)
+        if not self._session_users and self._session is not None:
+            await self._session.close()
+            self._session = None
+
+@callback
+def async_get_manager(hass: HomeAssistant) -> HKCConnectionManager:
+    """Return the domain's connection manager, creating it on first use."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if DATA_MANAGER not in domain_data:
+        domain_data[DATA_MANAGER] = HKCConnectionManager(hass)
+    return domain_data[DATA_MANAGER]
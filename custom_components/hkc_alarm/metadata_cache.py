@@ -0,0 +1,54 @@
+"""Persistent cache of static HKC panel metadata."""
+
+from __future__ import annotations
+
+import logging
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN, METADATA_CACHE_VERSION
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class _MetadataStore(Store[dict]):
+    async def _async_migrate_func(self, old_major_version, old_minor_version, old_data):
+        # Metadata is refetched on the next setup, so older layouts are dropped
+        return {}
+
+
+class HKCMetadataCache:
+    """Store panel metadata per config entry in Home Assistant storage."""
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        self._store: Store[dict] = _MetadataStore(
+            hass,
+            METADATA_CACHE_VERSION,
+            f"{DOMAIN}.{entry_id}.metadata",
+        )
+
+    async def async_load(self, configured_user_codes: list[str]) -> dict | None:
+        """Return cached metadata if it was stored for the same user codes."""
+        try:
+            data = await self._store.async_load()
+        except Exception:
+            _LOGGER.warning("failed to load cached panel metadata", exc_info=True)
+            return None
+
+        if not data or data.get("configured_user_codes") != configured_user_codes:
+            return None
+        return data.get("metadata")
+
+    async def async_save(self, configured_user_codes: list[str], metadata: dict) -> None:
+        """Persist metadata for the given user codes."""
+        await self._store.async_save(
+            {
+                "configured_user_codes": configured_user_codes,
+                "metadata": metadata,
+            }
+        )
+
+    async def async_remove(self) -> None:
+        """Remove the cached metadata."""
+        await self._store.async_remove()
@@ -0,0 +1,139 @@
+"""Timing and call counters for the HKC cloud and entity update hot paths."""
+
+from __future__ import annotations
+
+import time
+from collections.abc import Awaitable, Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import TypeVar
+
+from .const import LATENCY_BUCKETS
+
+_T = TypeVar("_T")
+
+# Upstream HKC cloud calls, as recorded by the scheduler, setup and commands
+CALL_METRICS = (
+    "status",
+    "inputs",
+    "panel",
+    "device_details",
+    "outputs",
+    "entity_map",
+    "temporary_user",
+    "command",
+    "login",
+)
+REFRESH_METRIC = "refresh"
+ENTITY_UPDATE_METRICS = ("alarm_entity_update", "sensor_entity_update")
+
+
+@dataclass
+class CallStats:
+    """Count, errors and a latency histogram for one kind of call."""
+
+    count: int = 0
+    errors: int = 0
+    total: float = 0.0
+    max: float = 0.0
+    last: float | None = None
+    buckets: list[int] = field(default_factory=lambda: [0] * (len(LATENCY_BUCKETS) + 1))
+
+    def add(self, duration: float, ok: bool = True) -> None:
+        self.count += 1
+        if not ok:
+            self.errors += 1
+        self.total += duration
+        self.max = max(self.max, duration)
+        self.last = duration
+        for index, bound in enumerate(LATENCY_BUCKETS):
+            if duration <= bound:
+                self.buckets[index] += 1
+                break
+        else:
+            self.buckets[-1] += 1
+
+    @property
+    def mean(self) -> float | None:
+        return self.total / self.count if self.count else None
+
+    def percentile(self, quantile: float) -> float | None:
+        """Return the upper bound of the bucket holding the quantile."""
+        if not self.count:
+            return None
+        target = quantile * self.count
+        seen = 0
+        for bound, bucket_count in zip(LATENCY_BUCKETS, self.buckets):
+            seen += bucket_count
+            if seen >= target:
+                return bound
+        return self.max
+
+    def as_dict(self) -> dict:
+        def ms(value: float | None) -> float | None:
+            return None if value is None else round(value * 1000, 3)
+
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "mean_ms": ms(self.mean),
+            "max_ms": ms(self.max),
+            "last_ms": ms(self.last),
+            "p50_ms": ms(self.percentile(0.5)),
+            "p95_ms": ms(self.percentile(0.95)),
+            "histogram": {
+                **{
+                    f"le_{bound}s": bucket_count
+                    for bound, bucket_count in zip(LATENCY_BUCKETS, self.buckets)
+                },
+                "inf": self.buckets[-1],
+            },
+        }
+
+
+class HKCMetrics:
+    """Per-panel call statistics, keyed by metric name."""
+
+    def __init__(self) -> None:
+        self.stats: dict[str, CallStats] = {}
+
+    def record(self, name: str, duration: float, ok: bool = True) -> None:
+        self.stats.setdefault(name, CallStats()).add(duration, ok)
+
+    @contextmanager
+    def timed(self, name: str) -> Iterator[None]:
+        """Time the enclosed block, counting it as an error if it raises."""
+        started = time.perf_counter()
+        ok = False
+        try:
+            yield
+            ok = True
+        finally:
+            self.record(name, time.perf_counter() - started, ok)
+
+    def timed_job(
+        self, name: str, job: Callable[[], Awaitable[_T]]
+    ) -> Callable[[], Awaitable[_T]]:
+        """Wrap an awaitable factory so each run is recorded under ``name``."""
+
+        async def _run() -> _T:
+            with self.timed(name):
+                return await job()
+
+        return _run
+
+    def combined(self, names) -> CallStats:
+        """Merge the statistics of several metrics."""
+        merged = CallStats()
+        for name in names:
+            if (stats := self.stats.get(name)) is None:
+                continue
+            merged.count += stats.count
+            merged.errors += stats.errors
+            merged.total += stats.total
+            merged.max = max(merged.max, stats.max)
+            merged.buckets = [a + b for a, b in zip(merged.buckets, stats.buckets)]
+        return merged
+
+    def as_dict(self) -> dict:
+        return {name: stats.as_dict() for name, stats in sorted(self.stats.items())}
@@ -5,13 +5,22 @@ from __future__ import annotations
 import inspect
 import logging
 from collections.abc import Callable
-from functools import partial
-from typing import Any
+from dataclasses import dataclass
+from functools import cache, partial
+from typing import TYPE_CHECKING, Any
 
-from pyhkc.hkc_api import HKCAlarm
+if TYPE_CHECKING:
+    from pyhkc.hkc_api import HKCAlarm
 
 _LOGGER = logging.getLogger(__name__)
 
+ALARM_COMMANDS = {
+    "disarm": 0,
+    "arm_partset_a": 1,
+    "arm_partset_b": 2,
+    "arm_fullset": 3,
+}
+
 
 def _supports_keyword(callable_obj: Callable[..., Any], keyword: str) -> bool:
     """Return True when a callable accepts a named keyword argument."""
@@ -21,22 +30,86 @@ def _supports_keyword(callable_obj: Callable[..., Any], keyword: str) -> bool:
         return False
 
 
+@dataclass(frozen=True)
+class HKCCapabilities:
+    """What the installed pyhkc HKCAlarm supports."""
+
+    multi_user_status: bool
+    multi_user_inputs: bool
+    multi_user_commands: bool
+    block_commands: bool
+    multi_user_block_commands: bool
+    user_access_summary: bool
+    entity_map: bool
+    device_details: bool
+    outputs: bool
+    temporary_user: bool
+    multi_user_temporary_user: bool
+
+
+def _method_supports_keyword(alarm_type: type, name: str, keyword: str) -> bool:
+    method = getattr(alarm_type, name, None)
+    return method is not None and _supports_keyword(method, keyword)
+
+
+@cache
+def _probe_capabilities(alarm_type: type) -> HKCCapabilities:
+    return HKCCapabilities(
+        multi_user_status=_method_supports_keyword(
+            alarm_type, "get_system_status", "user_code"
+        ),
+        multi_user_inputs=_method_supports_keyword(
+            alarm_type, "get_all_inputs", "user_code"
+        ),
+        multi_user_commands=_method_supports_keyword(alarm_type, "disarm", "user_code"),
+        block_commands=hasattr(alarm_type, "_arm_or_disarm"),
+        multi_user_block_commands=_method_supports_keyword(
+            alarm_type, "_arm_or_disarm", "user_code"
+        ),
+        user_access_summary=hasattr(alarm_type, "get_user_access_summary"),
+        entity_map=hasattr(alarm_type, "get_home_assistant_entity_map"),
+        device_details=hasattr(alarm_type, "get_device_details"),
+        outputs=hasattr(alarm_type, "get_outputs"),
+        temporary_user=hasattr(alarm_type, "get_temporary_user"),
+        multi_user_temporary_user=_method_supports_keyword(
+            alarm_type, "get_temporary_user", "user_code"
+        ),
+    )
+
+
+def get_capabilities(hkc_alarm: HKCAlarm) -> HKCCapabilities:
+    """Return the capabilities of an HKCAlarm, probing its class only once."""
+    return _probe_capabilities(type(hkc_alarm))
+
+
 def build_hkc_alarm(
     panel_id: str,
     panel_password: str,
     user_code: str,
     additional_user_codes: list[str] | None = None,
+    base_url: str | None = None,
 ) -> HKCAlarm:
     """Create an HKCAlarm instance across pyhkc versions."""
+    # pyhkc pulls in requests, tabulate and tenacity, so it is only loaded
+    # here, in the executor, when a panel is first logged in
+    from pyhkc.hkc_api import HKCAlarm
+
     additional_user_codes = additional_user_codes or []
+    hkc_alarm = None
+    base_url_kwargs = {}
+    if base_url is not None:
+        if not _supports_keyword(HKCAlarm, "base_url"):
+            raise TypeError("installed_pyhkc_does_not_support_base_url")
+        base_url_kwargs["base_url"] = base_url
 
     if _supports_keyword(HKCAlarm, "user_codes"):
         try:
-            return HKCAlarm(
+            hkc_alarm = HKCAlarm(
                 panel_id,
                 panel_password,
                 user_code,
                 user_codes=additional_user_codes,
+                **base_url_kwargs,
             )
         except Exception:
             if additional_user_codes:
@@ -49,16 +122,24 @@ def build_hkc_alarm(
             else:
                 raise
 
-    return HKCAlarm(panel_id, panel_password, user_code)
+    if hkc_alarm is None:
+        hkc_alarm = HKCAlarm(panel_id, panel_password, user_code, **base_url_kwargs)
+
+    # Probe capabilities here, off the event loop, so later lookups are free
+    get_capabilities(hkc_alarm)
+    return hkc_alarm
 
 
 def build_alarm_command(
     alarm_command: Callable[..., Any],
     user_code: str,
     primary_user_code: str,
+    supports_user_code: bool | None = None,
 ) -> Callable[[], Any]:
     """Build a callable that executes an alarm command compatibly."""
-    if _supports_keyword(alarm_command, "user_code"):
+    if supports_user_code is None:
+        supports_user_code = _supports_keyword(alarm_command, "user_code")
+    if supports_user_code:
         return partial(alarm_command, user_code=user_code)
 
     if user_code != primary_user_code:
@@ -69,14 +150,14 @@ def build_alarm_command(
 
 def get_status_for_user(hkc_alarm: HKCAlarm, user_code: str) -> dict:
     """Fetch status for a specific user when supported."""
-    if _supports_keyword(hkc_alarm.get_system_status, "user_code"):
+    if get_capabilities(hkc_alarm).multi_user_status:
         return hkc_alarm.get_system_status(user_code=user_code)
     return hkc_alarm.get_system_status()
 
 
 def get_inputs_for_user(hkc_alarm: HKCAlarm, user_code: str) -> list[dict]:
     """Fetch inputs for a specific user when supported."""
-    if _supports_keyword(hkc_alarm.get_all_inputs, "user_code"):
+    if get_capabilities(hkc_alarm).multi_user_inputs:
         return hkc_alarm.get_all_inputs(user_code=user_code)
     return hkc_alarm.get_all_inputs()
 
@@ -87,12 +168,20 @@ def get_user_access_summary(
     statuses_by_user: dict[str, dict] | None = None,
 ) -> dict[int, dict]:
     """Return per-user access summary across pyhkc versions."""
-    if hasattr(hkc_alarm, "get_user_access_summary"):
+    if get_capabilities(hkc_alarm).user_access_summary:
         return hkc_alarm.get_user_access_summary(user_codes=[int(code) for code in user_codes])
 
     statuses_by_user = statuses_by_user or {
         code: get_status_for_user(hkc_alarm, code) for code in user_codes
     }
+    return build_user_access_summary(user_codes, statuses_by_user)
+
+
+def build_user_access_summary(
+    user_codes: list[str],
+    statuses_by_user: dict[str, dict],
+) -> dict[int, dict]:
+    """Build the per-user access summary from already fetched statuses."""
     summaries: dict[int, dict] = {}
     for code in user_codes:
         status = statuses_by_user[code]
@@ -110,7 +199,8 @@ def get_user_access_summary(
                 ),
                 "armState": block.get("armState"),
             }
-            if block.get("userAllowed", True):
+            # Same as pyhkc: a block without userAllowed is not the user's
+            if block.get("userAllowed"):
                 allowed_blocks.append(summary)
             else:
                 denied_blocks.append(summary)
@@ -129,7 +219,7 @@ def get_home_assistant_entity_map(
     user_codes: list[str],
 ) -> dict | None:
     """Return the upstream Home Assistant entity map when supported."""
-    if hasattr(hkc_alarm, "get_home_assistant_entity_map"):
+    if get_capabilities(hkc_alarm).entity_map:
         try:
             return hkc_alarm.get_home_assistant_entity_map(
                 user_codes=[int(code) for code in user_codes]
@@ -141,7 +231,7 @@ def get_home_assistant_entity_map(
 
 def get_device_details(hkc_alarm: HKCAlarm) -> dict:
     """Return device details when supported."""
-    if hasattr(hkc_alarm, "get_device_details"):
+    if get_capabilities(hkc_alarm).device_details:
         try:
             return hkc_alarm.get_device_details() or {}
         except Exception:
@@ -151,7 +241,7 @@ def get_device_details(hkc_alarm: HKCAlarm) -> dict:
 
 def get_outputs(hkc_alarm: HKCAlarm) -> list[dict]:
     """Return outputs when supported."""
-    if hasattr(hkc_alarm, "get_outputs"):
+    if get_capabilities(hkc_alarm).outputs:
         try:
             return hkc_alarm.get_outputs() or []
         except Exception:
@@ -161,9 +251,10 @@ def get_outputs(hkc_alarm: HKCAlarm) -> list[dict]:
 
 def get_temporary_user(hkc_alarm: HKCAlarm, user_code: str | None = None) -> dict:
     """Return temporary user details when supported."""
-    if hasattr(hkc_alarm, "get_temporary_user"):
+    capabilities = get_capabilities(hkc_alarm)
+    if capabilities.temporary_user:
         try:
-            if user_code is not None and _supports_keyword(hkc_alarm.get_temporary_user, "user_code"):
+            if user_code is not None and capabilities.multi_user_temporary_user:
                 return hkc_alarm.get_temporary_user(user_code=user_code) or {}
             return hkc_alarm.get_temporary_user() or {}
         except Exception:
@@ -179,29 +270,24 @@ def build_block_alarm_command(
     block_number: int | None,
 ) -> Callable[[], Any]:
     """Build a callable that targets a specific HKC block when supported."""
-    command_map = {
-        "disarm": 0,
-        "arm_partset_a": 1,
-        "arm_partset_b": 2,
-        "arm_fullset": 3,
-    }
-
+    capabilities = get_capabilities(hkc_alarm)
     if block_number is None:
         return build_alarm_command(
             getattr(hkc_alarm, command_name),
             user_code,
             primary_user_code,
+            capabilities.multi_user_commands,
         )
 
-    alarm_command = getattr(hkc_alarm, "_arm_or_disarm", None)
-    if alarm_command is None:
+    if not capabilities.block_commands:
         raise TypeError("installed_pyhkc_does_not_support_block_commands")
 
+    alarm_command = hkc_alarm._arm_or_disarm
     zero_based_block = max(block_number - 1, 0)
-    if _supports_keyword(alarm_command, "user_code"):
+    if capabilities.multi_user_block_commands:
         return partial(
             alarm_command,
-            command=command_map[command_name],
+            command=ALARM_COMMANDS[command_name],
             block=zero_based_block,
             user_code=user_code,
         )
@@ -209,4 +295,4 @@ def build_block_alarm_command(
     if user_code != primary_user_code or zero_based_block != 0:
         raise TypeError("installed_pyhkc_does_not_support_block_commands")
 
-    return partial(alarm_command, command=command_map[command_name], block=0)
+    return partial(alarm_command, command=ALARM_COMMANDS[command_name], block=0)
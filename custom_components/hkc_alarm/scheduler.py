@@ -0,0 +1,433 @@
+"""Shared refresh scheduling for a single HKC panel."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections.abc import Callable, Iterable
+from datetime import datetime, timedelta, timezone
+from functools import partial
+from typing import TYPE_CHECKING
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+
+from .const import (
+    FAST_POLLING_WINDOW,
+    FAST_UPDATE_INTERVAL,
+    IDLE_BACKOFF_CYCLES,
+    MAX_CONCURRENT_REQUESTS,
+    MAX_IDLE_UPDATE_INTERVAL,
+    MIN_UPDATE_INTERVAL,
+    STALE_DATA_MAX_AGE,
+)
+from .circuit_breaker import HKCCircuitBreaker, HKCCircuitOpenError
+from .helpers import (
+    async_gather_limited,
+    find_inputs_source,
+    parse_panel_time,
+    split_inputs_by_visibility,
+)
+from .hkc_client import HKCAsyncClient
+from .inputs import HKCInput, HKCInputPool
+from .metrics import REFRESH_METRIC, HKCMetrics
+from .pyhkc_compat import (
+    get_inputs_for_user,
+    get_status_for_user,
+)
+
+if TYPE_CHECKING:
+    from pyhkc.hkc_api import HKCAlarm
+
+_logger = logging.getLogger(__name__)
+
+
+class HKCPanelScheduler:
+    """Own the HKC connection for one panel and feed every coordinator.
+
+    Statuses, the panel keypad and inputs are fetched in a single refresh
+    cycle and the results are pushed to all registered coordinators, so the
+    alarm and sensor views never poll the cloud separately.
+
+    Without an ``hkc_alarm``, the first refresh builds one with
+    ``build_alarm``, which logs in, and gives it an async client from
+    ``build_client``. A failed login is then retried, and backed off, like
+    any failed refresh.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        hkc_alarm: HKCAlarm | None,
+        configured_user_codes: list[str],
+        update_interval,
+        client: HKCAsyncClient | None = None,
+        adaptive_polling: bool = False,
+        metrics: HKCMetrics | None = None,
+        request_limiter: asyncio.Semaphore | None = None,
+        panel_id: int | str | None = None,
+        build_alarm: Callable[[], HKCAlarm] | None = None,
+        build_client: Callable[[HKCAlarm], HKCAsyncClient | None] | None = None,
+    ) -> None:
+        self.hass = hass
+        self.hkc_alarm = hkc_alarm
+        self.client = client
+        self.panel_id = hkc_alarm.panel_id if hkc_alarm is not None else panel_id
+        self._build_alarm = build_alarm
+        self._build_client = build_client
+        self.configured_user_codes = configured_user_codes
+        self.update_interval = timedelta(seconds=update_interval)
+        self.adaptive_polling = adaptive_polling
+        self.metrics = metrics or HKCMetrics()
+        # Shared with other panels to cap concurrent calls to the HKC cloud
+        self._request_limiter = request_limiter
+        self.breaker = HKCCircuitBreaker()
+        self.stale_since: datetime | None = None
+        self._fast_until: datetime | None = None
+        self._idle_cycles = 0
+        self._in_alarm = False
+        self.status_by_user: dict[str, dict] = {}
+        self.panel_data: dict | None = None
+        self.panel_time: datetime | None = None
+        self._panel_time_delta = timedelta()
+        self.inputs_by_user: dict[str, list[HKCInput]] = {}
+        self._input_pool = HKCInputPool()
+        # User code whose inputs cover every user, learned from a full fetch
+        self.inputs_source: str | None = None
+        self.last_update: datetime | None = None
+        self._coordinators: list[DataUpdateCoordinator] = []
+        self._initial_statuses: dict[str, dict] | None = None
+        self._lock = asyncio.Lock()
+        self._unsub_refresh: CALLBACK_TYPE | None = None
+        self._running = False
+
+    @callback
+    def async_add_coordinator(self, coordinator: DataUpdateCoordinator) -> None:
+        """Register a coordinator to receive refresh results."""
+        self._coordinators.append(coordinator)
+
+    @callback
+    def async_set_initial_statuses(self, statuses_by_user: dict[str, dict]) -> None:
+        """Reuse statuses fetched during setup for the next refresh."""
+        self._initial_statuses = statuses_by_user
+
+    @property
+    def fast_polling(self) -> bool:
+        """Return True while adaptive polling should run at the fast interval."""
+        if not self.adaptive_polling:
+            return False
+        return self._in_alarm or (
+            self._fast_until is not None
+            and datetime.now(timezone.utc) < self._fast_until
+        )
+
+    @property
+    def current_interval(self) -> timedelta:
+        """Return the delay until the next scheduled refresh."""
+        if not self.adaptive_polling:
+            return self.update_interval
+        if self.fast_polling:
+            return timedelta(seconds=FAST_UPDATE_INTERVAL)
+        backoff = 2 ** (self._idle_cycles // IDLE_BACKOFF_CYCLES)
+        return min(
+            self.update_interval * backoff,
+            max(self.update_interval, timedelta(seconds=MAX_IDLE_UPDATE_INTERVAL)),
+        )
+
+    @callback
+    def async_start(self, poll_offset: float = 0) -> Callable[[], None]:
+        """Start polling, pushing the first poll back by ``poll_offset`` seconds."""
+        self._running = True
+        self._async_schedule_refresh(timedelta(seconds=poll_offset))
+        return self.async_stop
+
+    @callback
+    def async_stop(self) -> None:
+        """Stop polling."""
+        self._running = False
+        if self._unsub_refresh is not None:
+            self._unsub_refresh()
+            self._unsub_refresh = None
+
+    @property
+    def has_usable_data(self) -> bool:
+        """Return True while the last good data may still be served."""
+        return self.last_update is not None and (
+            datetime.now(timezone.utc) - self.last_update
+            < timedelta(seconds=STALE_DATA_MAX_AGE)
+        )
+
+    @callback
+    def _async_schedule_refresh(self, offset: timedelta = timedelta()) -> None:
+        if self._unsub_refresh is not None:
+            self._unsub_refresh()
+        # While the breaker is open, sleep until the probe is due
+        delay = offset + max(
+            self.current_interval, timedelta(seconds=self.breaker.retry_in)
+        )
+        self._unsub_refresh = async_call_later(
+            self.hass,
+            delay,
+            self._async_handle_interval,
+        )
+
+    @callback
+    def async_note_command(self) -> None:
+        """Poll quickly for a while after an arm or disarm command."""
+        if not self.adaptive_polling:
+            return
+        self._fast_until = datetime.now(timezone.utc) + timedelta(
+            seconds=FAST_POLLING_WINDOW
+        )
+        self._idle_cycles = 0
+        if self._running:
+            self._async_schedule_refresh()
+
+    async def _async_handle_interval(self, _now: datetime) -> None:
+        self._unsub_refresh = None
+        await self.async_update_coordinators()
+        if self._running:
+            self._async_schedule_refresh()
+
+    async def async_update_coordinators(self, force: bool = False) -> None:
+        """Refresh and report success or failure to every coordinator."""
+        try:
+            await self.async_refresh(force=force)
+        except Exception as e:
+            if self.has_usable_data:
+                # Keep serving the last good data, flagged as stale
+                for coordinator in self._coordinators:
+                    coordinator.async_update_listeners()
+                return
+            for coordinator in self._coordinators:
+                coordinator.async_set_update_error(UpdateFailed(f"Failed to update: {e}"))
+
+    async def async_refresh(
+        self,
+        force: bool = False,
+        requester: DataUpdateCoordinator | None = None,
+    ) -> None:
+        """Run a refresh cycle unless one completed recently.
+
+        Callers that arrive while a cycle is in flight wait for it and reuse
+        its result. Every coordinator except ``requester`` is pushed the new
+        data; the requester picks it up from its own update method.
+        """
+        async with self._lock:
+            now = datetime.now(timezone.utc)
+            min_interval = (
+                FAST_UPDATE_INTERVAL if self.fast_polling else MIN_UPDATE_INTERVAL
+            )
+            if not force and self.last_update is not None and now < (
+                self.last_update + timedelta(seconds=min_interval)
+            ):
+                return
+
+            if not self.breaker.allow_request():
+                raise HKCCircuitOpenError(
+                    f"HKC cloud backing off for {self.breaker.retry_in:.0f}s"
+                )
+            try:
+                with self.metrics.timed(REFRESH_METRIC):
+                    await self._async_fetch()
+            except Exception as err:
+                self._async_record_failure(err)
+                raise
+            except BaseException:
+                # A cancelled probe never got an answer; without this the
+                # breaker would stay half open and refuse every refresh
+                self.breaker.abandon_probe()
+                raise
+            if self.breaker.record_success():
+                _logger.info("HKC cloud reachable again for panel %s", self.panel_id)
+            self.stale_since = None
+            self.last_update = now
+
+        for coordinator in self._coordinators:
+            coordinator.async_handle_scheduler_refresh()
+        for coordinator in self._coordinators:
+            if coordinator is not requester:
+                coordinator.async_set_updated_data(coordinator.build_data())
+
+    async def async_refresh_statuses(
+        self, user_codes: Iterable[str], requester: DataUpdateCoordinator
+    ) -> None:
+        """Fetch only the given users' statuses and push them to ``requester``.
+
+        Command confirmation polls this way so it does not refetch the
+        keypad and every input; those stay on the regular schedule. Before
+        the first full refresh there is nothing to update, so that runs
+        instead.
+        """
+        if self.last_update is None:
+            await self.async_update_coordinators(force=True)
+            return
+
+        codes = [
+            code for code in self.configured_user_codes if code in user_codes
+        ] or self.configured_user_codes[:1]
+        async with self._lock:
+            if not self.breaker.allow_request():
+                raise HKCCircuitOpenError(
+                    f"HKC cloud backing off for {self.breaker.retry_in:.0f}s"
+                )
+            try:
+                results = await async_gather_limited(
+                    [
+                        self.metrics.timed_job("status", self._status_job(code))
+                        for code in codes
+                    ],
+                    MAX_CONCURRENT_REQUESTS,
+                    self._request_limiter,
+                )
+            except Exception as err:
+                self._async_record_failure(err)
+                raise
+            except BaseException:
+                self.breaker.abandon_probe()
+                raise
+            if self.breaker.record_success():
+                _logger.info("HKC cloud reachable again for panel %s", self.panel_id)
+
+            statuses_by_user = {**self.status_by_user, **dict(zip(codes, results))}
+            if statuses_by_user != self.status_by_user:
+                self._idle_cycles = 0
+            self._in_alarm = _any_block_in_alarm(statuses_by_user)
+            self.status_by_user = statuses_by_user
+
+        requester.async_handle_scheduler_refresh()
+        requester.async_set_updated_data(requester.build_data())
+
+    @callback
+    def _async_record_failure(self, err: Exception) -> None:
+        if self.stale_since is None and self.last_update is not None:
+            self.stale_since = datetime.now(timezone.utc)
+        if self.breaker.record_failure():
+            _logger.warning(
+                "HKC cloud unreachable for panel %s, backing off for %.0f seconds: %s",
+                self.panel_id,
+                self.breaker.retry_in,
+                err,
+            )
+        else:
+            _logger.debug(
+                "HKC refresh failed for panel %s", self.panel_id, exc_info=True
+            )
+
+    async def _async_fetch(self) -> None:
+        if self.hkc_alarm is None:
+            with self.metrics.timed("login"):
+                self.hkc_alarm = await self.hass.async_add_executor_job(self._build_alarm)
+            if self._build_client is not None:
+                self.client = self._build_client(self.hkc_alarm)
+
+        codes = self.configured_user_codes
+        statuses_by_user = self._initial_statuses
+        self._initial_statuses = None
+
+        # Once one user's inputs are known to cover everyone, fetch those
+        # alone and build the other users' lists from visibleUserCodes
+        input_codes = [self.inputs_source] if self.inputs_source else codes
+
+        timed_job = self.metrics.timed_job
+        jobs = []
+        if statuses_by_user is None:
+            jobs.extend(timed_job("status", self._status_job(code)) for code in codes)
+        jobs.append(timed_job("panel", self._panel_job()))
+        jobs.extend(timed_job("inputs", self._inputs_job(code)) for code in input_codes)
+        results = await async_gather_limited(
+            jobs, MAX_CONCURRENT_REQUESTS, self._request_limiter
+        )
+
+        if statuses_by_user is None:
+            statuses_by_user = dict(zip(codes, results[: len(codes)]))
+            results = results[len(codes) :]
+        fetched_inputs = dict(zip(input_codes, results[1:]))
+        raw_inputs_by_user = await self._async_inputs_by_user(fetched_inputs)
+        # Users sharing a zone share one compact record for it
+        inputs_by_user = self._input_pool.intern(raw_inputs_by_user)
+
+        # The keypad display carries a clock, so only statuses and inputs
+        # count as activity for adaptive polling
+        if (
+            statuses_by_user == self.status_by_user
+            and inputs_by_user == self.inputs_by_user
+        ):
+            self._idle_cycles += 1
+        else:
+            self._idle_cycles = 0
+        self._in_alarm = _any_block_in_alarm(statuses_by_user)
+
+        self.status_by_user = statuses_by_user
+        self.panel_data = results[0]
+        self.inputs_by_user = inputs_by_user
+
+        # Sensors compare their input timestamps against this reference
+        # time, so it is worked out once per refresh rather than per entity
+        panel_time_str = self.panel_data.get("display", "")
+        now = datetime.now(timezone.utc)
+        panel_time = parse_panel_time(panel_time_str, now.year)
+        if panel_time is not None:
+            self.panel_time = panel_time
+            self._panel_time_delta = panel_time - now
+        else:
+            _logger.debug("Failed to parse panel time: %s", panel_time_str)
+            self.panel_time = now + self._panel_time_delta
+
+    async def _async_inputs_by_user(
+        self, fetched_inputs: dict[str, list[dict]]
+    ) -> dict[str, list[dict]]:
+        codes = self.configured_user_codes
+        if self.inputs_source is None:
+            if len(codes) > 1:
+                self.inputs_source = find_inputs_source(fetched_inputs)
+            return fetched_inputs
+
+        inputs_by_user = split_inputs_by_visibility(
+            fetched_inputs[self.inputs_source] or [], codes
+        )
+        if inputs_by_user is not None:
+            return inputs_by_user
+
+        _logger.debug(
+            "Inputs for panel %s no longer carry visibleUserCodes; fetching per user",
+            self.panel_id,
+        )
+        self.inputs_source = None
+        results = await async_gather_limited(
+            [
+                self.metrics.timed_job("inputs", self._inputs_job(code))
+                for code in codes
+            ],
+            MAX_CONCURRENT_REQUESTS,
+            self._request_limiter,
+        )
+        return dict(zip(codes, results))
+
+    def _status_job(self, code: str):
+        if self.client is not None:
+            return partial(self.client.async_get_system_status, code)
+        return partial(
+            self.hass.async_add_executor_job, get_status_for_user, self.hkc_alarm, code
+        )
+
+    def _panel_job(self):
+        if self.client is not None:
+            return self.client.async_get_panel
+        return partial(self.hass.async_add_executor_job, self.hkc_alarm.get_panel)
+
+    def _inputs_job(self, code: str):
+        if self.client is not None:
+            return partial(self.client.async_get_all_inputs, code)
+        return partial(
+            self.hass.async_add_executor_job, get_inputs_for_user, self.hkc_alarm, code
+        )
+
+
+def _any_block_in_alarm(statuses_by_user: dict[str, dict]) -> bool:
+    return any(
+        block.get("inAlarm")
+        for status in statuses_by_user.values()
+        for block in status.get("blocks", [])
+    )
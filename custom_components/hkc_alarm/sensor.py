@@ -1,48 +1,55 @@
-from datetime import datetime, timedelta
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
 import logging
-import pytz
-from homeassistant.components.sensor import SensorEntity
+from homeassistant.components.sensor import SensorEntity, SensorStateClass
+from homeassistant.const import EntityCategory, UnitOfTime
 from homeassistant.core import callback
+from homeassistant.helpers.device_registry import DeviceInfo
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
-from .const import DOMAIN
+from .const import DOMAIN, INPUT_OPEN_WINDOW
+from .entity import HKCViewEntity
+from .helpers import input_identifier, parse_input_timestamp, parse_panel_time
+from .inputs import HKCInput
+from .metrics import CALL_METRICS, ENTITY_UPDATE_METRICS, REFRESH_METRIC
 
 _logger = logging.getLogger(__name__)
 
 
-def _input_identifier(input_data):
-    """Return a stable input identifier from HKC payloads."""
-    return input_data.get("inputId", input_data.get("input"))
-
-
 def _dedupe_inputs(inputs):
     """Return inputs de-duplicated by HKC input identifier."""
     deduped = {}
     for input_data in inputs:
-        input_id = _input_identifier(input_data)
+        input_id = input_identifier(input_data)
         if input_id is None:
             continue
         deduped.setdefault(str(input_id), input_data)
     return list(deduped.values())
 
 
-class HKCSensor(CoordinatorEntity, SensorEntity):
+class HKCSensor(HKCViewEntity, CoordinatorEntity, SensorEntity):
 
     def __init__(
         self,
-        hkc_alarm,
+        panel_id,
         input_data,
         alarm_coordinator,
         sensor_coordinator,
         view,
     ):
+        # The context lets the coordinator wake only sensors whose zone changed
         super().__init__(
-            sensor_coordinator
-        )  # Ensure the coordinator is properly initialized
-        self._hkc_alarm = hkc_alarm
-        self._input_data = input_data
+            sensor_coordinator,
+            context=(view["user_code"], str(input_identifier(input_data))),
+        )
+        self._panel_id = panel_id
+        # Keep a compact record rather than the setup-time payload
+        self._input_data = HKCInput.from_payload(input_data)
         self._alarm_coordinator = alarm_coordinator
         self._sensor_coordinator = sensor_coordinator
         self._view = view
+        self._written_state = None
+        self._attributes_cache = None
 
         self._attr_has_entity_name = True
         self._attr_name = input_data["description"]
@@ -50,34 +57,17 @@ class HKCSensor(CoordinatorEntity, SensorEntity):
     @property
     def unique_id(self):
         """Return the unique ID of the sensor."""
-        input_id = _input_identifier(self._input_data)
+        input_id = input_identifier(self._input_data)
         if not self._view["multi_view"]:
-            return str(self._hkc_alarm.panel_id) + str(input_id)
-        return f"{self._hkc_alarm.panel_id}_{self._view['key']}_{input_id}"
-
-    @property
-    def device_info(self):
-        entry_data = {}
-        if getattr(self, "hass", None) is not None and self.coordinator.config_entry is not None:
-            entry_data = self.hass.data[DOMAIN][self.coordinator.config_entry.entry_id]
-        metadata = entry_data.get("device_metadata", {})
-        identifier = (
-            (DOMAIN, self._hkc_alarm.panel_id)
-            if not self._view["multi_view"]
-            else (DOMAIN, f"{self._hkc_alarm.panel_id}_{self._view['key']}")
-        )
-        return {
-            "identifiers": {identifier},
-            "name": self._view["label"],
-            "manufacturer": "HKC",
-            "model": metadata.get("model", "HKC Alarm"),
-            "sw_version": metadata.get("sw_version", "1.0.0"),
-            "serial_number": metadata.get("serial_number"),
-        }
+            return str(self._panel_id) + str(input_id)
+        return f"{self._panel_id}_{self._view['key']}_{input_id}"
 
     @property
     def extra_state_attributes(self):
         """Return additional HKC input metadata."""
+        # Unchanged inputs keep their pooled record, so only rebuild on change
+        if self._attributes_cache is not None and self._attributes_cache[0] is self._input_data:
+            return self._attributes_cache[1]
         attributes = {}
         for source_key, target_key in (
             ("inputType", "Input Type"),
@@ -88,7 +78,8 @@ class HKCSensor(CoordinatorEntity, SensorEntity):
         ):
             if source_key in self._input_data:
                 attributes[target_key] = self._input_data[source_key]
-        return attributes or None
+        self._attributes_cache = (self._input_data, attributes or None)
+        return self._attributes_cache[1]
 
     def _get_sensor_state(self) -> str:
         """Determine the state of the sensor."""
@@ -96,98 +87,266 @@ class HKCSensor(CoordinatorEntity, SensorEntity):
         # Check for the default timestamp
         if self._input_data["timestamp"] == "0001-01-01T00:00:00":
             _logger.debug(
-                f"Sensor {self.name} state determined as 'Unused' due to default timestamp."
+                "Sensor %s state determined as 'Unused' due to default timestamp.",
+                self.name,
             )
             return "Unused"
 
-        # Parse sensor timestamp
-        try:
-            sensor_timestamp = datetime.strptime(
-                self._input_data["timestamp"], "%Y-%m-%dT%H:%M:%SZ"
-            ).replace(
-                tzinfo=pytz.UTC
-            )  # Ensure sensor_timestamp is treated as UTC
-        except ValueError:
-            try:
-                sensor_timestamp = datetime.strptime(
-                    self._input_data["timestamp"], "%Y-%m-%dT%H:%M:%S"
-                ).replace(
-                    tzinfo=pytz.UTC
-                )  # Ensure sensor_timestamp is treated as UTC
-            except ValueError:
-                _logger.debug(
-                    f"Failed to parse timestamp: {self._input_data['timestamp']} for sensor {self.name}. Setting state to 'Unknown'."
-                )
-                return "Unknown"  # Return an unknown state if timestamp parsing fails
+        # Parse sensor timestamp, which is always UTC
+        sensor_timestamp = parse_input_timestamp(self._input_data["timestamp"])
+        if sensor_timestamp is None:
+            _logger.debug(
+                "Failed to parse timestamp: %s for sensor %s. Setting state to 'Unknown'.",
+                self._input_data["timestamp"],
+                self.name,
+            )
+            return "Unknown"  # Return an unknown state if timestamp parsing fails
 
         time_difference = sensor_timestamp - self._alarm_coordinator.panel_time
 
         # Handle cases where the timestamp is very old or invalid
         if time_difference > timedelta(days=365):
             _logger.debug(
-                f"Sensor {self.name} has an old timestamp: {self._input_data['timestamp']}. Setting state to 'Closed'."
+                "Sensor %s has an old timestamp: %s. Setting state to 'Closed'.",
+                self.name,
+                self._input_data["timestamp"],
             )
             return "Closed"  # Or return "Unknown" if you prefer
 
         # Check if the time difference is within 60 seconds (maximum panel time resolution) to determine 'Open' state
-        if abs(time_difference) < timedelta(seconds=60):
+        if abs(time_difference) < timedelta(seconds=INPUT_OPEN_WINDOW):
             _logger.debug(
-                f"Sensor {self.name} state determined as 'Open' due to timestamp within 60 seconds of panel time."
+                "Sensor %s state determined as 'Open' due to timestamp within 60 seconds of panel time.",
+                self.name,
             )
             return "Open"
         elif self._input_data["inputState"] == 1:
             _logger.debug(
-                f"Sensor {self.name} state determined as 'Open' due to inputState being 1."
+                "Sensor %s state determined as 'Open' due to inputState being 1.", self.name
             )
             return "Open"
         elif self._input_data["inputState"] == 2:
             _logger.debug(
-                f"Sensor {self.name} state determined as 'Tamper' due to inputState being 2."
+                "Sensor %s state determined as 'Tamper' due to inputState being 2.", self.name
             )
             return "Tamper"
         elif self._input_data["inputState"] == 5:
             _logger.debug(
-                f"Sensor {self.name} state determined as 'Inhibited' due to inputState being 5."
+                "Sensor %s state determined as 'Inhibited' due to inputState being 5.", self.name
             )
             return "Inhibited"
         else:
-            _logger.debug(f"Sensor {self.name} state determined as 'Closed'.")
+            _logger.debug("Sensor %s state determined as 'Closed'.", self.name)
             return "Closed"
 
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        # Only changed zones are pushed, so pick up the current state now
+        if self._sensor_coordinator.input_index:
+            self._handle_coordinator_update()
+
     @callback
     def _handle_coordinator_update(self) -> None:
         """Handle updated data from the coordinator."""
-        # Search for the matching sensor data based on inputId
-        sensor_data_list = self._sensor_coordinator.inputs_by_user.get(
-            self._view["user_code"],
-            self._sensor_coordinator.sensor_data,
+        with self._sensor_coordinator.metrics.timed("sensor_entity_update"):
+            matching_sensor_data = self._sensor_coordinator.get_input(
+                self._view["user_code"],
+                input_identifier(self._input_data),
+            )
+
+            if matching_sensor_data is not None:
+                # Update self._input_data with the matching sensor data
+                self._input_data = matching_sensor_data
+                self._attr_native_value = self._get_sensor_state()
+            else:
+                _logger.warning(
+                    "No matching sensor data found for input %s",
+                    input_identifier(self._input_data),
+                )
+
+            # Only write when something visible changed to spare the state
+            # machine and recorder a row per zone per poll
+            written_state = (self.available, self._attr_native_value, self._input_data)
+            if written_state == self._written_state:
+                return
+            self._written_state = written_state
+            self.async_write_ha_state()
+
+
+def _ms(seconds):
+    return None if seconds is None else round(seconds * 1000, 1)
+
+
+def _cloud_latency(coordinator):
+    stats = coordinator.metrics.combined(CALL_METRICS)
+    return _ms(stats.mean), {
+        "Calls": stats.count,
+        "Errors": stats.errors,
+        "P50 (ms)": _ms(stats.percentile(0.5)),
+        "P95 (ms)": _ms(stats.percentile(0.95)),
+        "Max (ms)": _ms(stats.max),
+    }
+
+
+def _cloud_calls(coordinator):
+    metrics = coordinator.metrics
+    stats = metrics.combined(CALL_METRICS)
+    return stats.count, {
+        "Errors": stats.errors,
+        **{
+            name: metrics.stats[name].count
+            for name in CALL_METRICS
+            if name in metrics.stats
+        },
+    }
+
+
+def _refresh_duration(coordinator):
+    stats = coordinator.metrics.stats.get(REFRESH_METRIC)
+    if stats is None:
+        return None, {}
+    return _ms(stats.last), {
+        "Refreshes": stats.count,
+        "Errors": stats.errors,
+        "Mean (ms)": _ms(stats.mean),
+        "P95 (ms)": _ms(stats.percentile(0.95)),
+        "Max (ms)": _ms(stats.max),
+    }
+
+
+def _entity_update_time(coordinator):
+    metrics = coordinator.metrics
+    refreshes = metrics.stats.get(REFRESH_METRIC)
+    if refreshes is None or not refreshes.count:
+        return None, {}
+    stats = metrics.combined(ENTITY_UPDATE_METRICS)
+    # event loop time spent in _handle_coordinator_update, per refresh cycle
+    return _ms(stats.total / refreshes.count), {
+        "Entity updates": stats.count,
+        "Max (ms)": _ms(stats.max),
+    }
+
+
+def _cloud_connection(coordinator):
+    breaker = coordinator.breaker
+    stale_since = coordinator.stale_since
+    return breaker.state, {
+        "Consecutive Failures": breaker.failures,
+        "Retry In": round(breaker.retry_in),
+        "Stale Since": stale_since.isoformat() if stale_since else None,
+    }
+
+
+# Keypad fields that change with the panel clock, as (payload key, attribute)
+PANEL_DISPLAY_ATTRIBUTES = (
+    ("display", "Display"),
+    ("greenLed", "Green LED"),
+    ("redLed", "Red LED"),
+    ("amberLed", "Amber LED"),
+    ("cursorOn", "Cursor On"),
+    ("cursorIndex", "Cursor Index"),
+    ("blink", "Blink"),
+)
+
+
+def _panel_display(coordinator):
+    panel_data = coordinator.panel_data or {}
+    # The text itself carries the clock, so the state only says what is shown
+    if (display := panel_data.get("display")) is None:
+        state = None
+    elif parse_panel_time(display, datetime.now(timezone.utc).year) is not None:
+        state = "clock"
+    else:
+        state = "message"
+    return state, {
+        attribute: panel_data.get(key) for key, attribute in PANEL_DISPLAY_ATTRIBUTES
+    }
+
+
+@dataclass(frozen=True)
+class DiagnosticSensorSpec:
+    name: str
+    value_fn: Callable
+    unit: str | None = None
+    state_class: SensorStateClass | None = None
+    enabled_default: bool = False
+
+
+DIAGNOSTIC_SENSORS = {
+    "cloud_connection": DiagnosticSensorSpec(
+        "Cloud connection", _cloud_connection, enabled_default=True
+    ),
+    "cloud_latency": DiagnosticSensorSpec(
+        "Cloud latency",
+        _cloud_latency,
+        UnitOfTime.MILLISECONDS,
+        SensorStateClass.MEASUREMENT,
+    ),
+    "cloud_calls": DiagnosticSensorSpec(
+        "Cloud calls", _cloud_calls, state_class=SensorStateClass.TOTAL_INCREASING
+    ),
+    "refresh_duration": DiagnosticSensorSpec(
+        "Refresh duration",
+        _refresh_duration,
+        UnitOfTime.MILLISECONDS,
+        SensorStateClass.MEASUREMENT,
+    ),
+    "entity_update_time": DiagnosticSensorSpec(
+        "Entity update time",
+        _entity_update_time,
+        UnitOfTime.MILLISECONDS,
+        SensorStateClass.MEASUREMENT,
+    ),
+    "panel_display": DiagnosticSensorSpec("Panel display", _panel_display),
+}
+
+
+class HKCDiagnosticSensor(CoordinatorEntity, SensorEntity):
+    """Expose call counts, latencies and the keypad display for a panel."""
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_has_entity_name = True
+    # The keypad LEDs and cursor would add a recorder row every poll
+    _unrecorded_attributes = frozenset(
+        attribute for _, attribute in PANEL_DISPLAY_ATTRIBUTES
+    )
+
+    def __init__(self, panel_id, alarm_coordinator, kind, device_name):
+        super().__init__(alarm_coordinator)
+        self._alarm_coordinator = alarm_coordinator
+        spec = DIAGNOSTIC_SENSORS[kind]
+        self._value_fn = spec.value_fn
+        self._attr_name = spec.name
+        self._attr_unique_id = f"{panel_id}_diagnostic_{kind}"
+        self._attr_native_unit_of_measurement = spec.unit
+        self._attr_state_class = spec.state_class
+        self._attr_entity_registry_enabled_default = spec.enabled_default
+        self._attr_device_info = DeviceInfo(
+            identifiers={(DOMAIN, panel_id)},
+            name=device_name,
+            manufacturer="HKC",
         )
-        matching_sensor_data = next(
-            (
-                sensor_data
-                for sensor_data in sensor_data_list
-                if _input_identifier(sensor_data) == _input_identifier(self._input_data)
-            ),
-            None,  # Default to None if no matching sensor data is found
+        self._attr_native_value, self._attr_extra_state_attributes = self._value_fn(
+            alarm_coordinator
         )
 
-        if matching_sensor_data is not None:
-            # Update self._input_data with the matching sensor data
-            self._input_data = matching_sensor_data
-            self._attr_native_value = self._get_sensor_state()
-        else:
-            _logger.warning(
-                "No matching sensor data found for input %s",
-                _input_identifier(self._input_data),
-            )
+    @property
+    def available(self) -> bool:
+        # Metrics stay meaningful while the cloud is failing
+        return True
 
-        self.async_write_ha_state()  # Update the state with the latest data
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        value, attributes = self._value_fn(self._alarm_coordinator)
+        self._attr_native_value = value
+        self._attr_extra_state_attributes = attributes
+        self.async_write_ha_state()
 
 
 async def async_setup_entry(hass, entry, async_add_entities):
     entry_data = hass.data[DOMAIN][entry.entry_id]
-    hkc_alarm = entry_data["hkc_alarm"]
     alarm_coordinator = entry_data["alarm_coordinator"]
+    panel_id = alarm_coordinator.panel_id
     sensor_coordinator = entry_data["sensor_coordinator"]
     entity_map = entry_data.get("entity_map") or {}
 
@@ -217,7 +376,7 @@ async def async_setup_entry(hass, entry, async_add_entities):
         entities.extend(
             [
                 HKCSensor(
-                    hkc_alarm,
+                    panel_id,
                     input_data,
                     alarm_coordinator,
                     sensor_coordinator,
@@ -229,10 +388,13 @@ async def async_setup_entry(hass, entry, async_add_entities):
         )
     else:
         for view in entry_data["views"]:
-            all_inputs = sensor_coordinator.inputs_by_user.get(
-                view["user_code"],
-                sensor_coordinator.data,
-            )
+            all_inputs = sensor_coordinator.inputs_by_user.get(view["user_code"])
+            if all_inputs is None:
+                # Warm start from the metadata cache before the first poll
+                all_inputs = entry_data.get("input_topology", {}).get(
+                    view["user_code"],
+                    sensor_coordinator.data,
+                )
             filtered_inputs = [
                 input_data
                 for input_data in all_inputs
@@ -241,7 +403,7 @@ async def async_setup_entry(hass, entry, async_add_entities):
             entities.extend(
                 [
                     HKCSensor(
-                        hkc_alarm,
+                        panel_id,
                         input_data,
                         alarm_coordinator,
                         sensor_coordinator,
@@ -251,7 +413,14 @@ async def async_setup_entry(hass, entry, async_add_entities):
                 ]
             )
 
-    async_add_entities(
-        entities,
-        True,
+    device_name = (
+        views[0]["label"]
+        if single_device
+        else entry_data.get("device_metadata", {}).get("panel_name", "HKC Alarm System")
+    )
+    entities.extend(
+        HKCDiagnosticSensor(panel_id, alarm_coordinator, kind, device_name)
+        for kind in DIAGNOSTIC_SENSORS
     )
+
+    async_add_entities(entities, update_before_add=False)
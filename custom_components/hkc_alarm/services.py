@@ -0,0 +1,292 @@
+"""Services for the HKC Alarm integration."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable, Callable
+from functools import partial
+
+import voluptuous as vol
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+)
+from homeassistant.exceptions import HomeAssistantError, ServiceValidationError
+from homeassistant.helpers import config_validation as cv
+
+from .const import DATA_MANAGER, DOMAIN, MAX_CONCURRENT_REQUESTS
+from .helpers import async_gather_limited
+from .manager import async_get_manager
+from .pyhkc_compat import build_block_alarm_command
+
+_LOGGER = logging.getLogger(__name__)
+
+SERVICE_SET_BLOCKS = "set_blocks"
+ATTR_CONFIG_ENTRY_ID = "config_entry_id"
+ATTR_BLOCKS = "blocks"
+ATTR_BLOCK = "block"
+ATTR_STATE = "state"
+ATTR_CODE = "code"
+
+# Target state -> (command name, armState the panel reports once it is set)
+BLOCK_STATE_COMMANDS = {
+    "disarmed": ("disarm", 0),
+    "armed_home": ("arm_partset_a", 1),
+    "armed_night": ("arm_partset_b", 2),
+    "armed_away": ("arm_fullset", 3),
+}
+
+SET_BLOCKS_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_CONFIG_ENTRY_ID): cv.string,
+        vol.Required(ATTR_BLOCKS): vol.All(
+            cv.ensure_list,
+            vol.Length(min=1),
+            [
+                vol.Schema(
+                    {
+                        vol.Required(ATTR_BLOCK): vol.All(
+                            vol.Coerce(int), vol.Range(min=1)
+                        ),
+                        vol.Required(ATTR_STATE): vol.In(BLOCK_STATE_COMMANDS),
+                    }
+                )
+            ],
+        ),
+        vol.Optional(ATTR_CODE): cv.string,
+    }
+)
+
+
+def _resolve_entry_data(hass: HomeAssistant, entry_id: str | None) -> tuple[str, dict]:
+    loaded = {
+        key: value
+        for key, value in hass.data.get(DOMAIN, {}).items()
+        if key != DATA_MANAGER
+    }
+    if entry_id is None:
+        if len(loaded) != 1:
+            raise ServiceValidationError(
+                translation_domain=DOMAIN,
+                translation_key="config_entry_required",
+            )
+        return next(iter(loaded.items()))
+    if entry_id not in loaded:
+        raise ServiceValidationError(
+            translation_domain=DOMAIN,
+            translation_key="config_entry_not_loaded",
+            translation_placeholders={"config_entry_id": entry_id},
+        )
+    return entry_id, loaded[entry_id]
+
+
+def _block_user_code(entry_data: dict, block_number: int, code: str | None) -> str:
+    """Return the configured user to send a block's command as."""
+    configured_user_codes = entry_data["configured_user_codes"]
+    user_code = (code or "").strip()
+    if user_code:
+        if user_code not in configured_user_codes:
+            raise ServiceValidationError(
+                translation_domain=DOMAIN,
+                translation_key="invalid_user_code",
+            )
+        return user_code
+    if entry_data["require_user_pin"]:
+        raise ServiceValidationError(
+            translation_domain=DOMAIN,
+            translation_key="code_required",
+        )
+
+    # Prefer the first configured user that may operate the block
+    access_summary = entry_data["alarm_coordinator"].access_summary
+    for configured_code in configured_user_codes:
+        allowed_blocks = access_summary.get(int(configured_code), {}).get(
+            "allowedBlocks", []
+        )
+        if any(block["block"] == block_number for block in allowed_blocks):
+            return configured_code
+    return configured_user_codes[0]
+
+
+def _block_command(
+    hass: HomeAssistant,
+    entry_data: dict,
+    command_name: str,
+    user_code: str,
+    block_number: int,
+) -> Callable[[], Awaitable[dict]]:
+    coordinator = entry_data["alarm_coordinator"]
+    if (client := coordinator.hkc_client) is not None:
+        return partial(client.async_send_command, command_name, user_code, block_number)
+    try:
+        command = build_block_alarm_command(
+            coordinator.hkc_alarm,
+            command_name,
+            user_code,
+            entry_data["configured_user_codes"][0],
+            block_number,
+        )
+    except TypeError:
+        raise ServiceValidationError(
+            translation_domain=DOMAIN,
+            translation_key="block_commands_not_supported",
+        ) from None
+    return partial(hass.async_add_executor_job, command)
+
+
+def _block_result(block_number: int, state: str, res: dict, latency: float) -> dict:
+    result_code = res.get("resultCode")
+    if result_code == 5:
+        result = "acknowledged"
+    elif result_code == 4:
+        result = "already_in_state"
+    else:
+        result = "error"
+    block_result = {
+        "block": block_number,
+        "state": state,
+        "result": result,
+        "result_code": result_code,
+        "acknowledged": result_code in (4, 5),
+        "latency": round(latency, 3),
+    }
+    if error_list := res.get("errorList"):
+        block_result["error"] = ", ".join(
+            str(error.get("description")) for error in error_list
+        )
+    return block_result
+
+
+async def async_set_blocks(
+    hass: HomeAssistant,
+    entry_data: dict,
+    blocks: list[dict],
+    code: str | None = None,
+    request_limiter: asyncio.Semaphore | None = None,
+) -> list[dict]:
+    """Send one arm/disarm command per block and return each block's result.
+
+    The commands go out together, at most ``MAX_CONCURRENT_REQUESTS`` at a
+    time, as a single entry in the panel's command queue. Acknowledged
+    blocks are then confirmed by the queue's shared refreshes in the
+    background.
+    """
+    block_numbers = [block[ATTR_BLOCK] for block in blocks]
+    if len(set(block_numbers)) != len(block_numbers):
+        raise ServiceValidationError(
+            translation_domain=DOMAIN,
+            translation_key="duplicate_block",
+        )
+
+    coordinator = entry_data["alarm_coordinator"]
+    if coordinator.hkc_alarm is None:
+        raise HomeAssistantError(
+            translation_domain=DOMAIN,
+            translation_key="not_connected",
+        )
+    commands = []
+    user_code_by_block = {}
+    for block in blocks:
+        block_number, state = block[ATTR_BLOCK], block[ATTR_STATE]
+        command_name = BLOCK_STATE_COMMANDS[state][0]
+        user_code = _block_user_code(entry_data, block_number, code)
+        user_code_by_block[block_number] = user_code
+        commands.append(
+            (
+                block_number,
+                state,
+                _block_command(hass, entry_data, command_name, user_code, block_number),
+            )
+        )
+
+    def timed_job(block_number: int, state: str, command):
+        async def job() -> dict:
+            started = time.monotonic()
+            try:
+                with coordinator.metrics.timed("command"):
+                    res = await command()
+            except Exception as err:
+                _LOGGER.warning(
+                    "Failed to set block %s of panel %s to %s: %s",
+                    block_number,
+                    coordinator.panel_id,
+                    state,
+                    err,
+                )
+                res = {"errorList": [{"description": str(err)}]}
+            return _block_result(block_number, state, res, time.monotonic() - started)
+
+        return job
+
+    async def send_blocks() -> list[dict]:
+        return await async_gather_limited(
+            [timed_job(*command) for command in commands],
+            MAX_CONCURRENT_REQUESTS,
+            request_limiter,
+        )
+
+    # An identical batch already queued is not sent twice
+    batch_key = (
+        SERVICE_SET_BLOCKS,
+        tuple((block[ATTR_BLOCK], block[ATTR_STATE]) for block in blocks),
+    )
+    results = await coordinator.command_queue.async_send(batch_key, send_blocks)
+
+    sent = {
+        result["block"]: (
+            user_code_by_block[result["block"]],
+            BLOCK_STATE_COMMANDS[result["state"]][1],
+        )
+        for result in results
+        if result["result"] == "acknowledged"
+    }
+    if sent:
+        coordinator.async_note_command()
+        hass.async_create_background_task(
+            coordinator.command_queue.async_confirm(
+                partial(_blocks_in_state, coordinator, sent),
+                {user_code for user_code, _ in sent.values()},
+            ),
+            f"{DOMAIN}_{SERVICE_SET_BLOCKS}_confirm",
+        )
+    return results
+
+
+def _blocks_in_state(coordinator, arm_states: dict[int, tuple[str, int]]) -> bool:
+    """Return True once every block shows its arm state to its sending user."""
+    for block_number, (user_code, arm_state) in arm_states.items():
+        status = coordinator.status_by_user.get(user_code) or {}
+        blocks = status.get("blocks", [])
+        if not (
+            0 < block_number <= len(blocks)
+            and blocks[block_number - 1].get("armState") == arm_state
+        ):
+            return False
+    return True
+
+
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the integration's services."""
+
+    async def async_handle_set_blocks(call: ServiceCall) -> ServiceResponse:
+        _, entry_data = _resolve_entry_data(hass, call.data.get(ATTR_CONFIG_ENTRY_ID))
+        results = await async_set_blocks(
+            hass,
+            entry_data,
+            call.data[ATTR_BLOCKS],
+            call.data.get(ATTR_CODE),
+            async_get_manager(hass).limiter,
+        )
+        return {"blocks": results}
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_SET_BLOCKS,
+        async_handle_set_blocks,
+        schema=SET_BLOCKS_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
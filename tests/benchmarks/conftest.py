@@ -0,0 +1,41 @@
+"""Fixtures for the offline benchmark suite.
+
+Benchmarks are plain (sync) tests so pytest-benchmark can time them; async
+work is driven on the test event loop with ``run_until_complete``.
+
+Set ``HKC_BENCH_LATENCY`` to a number of seconds to add a simulated cloud
+round trip to every synthetic panel request.
+"""
+
+import os
+from contextlib import AsyncExitStack
+
+import pytest
+from homeassistant import loader
+from pytest_homeassistant_custom_component.common import async_test_home_assistant
+
+from .synthetic_panel import PANEL_SHAPES, SyntheticHKCAlarm
+
+
+@pytest.fixture
+def bench_hass(event_loop):
+    """Yield a running test Home Assistant outside of an async test."""
+    # debug mode adds per-callback overhead that would skew the timings
+    event_loop.set_debug(False)
+    stack = AsyncExitStack()
+    hass = event_loop.run_until_complete(
+        stack.enter_async_context(async_test_home_assistant(event_loop))
+    )
+    hass.data.pop(loader.DATA_CUSTOM_COMPONENTS)
+    yield hass
+    event_loop.run_until_complete(hass.async_stop(force=True))
+    event_loop.run_until_complete(stack.aclose())
+
+
+@pytest.fixture(params=sorted(PANEL_SHAPES))
+def synthetic_alarm(request):
+    """Return a synthetic panel for each benchmark panel shape."""
+    return SyntheticHKCAlarm(
+        PANEL_SHAPES[request.param],
+        latency=float(os.environ.get("HKC_BENCH_LATENCY", "0")),
+    )
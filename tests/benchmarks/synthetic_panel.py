@@ -0,0 +1,142 @@
+"""Synthetic HKC panels for benchmarking without the HKC cloud."""
+
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+
+@dataclass(frozen=True)
+class PanelShape:
+    """Size of a synthetic panel."""
+
+    user_codes: int
+    blocks: int
+    inputs: int
+
+
+PANEL_SHAPES = {
+    "single_user": PanelShape(user_codes=1, blocks=1, inputs=16),
+    "multi_user": PanelShape(user_codes=4, blocks=8, inputs=256),
+}
+
+
+class SyntheticHKCAlarm:
+    """A pyhkc HKCAlarm stand-in that serves generated panel data.
+
+    Every call sleeps for ``latency`` seconds to model the cloud round trip,
+    so it should run in the executor like the real blocking client. Blocks
+    are shared out between users round-robin and every input belongs to
+    one block.
+    """
+
+    def __init__(self, shape: PanelShape, latency: float = 0.0, panel_id="bench_panel"):
+        self.panel_id = panel_id
+        self.shape = shape
+        self.latency = latency
+        self.user_codes = [str(1000 + index) for index in range(shape.user_codes)]
+        self.user_code = self.user_codes[0]
+        self.input_state = 0
+
+    def _wait(self):
+        if self.latency:
+            time.sleep(self.latency)
+
+    def _user_blocks(self, user_code) -> set[int]:
+        user_index = self.user_codes.index(str(user_code or self.user_code))
+        if self.shape.user_codes == 1:
+            return set(range(1, self.shape.blocks + 1))
+        return {
+            block
+            for block in range(1, self.shape.blocks + 1)
+            if (block - 1) % self.shape.user_codes == user_index
+        } or {1}
+
+    def _input_block(self, input_number: int) -> int:
+        return (input_number - 1) % self.shape.blocks + 1
+
+    def get_system_status(self, user_code=None):
+        self._wait()
+        allowed = self._user_blocks(user_code)
+        return {
+            "blocks": [
+                {
+                    "armState": 0,
+                    "isEnabled": True,
+                    "inAlarm": False,
+                    "inFault": False,
+                    "userAllowed": block in allowed,
+                    "inhibit": False,
+                }
+                for block in range(1, self.shape.blocks + 1)
+            ],
+            "descriptions": {
+                f"block{block}": f"Block {block}"
+                for block in range(1, self.shape.blocks + 1)
+            },
+        }
+
+    def get_panel(self):
+        self._wait()
+        return {
+            "greenLed": 1,
+            "redLed": 0,
+            "amberLed": 0,
+            "cursorOn": False,
+            "cursorIndex": 0,
+            "display": datetime.now(timezone.utc).strftime("%a %d %b %H:%M"),
+            "blink": "0000000000000000",
+        }
+
+    def get_all_inputs(self, user_code=None):
+        self._wait()
+        allowed = self._user_blocks(user_code)
+        return [
+            {
+                "inputId": str(number),
+                "input": number,
+                "description": f"Zone {number}",
+                "inputState": self.input_state,
+                "inputType": 1,
+                "timestamp": "2024-05-12T20:55:00Z",
+            }
+            for number in range(1, self.shape.inputs + 1)
+            if self._input_block(number) in allowed
+        ]
+
+    def get_user_access_summary(self, user_codes=None):
+        summaries = {}
+        for code in user_codes or self.user_codes:
+            allowed = self._user_blocks(code)
+            blocks = [
+                {"block": block, "description": f"Block {block}", "armState": 0}
+                for block in range(1, self.shape.blocks + 1)
+            ]
+            summaries[int(code)] = {
+                "userOptions": {},
+                "allowedBlocks": [b for b in blocks if b["block"] in allowed],
+                "deniedBlocks": [b for b in blocks if b["block"] not in allowed],
+            }
+        return summaries
+
+    def get_device_details(self):
+        self._wait()
+        return {
+            "siteName": "Benchmark Panel",
+            "type": "Synthetic",
+            "variant": "1",
+            "version": "1.0.0",
+            "serialNumber": "BENCH0001",
+        }
+
+    def get_outputs(self):
+        self._wait()
+        return []
+
+    def get_temporary_user(self, user_code=None):
+        self._wait()
+        return {}
+
+
+def build_access_summary(hkc_alarm: SyntheticHKCAlarm) -> dict[int, dict]:
+    """Return the access summary the panel reports for its users."""
+    return hkc_alarm.get_user_access_summary(hkc_alarm.user_codes)
@@ -0,0 +1,143 @@
+"""Offline benchmarks for the refresh and entity update hot paths.
+
+Run with ``pytest tests/benchmarks``; pass ``--benchmark-skip`` to the full
+test run to leave them out.
+"""
+
+from unittest.mock import patch
+
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.hkc_alarm import HKCAlarmCoordinator, HKCSensorCoordinator
+from custom_components.hkc_alarm.const import (
+    CONF_ADDITIONAL_USER_CODES,
+    CONF_UPDATE_INTERVAL,
+    DOMAIN,
+)
+from custom_components.hkc_alarm.helpers import build_alarm_views
+from custom_components.hkc_alarm.scheduler import HKCPanelScheduler
+from .synthetic_panel import build_access_summary
+
+pytest.importorskip("pytest_benchmark")
+
+
+def build_entry(synthetic_alarm):
+    return MockConfigEntry(
+        domain=DOMAIN,
+        version=3,
+        minor_version=1,
+        unique_id=synthetic_alarm.panel_id,
+        data={
+            "panel_id": synthetic_alarm.panel_id,
+            "panel_password": "0000",
+            "user_code": synthetic_alarm.user_codes[0],
+        },
+        options={
+            CONF_UPDATE_INTERVAL: 60,
+            CONF_ADDITIONAL_USER_CODES: synthetic_alarm.user_codes[1:],
+        },
+    )
+
+
+def setup_entry(event_loop, hass, synthetic_alarm):
+    entry = build_entry(synthetic_alarm)
+    entry.add_to_hass(hass)
+    with patch(
+        "custom_components.hkc_alarm.build_hkc_alarm",
+        return_value=synthetic_alarm,
+    ):
+        assert event_loop.run_until_complete(
+            hass.config_entries.async_setup(entry.entry_id)
+        )
+    return entry
+
+
+def remove_entry(event_loop, hass, entry):
+    event_loop.run_until_complete(hass.config_entries.async_remove(entry.entry_id))
+
+
+def test_benchmark_alarm_coordinator_update(benchmark, event_loop, bench_hass, synthetic_alarm):
+    entry = build_entry(synthetic_alarm)
+    entry.add_to_hass(bench_hass)
+    scheduler = HKCPanelScheduler(
+        bench_hass, synthetic_alarm, synthetic_alarm.user_codes, 60
+    )
+    alarm_coordinator = HKCAlarmCoordinator(bench_hass, entry, scheduler)
+    HKCSensorCoordinator(bench_hass, entry, scheduler)
+
+    def reset_debounce():
+        scheduler.last_update = None
+
+    benchmark.pedantic(
+        lambda: event_loop.run_until_complete(alarm_coordinator._async_update_data()),
+        setup=reset_debounce,
+        rounds=20,
+        warmup_rounds=1,
+    )
+
+    assert set(scheduler.inputs_by_user) == set(synthetic_alarm.user_codes)
+
+
+@pytest.mark.parametrize("inputs_change", [False, True], ids=["unchanged", "changed"])
+def test_benchmark_sensor_entity_updates(
+    benchmark, event_loop, bench_hass, synthetic_alarm, inputs_change
+):
+    entry = setup_entry(event_loop, bench_hass, synthetic_alarm)
+    entry_data = bench_hass.data[DOMAIN][entry.entry_id]
+    scheduler = entry_data["scheduler"]
+    sensor_coordinator = entry_data["sensor_coordinator"]
+    assert bench_hass.states.async_entity_ids("sensor")
+
+    def fetch_inputs():
+        if inputs_change:
+            synthetic_alarm.input_state ^= 1
+        # Fetch and diff the inputs without the scheduler's push, which
+        # would wake the sensors before the timed call
+        event_loop.run_until_complete(scheduler._async_fetch())
+        # Forget earlier rounds' changes, which stay awake for a while
+        sensor_coordinator._recent_changes.clear()
+        sensor_coordinator.async_handle_scheduler_refresh()
+        assert bool(sensor_coordinator._inputs_to_wake) is inputs_change
+
+    # Time only the push to every HKCSensor, not the fetch feeding it
+    benchmark.pedantic(
+        lambda: sensor_coordinator.async_set_updated_data(
+            sensor_coordinator.build_data()
+        ),
+        setup=fetch_inputs,
+        rounds=20,
+        warmup_rounds=1,
+    )
+
+    remove_entry(event_loop, bench_hass, entry)
+
+
+def test_benchmark_build_alarm_views(benchmark, synthetic_alarm):
+    access_summary = build_access_summary(synthetic_alarm)
+
+    views = benchmark(
+        build_alarm_views,
+        synthetic_alarm.user_codes,
+        access_summary,
+        supports_multi_view=True,
+    )
+
+    assert len(views) == len(synthetic_alarm.user_codes)
+
+
+def test_benchmark_async_setup_entry(benchmark, event_loop, bench_hass, synthetic_alarm):
+    entries = []
+
+    def teardown():
+        remove_entry(event_loop, bench_hass, entries.pop())
+
+    benchmark.pedantic(
+        lambda: entries.append(setup_entry(event_loop, bench_hass, synthetic_alarm)),
+        teardown=teardown,
+        rounds=5,
+    )
+
+    # --benchmark-disable runs the target once and skips the teardown
+    while entries:
+        teardown()
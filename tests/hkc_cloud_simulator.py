@@ -0,0 +1,312 @@
+"""A scriptable local stand-in for the HKC cloud API.
+
+``HKCCloudSimulator`` serves the AppV3 endpoints used by pyhkc and the
+integration from an aiohttp server on localhost, so the real ``HKCAlarm``
+(``build_hkc_alarm(..., base_url=simulator.base_url)``) and the async client
+can be exercised with realistic timing and no live panel.
+
+Scenarios are scripted on the simulator between requests: change input
+states, queue command ``resultCode`` responses, delay arming, add latency,
+hold every response until released, rate limit or take the whole cloud down.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+
+from aiohttp import web
+
+
+@dataclass
+class SimulatedInput:
+    """One panel input (zone)."""
+
+    number: int
+    description: str
+    block: int
+    input_state: int = 0
+    timestamp: str = "0001-01-01T00:00:00"
+
+    def as_payload(self) -> dict:
+        return {
+            "inputId": str(self.number),
+            "input": self.number,
+            "description": self.description,
+            "inputState": self.input_state,
+            "inputType": 1,
+            "timestamp": self.timestamp,
+        }
+
+
+@dataclass
+class SimulatedPanel:
+    """Topology and live state of a simulated panel."""
+
+    panel_id: int = 100000
+    panel_password: str = "secret"
+    user_blocks: dict[str, list[int]] = field(default_factory=lambda: {"1234": [1]})
+    block_names: dict[int, str] = field(default_factory=lambda: {1: "House"})
+    inputs: list[SimulatedInput] = field(default_factory=list)
+    device_details: dict = field(
+        default_factory=lambda: {
+            "siteName": "Simulated Site",
+            "type": "SIM",
+            "variant": "1",
+            "version": "1.0.0",
+            "serialNumber": "SIM0001",
+        }
+    )
+    arm_states: dict[int, int] = field(default_factory=dict)
+    in_alarm: set[int] = field(default_factory=set)
+
+    @classmethod
+    def build(
+        cls,
+        user_codes: int = 1,
+        blocks: int = 1,
+        inputs: int = 8,
+        **kwargs,
+    ) -> SimulatedPanel:
+        """Build a panel sharing blocks and inputs out round-robin."""
+        codes = [str(1234 + index) for index in range(user_codes)]
+        return cls(
+            user_blocks={
+                code: [
+                    block
+                    for block in range(1, blocks + 1)
+                    if user_codes == 1 or (block - 1) % user_codes == index
+                ]
+                or [1]
+                for index, code in enumerate(codes)
+            },
+            block_names={block: f"Block {block}" for block in range(1, blocks + 1)},
+            inputs=[
+                SimulatedInput(number, f"Zone {number}", (number - 1) % blocks + 1)
+                for number in range(1, inputs + 1)
+            ],
+            **kwargs,
+        )
+
+    @property
+    def user_codes(self) -> list[str]:
+        return list(self.user_blocks)
+
+
+class HKCCloudSimulator:
+    """Serve a ``SimulatedPanel`` over the HKC AppV3 HTTP API."""
+
+    def __init__(self, panel: SimulatedPanel | None = None, page_size: int = 16) -> None:
+        self.panel = panel or SimulatedPanel.build()
+        self.page_size = page_size
+        self.device_id = "simulated-device"
+        self.latency = 0.0
+        self.outage = False
+        self.rate_limit: int | None = None
+        self.rate_limit_window = 60.0
+        self.arm_delay = 0.0
+        self.requests: list[tuple[str, dict]] = []
+        self._command_results: list[int] = []
+        self._request_times: list[float] = []
+        self._pending_arms: list[asyncio.TimerHandle] = []
+        self._released = asyncio.Event()
+        self._released.set()
+        self._runner: web.AppRunner | None = None
+        self.base_url: str | None = None
+
+    # Scripting
+
+    def set_input_state(self, number: int, input_state: int, timestamp: datetime | None = None) -> None:
+        """Change an input as if it had been triggered on the panel."""
+        for input_data in self.panel.inputs:
+            if input_data.number == number:
+                input_data.input_state = input_state
+                input_data.timestamp = (timestamp or datetime.now(timezone.utc)).strftime(
+                    "%Y-%m-%dT%H:%M:%SZ"
+                )
+                return
+        raise KeyError(number)
+
+    def queue_command_results(self, *result_codes: int) -> None:
+        """Answer the next arming commands with these result codes (default 5)."""
+        self._command_results.extend(result_codes)
+
+    def set_in_alarm(self, block: int, in_alarm: bool = True) -> None:
+        if in_alarm:
+            self.panel.in_alarm.add(block)
+        else:
+            self.panel.in_alarm.discard(block)
+
+    def hold(self) -> None:
+        """Keep every response back until ``release`` is called."""
+        self._released.clear()
+
+    def release(self) -> None:
+        """Answer the held requests and stop holding new ones."""
+        self._released.set()
+
+    def request_count(self, path: str | None = None) -> int:
+        return sum(1 for request_path, _ in self.requests if path in (None, request_path))
+
+    # Server lifecycle
+
+    async def start(self) -> str:
+        """Start serving on a free localhost port and return the base URL."""
+        app = web.Application()
+        app.router.add_post("/AppV3/{section}/{action}", self._handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        port = self._runner.addresses[0][1]
+        self.base_url = f"http://127.0.0.1:{port}"
+        return self.base_url
+
+    async def stop(self) -> None:
+        self.release()
+        for handle in self._pending_arms:
+            handle.cancel()
+        self._pending_arms.clear()
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self) -> HKCCloudSimulator:
+        await self.start()
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        await self.stop()
+
+    # Request handling
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        path = request.path
+        data = await request.json()
+        self.requests.append((path, data))
+
+        await self._released.wait()
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.outage:
+            return web.json_response({"message": "Service Unavailable"}, status=503)
+        if self._rate_limited():
+            return web.json_response({"message": "Too Many Requests"}, status=429)
+
+        handler = {
+            "/AppV3/App/GetDeviceId": self._get_device_id,
+            "/AppV3/Device/Status": self._status,
+            "/AppV3/Device/Inputs": self._inputs,
+            "/AppV3/Device/RemoteKeypad": self._keypad,
+            "/AppV3/Device/Arming": self._arming,
+            "/AppV3/Device/Details": lambda _: self.panel.device_details,
+            "/AppV3/Device/Outputs": lambda _: [],
+            "/AppV3/Device/GetTemporaryUser": lambda _: {},
+        }.get(path)
+        if handler is None:
+            return web.json_response({"message": "Not Found"}, status=404)
+        if path != "/AppV3/App/GetDeviceId" and data.get("deviceId") != self.device_id:
+            return web.json_response({"message": "Unauthorized"}, status=401)
+        if str(data.get("userCode")) not in self.panel.user_blocks:
+            return web.json_response({"success": False})
+        return web.json_response(handler(data))
+
+    def _rate_limited(self) -> bool:
+        if self.rate_limit is None:
+            return False
+        now = time.monotonic()
+        self._request_times = [
+            at for at in self._request_times if now - at < self.rate_limit_window
+        ]
+        if len(self._request_times) >= self.rate_limit:
+            return True
+        self._request_times.append(now)
+        return False
+
+    def _get_device_id(self, data: dict) -> dict:
+        if (
+            str(data.get("installationId")) != str(self.panel.panel_id)
+            or data.get("devicePassword") != self.panel.panel_password
+        ):
+            return {"deviceId": None}
+        return {"deviceId": self.device_id}
+
+    def _status(self, data: dict) -> dict:
+        allowed = self.panel.user_blocks[str(data["userCode"])]
+        return {
+            "blocks": [
+                {
+                    "armState": self.panel.arm_states.get(block, 0),
+                    "isEnabled": True,
+                    "inAlarm": block in self.panel.in_alarm,
+                    "inFault": False,
+                    "userAllowed": block in allowed,
+                    "inhibit": False,
+                }
+                for block in sorted(self.panel.block_names)
+            ],
+            "descriptions": {
+                f"block{block}": name for block, name in self.panel.block_names.items()
+            },
+            "userOptions": {},
+            "secureCommAddress": "",
+        }
+
+    def _inputs(self, data: dict) -> dict:
+        allowed = self.panel.user_blocks[str(data["userCode"])]
+        visible = [
+            {
+                **input_data.as_payload(),
+                "visibleUserCodes": [
+                    int(code)
+                    for code, blocks in self.panel.user_blocks.items()
+                    if input_data.block in blocks
+                ],
+            }
+            for input_data in self.panel.inputs
+            if input_data.block in allowed and input_data.number >= data.get("firstInput", 1)
+        ]
+        return {
+            "inputs": visible[: self.page_size],
+            "moreInputs": len(visible) > self.page_size,
+        }
+
+    def _keypad(self, data: dict) -> dict:
+        armed = any(self.panel.arm_states.values())
+        return {
+            "greenLed": 0 if armed else 1,
+            "redLed": 1 if armed else 0,
+            "amberLed": 0,
+            "cursorOn": False,
+            "cursorIndex": 0,
+            "display": datetime.now(timezone.utc).strftime("%a %d %b %H:%M"),
+            "blink": "0000000000000000",
+        }
+
+    def _arming(self, data: dict) -> dict:
+        result_code = self._command_results.pop(0) if self._command_results else 5
+        if result_code != 5:
+            return {"resultCode": result_code}
+
+        # Block 0 is treated as "every block the user may arm"; the arming
+        # command number doubles as the resulting block armState
+        allowed = self.panel.user_blocks[str(data["userCode"])]
+        block = data.get("block", 0)
+        blocks = allowed if block == 0 else [block + 1]
+        arm_state = data["command"]
+
+        def apply() -> None:
+            for target in blocks:
+                self.panel.arm_states[target] = arm_state
+                if arm_state == 0:
+                    self.panel.in_alarm.discard(target)
+
+        if self.arm_delay:
+            self._pending_arms.append(
+                asyncio.get_running_loop().call_later(self.arm_delay, apply)
+            )
+        else:
+            apply()
+        return {"resultCode": result_code}
@@ -1,10 +1,25 @@
+import asyncio
+from contextlib import contextmanager
 from datetime import datetime, timedelta, timezone
-from unittest.mock import MagicMock, AsyncMock
+from unittest.mock import MagicMock, AsyncMock, patch
+
+from custom_components.hkc_alarm.circuit_breaker import HKCCircuitBreaker
+from custom_components.hkc_alarm.command_queue import HKCCommandQueue
+from custom_components.hkc_alarm.helpers import build_input_index
+from custom_components.hkc_alarm.metrics import HKCMetrics
+
+PANEL_ID = "hkc_alarm_instance"
 
 
 class MockAlarmCoordinator:
+    panel_id = PANEL_ID
+    hkc_client = None
     async_request_refresh = AsyncMock()
-    async_force_refresh = AsyncMock()
+    async_refresh_statuses = AsyncMock()
+    async_note_command = MagicMock()
+    metrics = HKCMetrics()
+    breaker = HKCCircuitBreaker()
+    stale_since = None
     last_update_success = True  # or False, depending on what you want to test
     config_entry = None
     status = {}
@@ -23,15 +38,36 @@ class MockAlarmCoordinator:
 
 class MockSensorCoordinator:
     async_request_refresh = AsyncMock()
+    metrics = HKCMetrics()
     last_update_success = True  # or False, depending on what you want to test
     inputs_by_user = {}
 
+    @property
+    def input_index(self):
+        return build_input_index(self.inputs_by_user)
+
+    def get_input(self, user_code, input_id):
+        return self.input_index.get(user_code, {}).get(str(input_id))
+
 
 class MockHKCAlarm:
-    panel_id = "hkc_alarm_instance"
+    panel_id = PANEL_ID
 
     def __init__(self):
         self.command_calls = []
+        self.fetch_calls = []
+
+    def get_system_status(self, user_code=None):
+        self.fetch_calls.append(("status", user_code))
+        return {"blocks": [{"armState": 0, "isEnabled": True, "inAlarm": False}]}
+
+    def get_panel(self):
+        self.fetch_calls.append(("panel", None))
+        return {"display": "Mon 12 May 20:55"}
+
+    def get_all_inputs(self, user_code=None):
+        self.fetch_calls.append(("inputs", user_code))
+        return [{"inputId": "1", "description": "Front Door"}]
 
     def _command(self, command_name, user_code=None):
         self.command_calls.append((command_name, user_code))
@@ -64,8 +100,11 @@ def get_mock_hkc_alarm():
     return MockHKCAlarm()
 
 
-def get_mock_alarm_coordinator():
-    return MockAlarmCoordinator()
+def get_mock_alarm_coordinator(hkc_alarm=None):
+    coordinator = MockAlarmCoordinator()
+    coordinator.hkc_alarm = hkc_alarm or get_mock_hkc_alarm()
+    coordinator.command_queue = HKCCommandQueue(coordinator)
+    return coordinator
 
 
 def get_mock_sensor_coordinator():
@@ -81,3 +120,24 @@ def get_mock_hass():
     mock_hass.bus.async_fire = MagicMock()
     mock_hass.data.get.return_value = {}
     return mock_hass
+
+
+@contextmanager
+def patch_confirm_clock():
+    """Run command confirmations on a fake clock that only sleeps advance.
+
+    Yields the patched ``asyncio.sleep`` so tests can check the delays.
+    """
+    clock = MagicMock()
+    clock.monotonic.return_value = 0.0
+    real_sleep = asyncio.sleep
+
+    async def advance(delay):
+        clock.monotonic.return_value += delay
+        await real_sleep(0)
+
+    sleep = AsyncMock(side_effect=advance)
+    with patch(
+        "custom_components.hkc_alarm.command_queue.asyncio.sleep", new=sleep
+    ), patch("custom_components.hkc_alarm.command_queue.time", new=clock):
+        yield sleep
@@ -1,12 +1,18 @@
-from unittest.mock import AsyncMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 from homeassistant.components.alarm_control_panel import AlarmControlPanelState, CodeFormat
-from homeassistant.exceptions import ServiceValidationError
+from homeassistant.exceptions import HomeAssistantError, ServiceValidationError
 
 from custom_components.hkc_alarm.alarm_control_panel import HKCAlarmControlPanel
 from custom_components.hkc_alarm.const import DOMAIN
-from .mock_common import get_mock_alarm_coordinator, get_mock_hass, get_mock_hkc_alarm
+from .mock_common import (
+    PANEL_ID,
+    get_mock_alarm_coordinator,
+    get_mock_hass,
+    get_mock_hkc_alarm,
+    patch_confirm_clock,
+)
 
 
 mock_panel_status_disarmed = {
@@ -38,7 +44,7 @@ def build_view(user_code="1234", label="HKC Alarm System", multi_view=False, blo
 async def test_hkc_alarm_control_panel_state():
     with patch.object(HKCAlarmControlPanel, "async_write_ha_state", return_value=None):
         alarm_control_panel = HKCAlarmControlPanel(
-            get_mock_hkc_alarm(),
+            PANEL_ID,
             build_view(),
             mock_alarm_coordinator := get_mock_alarm_coordinator(),
             False,
@@ -54,7 +60,7 @@ async def test_hkc_alarm_control_panel_state():
 @pytest.mark.asyncio
 async def test_device_info():
     alarm_control_panel = HKCAlarmControlPanel(
-        get_mock_hkc_alarm(), build_view(), get_mock_alarm_coordinator(), False
+        PANEL_ID, build_view(), get_mock_alarm_coordinator(), False
     )
     expected_device_info = {
         "identifiers": {(DOMAIN, "hkc_alarm_instance")},
@@ -66,10 +72,44 @@ async def test_device_info():
     assert alarm_control_panel.device_info == expected_device_info
 
 
+@pytest.mark.asyncio
+async def test_metadata_derived_values_are_built_once_per_metadata():
+    mock_alarm_coordinator = get_mock_alarm_coordinator()
+    mock_alarm_coordinator.config_entry = MagicMock(entry_id="entry_1")
+    entry_data = {
+        "device_metadata": {"model": "HKC SureSet / Variant 1", "panel_name": "Home"},
+        "temporary_user_by_code": {"1234": {"subscriptionDaysLeft": 30}},
+    }
+    alarm_control_panel = HKCAlarmControlPanel(
+        PANEL_ID, build_view(), mock_alarm_coordinator, False
+    )
+    alarm_control_panel.hass = get_mock_hass()
+    alarm_control_panel.hass.data = {DOMAIN: {"entry_1": entry_data}}
+
+    device_info = alarm_control_panel.device_info
+    static_attributes = alarm_control_panel._static_attributes()
+    assert device_info["model"] == "HKC SureSet / Variant 1"
+    assert "serial_number" not in device_info
+    assert alarm_control_panel.device_info is device_info
+    assert alarm_control_panel._static_attributes() is static_attributes
+    assert alarm_control_panel.extra_state_attributes["Panel Name"] == "Home"
+    assert (
+        alarm_control_panel.extra_state_attributes[
+            "Temporary User Subscription Days Left"
+        ]
+        == 30
+    )
+
+    # A metadata revalidation replaces the dicts in the entry data
+    entry_data["device_metadata"] = {"model": "HKC SureSet / Variant 2", "panel_name": "Home"}
+    assert alarm_control_panel.device_info["model"] == "HKC SureSet / Variant 2"
+    assert alarm_control_panel._static_attributes() is not static_attributes
+
+
 @pytest.mark.asyncio
 async def test_name():
     alarm_control_panel = HKCAlarmControlPanel(
-        get_mock_hkc_alarm(), build_view(), get_mock_alarm_coordinator(), False
+        PANEL_ID, build_view(), get_mock_alarm_coordinator(), False
     )
     assert alarm_control_panel.name is None
 
@@ -77,7 +117,7 @@ async def test_name():
 @pytest.mark.asyncio
 async def test_should_poll():
     alarm_control_panel = HKCAlarmControlPanel(
-        get_mock_hkc_alarm(), build_view(), get_mock_alarm_coordinator(), False
+        PANEL_ID, build_view(), get_mock_alarm_coordinator(), False
     )
     assert alarm_control_panel.should_poll is False
 
@@ -85,7 +125,7 @@ async def test_should_poll():
 @pytest.mark.asyncio
 async def test_async_update():
     alarm_control_panel = HKCAlarmControlPanel(
-        get_mock_hkc_alarm(),
+        PANEL_ID,
         build_view(),
         mock_alarm_coordinator := get_mock_alarm_coordinator(),
         False,
@@ -97,7 +137,7 @@ async def test_async_update():
 @pytest.mark.asyncio
 async def test_single_user_mode_does_not_require_pin():
     alarm_control_panel = HKCAlarmControlPanel(
-        get_mock_hkc_alarm(),
+        PANEL_ID,
         build_view(),
         get_mock_alarm_coordinator(),
         False,
@@ -110,7 +150,7 @@ async def test_single_user_mode_does_not_require_pin():
 @pytest.mark.asyncio
 async def test_require_pin_option_enables_keypad():
     alarm_control_panel = HKCAlarmControlPanel(
-        get_mock_hkc_alarm(),
+        PANEL_ID,
         build_view(),
         get_mock_alarm_coordinator(),
         True,
@@ -123,7 +163,7 @@ async def test_require_pin_option_enables_keypad():
 @pytest.mark.asyncio
 async def test_multi_view_alarm_uses_block_specific_unique_id():
     alarm_control_panel = HKCAlarmControlPanel(
-        get_mock_hkc_alarm(),
+        PANEL_ID,
         build_view(user_code="5678", label="Guest Suite", multi_view=True, block_numbers=[2]),
         get_mock_alarm_coordinator(),
         False,
@@ -137,16 +177,16 @@ async def test_multi_view_alarm_uses_block_specific_unique_id():
 async def test_arm_command_uses_default_view_user_without_pin():
     hkc_alarm = get_mock_hkc_alarm()
     alarm_control_panel = HKCAlarmControlPanel(
-        hkc_alarm,
+        PANEL_ID,
         build_view(user_code="5678", label="Guest Suite", multi_view=True, block_numbers=[2]),
-        mock_alarm_coordinator := get_mock_alarm_coordinator(),
+        mock_alarm_coordinator := get_mock_alarm_coordinator(hkc_alarm),
         False,
     )
     mock_hass = get_mock_hass()
     alarm_control_panel.hass = mock_hass
 
     with patch(
-        "custom_components.hkc_alarm.alarm_control_panel.asyncio.sleep",
+        "custom_components.hkc_alarm.command_queue.asyncio.sleep",
         new=AsyncMock(),
     ):
         await alarm_control_panel.async_alarm_arm_home()
@@ -158,23 +198,23 @@ async def test_arm_command_uses_default_view_user_without_pin():
     assert alarm_control_panel.extra_state_attributes["Last Command Result"] == "acknowledged"
     assert alarm_control_panel.extra_state_attributes["Last Command Result Code"] == 5
     assert alarm_control_panel.extra_state_attributes["Last Command Acknowledged"] is True
-    mock_alarm_coordinator.async_force_refresh.assert_called()
+    mock_alarm_coordinator.async_refresh_statuses.assert_called()
 
 
 @pytest.mark.asyncio
 async def test_disarm_command_updates_feedback_without_state_change():
     hkc_alarm = get_mock_hkc_alarm()
     alarm_control_panel = HKCAlarmControlPanel(
-        hkc_alarm,
+        PANEL_ID,
         build_view(),
-        mock_alarm_coordinator := get_mock_alarm_coordinator(),
+        mock_alarm_coordinator := get_mock_alarm_coordinator(hkc_alarm),
         False,
     )
     mock_hass = get_mock_hass()
     alarm_control_panel.hass = mock_hass
 
     with patch(
-        "custom_components.hkc_alarm.alarm_control_panel.asyncio.sleep",
+        "custom_components.hkc_alarm.command_queue.asyncio.sleep",
         new=AsyncMock(),
     ):
         await alarm_control_panel.async_alarm_disarm()
@@ -186,7 +226,7 @@ async def test_disarm_command_updates_feedback_without_state_change():
     assert alarm_control_panel.extra_state_attributes["Last Command Result"] == "acknowledged"
     assert alarm_control_panel.extra_state_attributes["Last Command Result Code"] == 5
     assert alarm_control_panel.extra_state_attributes["Last Command Acknowledged"] is True
-    mock_alarm_coordinator.async_force_refresh.assert_called()
+    mock_alarm_coordinator.async_refresh_statuses.assert_called()
 
 
 @pytest.mark.asyncio
@@ -195,9 +235,9 @@ async def test_disarm_already_in_state_still_records_api_ack():
     hkc_alarm.disarm = lambda user_code=None: {"resultCode": 4}
 
     alarm_control_panel = HKCAlarmControlPanel(
-        hkc_alarm,
+        PANEL_ID,
         build_view(),
-        get_mock_alarm_coordinator(),
+        get_mock_alarm_coordinator(hkc_alarm),
         False,
     )
     mock_hass = get_mock_hass()
@@ -215,7 +255,7 @@ async def test_disarm_already_in_state_still_records_api_ack():
 @pytest.mark.asyncio
 async def test_invalid_entered_user_pin_is_rejected():
     alarm_control_panel = HKCAlarmControlPanel(
-        get_mock_hkc_alarm(),
+        PANEL_ID,
         build_view(),
         get_mock_alarm_coordinator(),
         True,
@@ -229,7 +269,7 @@ async def test_invalid_entered_user_pin_is_rejected():
 @pytest.mark.asyncio
 async def test_missing_user_pin_is_rejected_when_required():
     alarm_control_panel = HKCAlarmControlPanel(
-        get_mock_hkc_alarm(),
+        PANEL_ID,
         build_view(),
         get_mock_alarm_coordinator(),
         True,
@@ -238,3 +278,129 @@ async def test_missing_user_pin_is_rejected_when_required():
 
     with pytest.raises(ServiceValidationError):
         await alarm_control_panel.async_alarm_disarm()
+
+
+@pytest.mark.asyncio
+async def test_command_before_first_login_is_rejected():
+    mock_alarm_coordinator = get_mock_alarm_coordinator()
+    mock_alarm_coordinator.hkc_alarm = None
+    alarm_control_panel = HKCAlarmControlPanel(
+        PANEL_ID,
+        build_view(),
+        mock_alarm_coordinator,
+        False,
+    )
+    alarm_control_panel.hass = get_mock_hass()
+
+    with pytest.raises(HomeAssistantError) as err:
+        await alarm_control_panel.async_alarm_arm_away()
+    assert err.value.translation_key == "not_connected"
+
+@pytest.mark.asyncio
+async def test_unchanged_alarm_state_skips_state_write():
+    with patch.object(
+        HKCAlarmControlPanel, "async_write_ha_state", return_value=None
+    ) as write_state:
+        alarm_control_panel = HKCAlarmControlPanel(
+            PANEL_ID,
+            build_view(),
+            mock_alarm_coordinator := get_mock_alarm_coordinator(),
+            False,
+        )
+        alarm_control_panel.hass = get_mock_hass()
+        mock_alarm_coordinator.status_by_user = {"1234": mock_panel_status_disarmed}
+        alarm_control_panel._handle_coordinator_update()
+        alarm_control_panel._handle_coordinator_update()
+        assert write_state.call_count == 1
+
+        armed_status = {
+            "blocks": [{**mock_panel_status_disarmed["blocks"][0], "armState": 3}]
+        }
+        mock_alarm_coordinator.status_by_user = {"1234": armed_status}
+        alarm_control_panel._handle_coordinator_update()
+        assert write_state.call_count == 2
+        assert alarm_control_panel.alarm_state == AlarmControlPanelState.ARMED_AWAY
+
+
+@pytest.mark.asyncio
+async def test_panel_clock_change_skips_state_write():
+    with patch.object(
+        HKCAlarmControlPanel, "async_write_ha_state", return_value=None
+    ) as write_state:
+        alarm_control_panel = HKCAlarmControlPanel(
+            PANEL_ID,
+            build_view(),
+            mock_alarm_coordinator := get_mock_alarm_coordinator(),
+            False,
+        )
+        alarm_control_panel.hass = get_mock_hass()
+        mock_alarm_coordinator.status_by_user = {"1234": mock_panel_status_disarmed}
+        alarm_control_panel._handle_coordinator_update()
+        mock_alarm_coordinator.panel_data = {
+            **mock_alarm_coordinator.panel_data,
+            "display": "Mon 12 May 20:56",
+            "blink": "0000000000000000",
+        }
+        alarm_control_panel._handle_coordinator_update()
+
+        assert write_state.call_count == 1
+        assert "Display" not in alarm_control_panel.extra_state_attributes
+
+
+@pytest.mark.asyncio
+async def test_arm_command_polls_until_panel_confirms():
+    hkc_alarm = get_mock_hkc_alarm()
+    mock_alarm_coordinator = get_mock_alarm_coordinator(hkc_alarm)
+    mock_alarm_coordinator.status_by_user = {"1234": mock_panel_status_disarmed}
+    armed_status = {"blocks": [{**mock_panel_status_disarmed["blocks"][0], "armState": 3}]}
+    refreshes = []
+
+    async def refresh_statuses(user_codes):
+        refreshes.append(user_codes)
+        if len(refreshes) == 2:
+            mock_alarm_coordinator.status_by_user = {"1234": armed_status}
+
+    mock_alarm_coordinator.async_refresh_statuses = refresh_statuses
+
+    with patch.object(
+        HKCAlarmControlPanel, "async_write_ha_state", return_value=None
+    ), patch_confirm_clock() as sleep:
+        alarm_control_panel = HKCAlarmControlPanel(
+            PANEL_ID,
+            build_view(),
+            mock_alarm_coordinator,
+            False,
+        )
+        alarm_control_panel.hass = get_mock_hass()
+        await alarm_control_panel.async_alarm_arm_away()
+
+    assert refreshes == [{"1234"}, {"1234"}]
+    assert [call.args[0] for call in sleep.await_args_list] == [1, 2]
+    attributes = alarm_control_panel.extra_state_attributes
+    assert attributes["Last Command Confirmed"] is True
+    assert attributes["Last Command Confirmation Latency"] >= 0
+
+
+@pytest.mark.asyncio
+async def test_arm_command_gives_up_when_panel_never_confirms():
+    hkc_alarm = get_mock_hkc_alarm()
+    mock_alarm_coordinator = get_mock_alarm_coordinator(hkc_alarm)
+    mock_alarm_coordinator.status_by_user = {"1234": mock_panel_status_disarmed}
+    mock_alarm_coordinator.async_refresh_statuses = AsyncMock()
+
+    with patch.object(
+        HKCAlarmControlPanel, "async_write_ha_state", return_value=None
+    ), patch_confirm_clock() as sleep:
+        alarm_control_panel = HKCAlarmControlPanel(
+            PANEL_ID,
+            build_view(),
+            mock_alarm_coordinator,
+            False,
+        )
+        alarm_control_panel.hass = get_mock_hass()
+        await alarm_control_panel.async_alarm_arm_away()
+
+    assert sum(call.args[0] for call in sleep.await_args_list) >= 30
+    attributes = alarm_control_panel.extra_state_attributes
+    assert attributes["Last Command Confirmed"] is False
+    assert "Last Command Confirmation Latency" not in attributes
@@ -0,0 +1,56 @@
+from custom_components.hkc_alarm.circuit_breaker import (
+    STATE_CLOSED,
+    STATE_HALF_OPEN,
+    STATE_OPEN,
+    HKCCircuitBreaker,
+)
+
+
+def test_breaker_opens_after_threshold_and_backs_off_exponentially():
+    breaker = HKCCircuitBreaker(failure_threshold=2, base_backoff=10, max_backoff=25, jitter=0)
+
+    assert breaker.record_failure() is False
+    assert breaker.record_failure() is True
+    assert breaker.state == STATE_OPEN
+    assert breaker.allow_request() is False
+    assert 9 < breaker.retry_in <= 10
+
+    breaker.retry_at = 0
+    assert breaker.allow_request() is True
+    assert breaker.state == STATE_HALF_OPEN
+    # only one probe is let through
+    assert breaker.allow_request() is False
+
+    assert breaker.record_failure() is False
+    assert 19 < breaker.retry_in <= 20
+
+    breaker.retry_at = 0
+    breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.retry_in <= 25
+
+
+def test_breaker_success_closes_and_resets():
+    breaker = HKCCircuitBreaker(failure_threshold=1, jitter=0)
+    breaker.record_failure()
+    breaker.retry_at = 0
+    breaker.allow_request()
+
+    assert breaker.record_success() is True
+    assert breaker.state == STATE_CLOSED
+    assert breaker.failures == 0
+    assert breaker.record_success() is False
+
+
+def test_abandoned_probe_lets_the_next_request_probe():
+    breaker = HKCCircuitBreaker(failure_threshold=1, jitter=0)
+    breaker.record_failure()
+    breaker.retry_at = 0
+    assert breaker.allow_request() is True
+
+    breaker.abandon_probe()
+
+    assert breaker.state == STATE_OPEN
+    assert breaker.trips == 1
+    assert breaker.allow_request() is True
+    assert breaker.state == STATE_HALF_OPEN
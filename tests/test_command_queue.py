@@ -0,0 +1,133 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from custom_components.hkc_alarm.command_queue import HKCCommandQueue
+from .mock_common import patch_confirm_clock
+
+
+@pytest.mark.asyncio
+async def test_commands_run_in_order_and_duplicates_are_coalesced():
+    queue = HKCCommandQueue(MagicMock())
+    sent = []
+
+    def command(name):
+        async def send():
+            sent.append(name)
+            await asyncio.sleep(0)
+            return {"resultCode": 5, "name": name}
+
+        return send
+
+    results = await asyncio.gather(
+        queue.async_send(("arm_fullset", 1, None), command("block 1")),
+        queue.async_send(("arm_fullset", 2, None), command("block 2")),
+        queue.async_send(("arm_fullset", 1, None), command("block 1 again")),
+    )
+
+    assert sent == ["block 1", "block 2"]
+    assert [result["name"] for result in results] == ["block 1", "block 2", "block 1"]
+
+
+@pytest.mark.asyncio
+async def test_coalesced_callers_share_a_failure():
+    queue = HKCCommandQueue(MagicMock())
+
+    async def send():
+        await asyncio.sleep(0)
+        raise RuntimeError("cloud down")
+
+    results = await asyncio.gather(
+        queue.async_send("disarm", send),
+        queue.async_send("disarm", send),
+        return_exceptions=True,
+    )
+
+    assert [type(result) for result in results] == [RuntimeError, RuntimeError]
+
+
+@pytest.mark.asyncio
+async def test_burst_is_confirmed_by_shared_refreshes():
+    coordinator = MagicMock()
+    state = {"block 1": False, "block 2": False}
+
+    async def refresh_statuses(user_codes):
+        state["block 1"] = True
+        if coordinator.async_refresh_statuses.await_count == 2:
+            state["block 2"] = True
+
+    coordinator.async_refresh_statuses = AsyncMock(side_effect=refresh_statuses)
+    queue = HKCCommandQueue(coordinator)
+
+    with patch_confirm_clock():
+        confirmed = await asyncio.gather(
+            queue.async_confirm(lambda: state["block 1"], ["1234"]),
+            queue.async_confirm(lambda: state["block 2"], ["5678"]),
+            queue.async_confirm(lambda: False, ["1234"]),
+        )
+
+    assert confirmed == [True, True, False]
+    # one refresh per round for all three commands, until the last times out
+    assert coordinator.async_refresh_statuses.await_count == 8
+    # each round only fetches the statuses of the users still waiting
+    refreshed = coordinator.async_refresh_statuses.await_args_list
+    assert [call.args[0] for call in refreshed[:3]] == [
+        {"1234", "5678"},
+        {"1234", "5678"},
+        {"1234"},
+    ]
+
+
+@pytest.mark.asyncio
+async def test_slow_refreshes_count_towards_the_timeout():
+    coordinator = MagicMock()
+    queue = HKCCommandQueue(coordinator)
+
+    with patch_confirm_clock() as sleep:
+
+        async def slow_refresh(user_codes):
+            await sleep(10)
+
+        coordinator.async_refresh_statuses = AsyncMock(side_effect=slow_refresh)
+        confirmed = await queue.async_confirm(lambda: False, ["1234"])
+
+    assert confirmed is False
+    # 1 s + 10 s, 2 s + 10 s, then the 7 s left + 10 s puts it past 30 s
+    assert coordinator.async_refresh_statuses.await_count == 3
+
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_does_not_fail_the_others():
+    coordinator = MagicMock()
+    state = {"confirmed": False}
+
+    async def refresh_statuses(user_codes):
+        if coordinator.async_refresh_statuses.await_count == 2:
+            state["confirmed"] = True
+
+    coordinator.async_refresh_statuses = AsyncMock(side_effect=refresh_statuses)
+    queue = HKCCommandQueue(coordinator)
+
+    with patch_confirm_clock():
+        first = asyncio.create_task(queue.async_confirm(lambda: False, ["1234"]))
+        second = asyncio.create_task(
+            queue.async_confirm(lambda: state["confirmed"], ["1234"])
+        )
+        await asyncio.sleep(0)
+        first.cancel()
+
+        assert await second is True
+        with pytest.raises(asyncio.CancelledError):
+            await first
+
+        # Once nobody waits, the shared loop stops
+        third = asyncio.create_task(queue.async_confirm(lambda: False, ["1234"]))
+        await asyncio.sleep(0)
+        third.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await third
+        await asyncio.sleep(0)
+
+    assert coordinator.async_refresh_statuses.await_count == 2
+    assert queue._confirm_task is None
@@ -1,9 +1,20 @@
+import asyncio
+from datetime import datetime, timezone
+
 import pytest
 
 from custom_components.hkc_alarm.helpers import (
     InvalidUserCodeError,
+    async_gather_limited,
     build_alarm_views,
+    build_input_index,
+    build_input_topology,
+    build_metadata_signature,
+    diff_input_index,
+    find_inputs_source,
     normalize_configured_user_codes,
+    parse_input_timestamp,
+    parse_panel_time,
     serialize_user_codes,
 )
 
@@ -105,3 +116,139 @@ def test_build_alarm_views_prefers_entity_map_blocks():
             "kind": "block",
         }
     ]
+
+
+@pytest.mark.asyncio
+async def test_async_gather_limited_preserves_order_and_caps_concurrency():
+    in_flight = 0
+    peak = 0
+
+    async def job(value):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0)
+        in_flight -= 1
+        return value
+
+    results = await async_gather_limited(
+        [lambda value=value: job(value) for value in range(6)],
+        2,
+    )
+
+    assert results == [0, 1, 2, 3, 4, 5]
+    assert peak == 2
+
+
+def test_build_input_topology_keeps_entity_fields_only():
+    topology = build_input_topology(
+        {
+            "1234": [
+                {
+                    "inputId": "1",
+                    "description": "Front Door",
+                    "timestamp": "2023-10-25T08:00:00Z",
+                    "inputState": 1,
+                }
+            ]
+        }
+    )
+
+    assert topology == {"1234": [{"inputId": "1", "description": "Front Door"}]}
+
+
+def test_build_metadata_signature_tracks_entity_topology():
+    views = build_alarm_views(["1234"])
+    cached = {
+        "views": views,
+        "entity_map": None,
+        "input_topology": {"1234": [{"inputId": "1", "description": "Front Door"}]},
+    }
+    fresh = {
+        "views": views,
+        "entity_map": None,
+        "input_topology": {"1234": [{"inputId": 1, "description": "Front Door"}]},
+    }
+    renamed = {
+        **fresh,
+        "input_topology": {"1234": [{"inputId": "1", "description": "Back Door"}]},
+    }
+
+    assert build_metadata_signature(cached) == build_metadata_signature(fresh)
+    assert build_metadata_signature(cached) != build_metadata_signature(renamed)
+
+
+def test_build_input_index_keys_inputs_by_user_and_string_id():
+    front_door = {"inputId": 1, "description": "Front Door"}
+    back_door = {"input": "2", "description": "Back Door"}
+
+    index = build_input_index({"1234": [front_door, back_door, {"description": "?"}]})
+
+    assert index == {"1234": {"1": front_door, "2": back_door}}
+
+
+def test_parse_input_timestamp_accepts_both_formats_as_utc():
+    expected = datetime(2024, 5, 12, 20, 55, 1, tzinfo=timezone.utc)
+
+    assert parse_input_timestamp("2024-05-12T20:55:01Z") == expected
+    assert parse_input_timestamp("2024-05-12T20:55:01") == expected
+    assert parse_input_timestamp("2024-05-12T20:55:01Z") is parse_input_timestamp(
+        "2024-05-12T20:55:01Z"
+    )
+
+
+@pytest.mark.parametrize(
+    "timestamp",
+    ["invalid_timestamp", "2024-13-12T20:55:01Z", "2024-05-12 20:55:01", "2024-05-12T20:55:01+01:00", None],
+)
+def test_parse_input_timestamp_rejects_other_values(timestamp):
+    assert parse_input_timestamp(timestamp) is None
+
+
+def test_parse_panel_time():
+    assert parse_panel_time("Sun 12 May 20:55", 2024) == datetime(
+        2024, 5, 12, 20, 55, tzinfo=timezone.utc
+    )
+    assert parse_panel_time("Thu 29 Feb 07:05", 2024) == datetime(
+        2024, 2, 29, 7, 5, tzinfo=timezone.utc
+    )
+    assert parse_panel_time("SYSTEM ARMED", 2024) is None
+    assert parse_panel_time("Sun 31 Feb 20:55", 2024) is None
+
+
+def test_diff_input_index_reports_changed_added_and_removed_inputs():
+    previous = {
+        "1234": {"1": {"inputState": 0}, "2": {"inputState": 0}, "3": {"inputState": 0}},
+        "5678": {"1": {"inputState": 0}},
+    }
+    current = {
+        "1234": {"1": {"inputState": 0}, "2": {"inputState": 1}, "4": {"inputState": 0}},
+    }
+
+    assert diff_input_index(previous, current) == {
+        ("1234", "2"),
+        ("1234", "3"),
+        ("1234", "4"),
+        ("5678", "1"),
+    }
+    assert diff_input_index(current, current) == set()
+
+
+def test_find_inputs_source_requires_an_exact_local_split():
+    hall = {"inputId": "1", "visibleUserCodes": [1111, 2222]}
+    garage = {"inputId": "2", "visibleUserCodes": [1111]}
+    shed = {"inputId": "3", "visibleUserCodes": [2222]}
+
+    assert find_inputs_source({"1111": [hall, garage], "2222": [hall]}) == "1111"
+    # neither user sees everything
+    assert find_inputs_source({"1111": [hall, garage], "2222": [hall, shed]}) is None
+    assert (
+        find_inputs_source({"1111": [{"inputId": "1"}], "2222": [{"inputId": "1"}]})
+        is None
+    )
+    # same zones, but the second user sees the hall inhibited
+    inhibited_hall = {**hall, "inputState": 5}
+    assert (
+        find_inputs_source({"1111": [hall, garage], "2222": [inhibited_hall]})
+        is None
+    )
@@ -0,0 +1,133 @@
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import aiohttp
+import pytest
+
+from custom_components.hkc_alarm.const import REQUEST_RETRIES
+from custom_components.hkc_alarm.hkc_client import HKCAsyncClient
+
+
+class FakeResponse:
+    def __init__(self, payload):
+        self._payload = payload
+
+    async def __aenter__(self):
+        if isinstance(self._payload, Exception):
+            raise self._payload
+        return self
+
+    async def __aexit__(self, *args):
+        return False
+
+    def raise_for_status(self):
+        return None
+
+    async def json(self, content_type=None):
+        return self._payload
+
+
+class FakeSession:
+    def __init__(self, *payloads):
+        self._payloads = list(payloads)
+        self.requests = []
+
+    def post(self, url, json=None, headers=None, timeout=None):
+        self.requests.append((url, json))
+        return FakeResponse(self._payloads.pop(0))
+
+
+def build_identity():
+    return SimpleNamespace(
+        panel_id=100000,
+        base_url="https://hkc.example",
+        headers={"accept": "application/json"},
+        hardware_id="hardware",
+        device_id="device",
+        panel_password="secret",
+        user_code=1234,
+    )
+
+
+@pytest.mark.asyncio
+async def test_get_all_inputs_follows_pagination():
+    session = FakeSession(
+        {"inputs": [{"input": 1}, {"input": 2}], "moreInputs": True},
+        {"inputs": [{"input": 3}], "moreInputs": False},
+    )
+    client = HKCAsyncClient(session, build_identity())
+
+    inputs = await client.async_get_all_inputs("5678")
+
+    assert inputs == [{"input": 1}, {"input": 2}, {"input": 3}]
+    assert [request[1]["firstInput"] for request in session.requests] == [1, 3]
+    assert session.requests[0][0] == "https://hkc.example/AppV3/Device/Inputs"
+    assert session.requests[0][1]["userCode"] == "5678"
+
+
+@pytest.mark.asyncio
+async def test_send_command_targets_zero_based_block():
+    session = FakeSession({"resultCode": 5})
+    client = HKCAsyncClient(session, build_identity())
+
+    result = await client.async_send_command("arm_partset_b", "5678", 2)
+
+    assert result == {"resultCode": 5}
+    url, payload = session.requests[0]
+    assert url == "https://hkc.example/AppV3/Device/Arming"
+    assert payload == {
+        "hardwareId": "hardware",
+        "deviceId": "device",
+        "devicePassword": "secret",
+        "userCode": "5678",
+        "command": 2,
+        "block": 1,
+        "inhibit": False,
+    }
+
+
+@pytest.mark.asyncio
+async def test_status_defaults_to_primary_user():
+    session = FakeSession({"blocks": []})
+    client = HKCAsyncClient(session, build_identity())
+
+    await client.async_get_system_status()
+
+    assert session.requests[0][1]["userCode"] == "1234"
+    assert session.requests[0][1]["includeDescriptions"] is True
+
+
+def response_error(status):
+    return aiohttp.ClientResponseError(MagicMock(), (), status=status)
+
+
+@pytest.mark.asyncio
+async def test_transient_failures_are_retried():
+    session = FakeSession(
+        aiohttp.ClientConnectionError("reset"), response_error(503), {"blocks": []}
+    )
+    client = HKCAsyncClient(session, build_identity())
+    sleep = AsyncMock()
+
+    with patch("custom_components.hkc_alarm.hkc_client.asyncio.sleep", new=sleep):
+        assert await client.async_get_system_status() == {"blocks": []}
+
+    assert len(session.requests) == 3
+    assert [call.args[0] for call in sleep.await_args_list] == [1, 2]
+
+
+@pytest.mark.asyncio
+async def test_retries_are_bounded_and_skip_client_errors():
+    session = FakeSession(*[response_error(503)] * (REQUEST_RETRIES + 1))
+    client = HKCAsyncClient(session, build_identity())
+
+    with patch("custom_components.hkc_alarm.hkc_client.asyncio.sleep", new=AsyncMock()):
+        with pytest.raises(aiohttp.ClientResponseError):
+            await client.async_get_panel()
+        assert len(session.requests) == REQUEST_RETRIES + 1
+
+        session = FakeSession(response_error(429))
+        client = HKCAsyncClient(session, build_identity())
+        with pytest.raises(aiohttp.ClientResponseError):
+            await client.async_get_panel()
+    assert len(session.requests) == 1
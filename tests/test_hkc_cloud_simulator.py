@@ -0,0 +1,244 @@
+import asyncio
+from unittest.mock import patch
+
+import aiohttp
+import pytest
+from homeassistant.components.alarm_control_panel import AlarmControlPanelState
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant import loader
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_test_home_assistant,
+)
+
+from custom_components.hkc_alarm.const import (
+    CONF_ADDITIONAL_USER_CODES,
+    CONF_BASE_URL,
+    CONF_UPDATE_INTERVAL,
+    DOMAIN,
+    REQUEST_RETRIES,
+)
+from custom_components.hkc_alarm.diagnostics import async_get_config_entry_diagnostics
+from custom_components.hkc_alarm.hkc_client import HKCAsyncClient
+from custom_components.hkc_alarm.pyhkc_compat import build_hkc_alarm
+from custom_components.hkc_alarm.scheduler import HKCPanelScheduler
+from .hkc_cloud_simulator import HKCCloudSimulator, SimulatedPanel
+
+
+def build_session(*args, **kwargs):
+    # aiodns leaves a shutdown thread behind; the simulator is on localhost anyway
+    return aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(resolver=aiohttp.ThreadedResolver())
+    )
+
+
+def add_entry(hass, simulator, additional_user_codes=()):
+    hass.data.pop(loader.DATA_CUSTOM_COMPONENTS, None)
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        version=3,
+        minor_version=1,
+        unique_id=str(simulator.panel.panel_id),
+        data={
+            "panel_id": str(simulator.panel.panel_id),
+            "panel_password": simulator.panel.panel_password,
+            "user_code": "1234",
+            CONF_BASE_URL: simulator.base_url,
+        },
+        options={
+            CONF_UPDATE_INTERVAL: 60,
+            CONF_ADDITIONAL_USER_CODES: list(additional_user_codes),
+        },
+    )
+    entry.add_to_hass(hass)
+    return entry
+
+
+async def build_alarm(simulator, user_codes=("1234",)):
+    return await asyncio.to_thread(
+        build_hkc_alarm,
+        str(simulator.panel.panel_id),
+        simulator.panel.panel_password,
+        user_codes[0],
+        list(user_codes[1:]),
+        simulator.base_url,
+    )
+
+
+@pytest.mark.asyncio
+async def test_real_hkc_alarm_reads_simulated_panel(socket_enabled):
+    async with HKCCloudSimulator(
+        SimulatedPanel.build(user_codes=2, blocks=2, inputs=10), page_size=3
+    ) as simulator:
+        hkc_alarm = await build_alarm(simulator, ("1234", "1235"))
+
+        status = await asyncio.to_thread(hkc_alarm.get_system_status, user_code="1235")
+        inputs = await asyncio.to_thread(hkc_alarm.get_all_inputs, user_code="1235")
+
+    assert hkc_alarm.device_id == simulator.device_id
+    assert [block["userAllowed"] for block in status["blocks"]] == [False, True]
+    assert [input_data["input"] for input_data in inputs] == [2, 4, 6, 8, 10]
+    assert simulator.request_count("/AppV3/Device/Inputs") == 2
+
+
+@pytest.mark.asyncio
+async def test_async_client_sees_scripted_changes_and_failures(socket_enabled):
+    async with HKCCloudSimulator() as simulator:
+        hkc_alarm = await build_alarm(simulator)
+        async with build_session() as session:
+            client = HKCAsyncClient(session, hkc_alarm)
+
+            simulator.set_input_state(3, 1)
+            inputs = await client.async_get_all_inputs()
+            assert inputs[2]["inputState"] == 1
+
+            simulator.queue_command_results(4)
+            assert (await client.async_send_command("arm_fullset", "1234"))["resultCode"] == 4
+            assert (await client.async_send_command("arm_fullset", "1234"))["resultCode"] == 5
+            status = await client.async_get_system_status()
+            assert status["blocks"][0]["armState"] == 3
+
+            simulator.outage = True
+            keypad_requests = simulator.request_count("/AppV3/Device/RemoteKeypad")
+            with patch(
+                "custom_components.hkc_alarm.hkc_client.REQUEST_RETRY_DELAY", 0
+            ), pytest.raises(aiohttp.ClientResponseError) as outage:
+                await client.async_get_panel()
+            assert outage.value.status == 503
+            # pyhkc-style retries before giving up
+            assert simulator.request_count("/AppV3/Device/RemoteKeypad") == (
+                keypad_requests + REQUEST_RETRIES + 1
+            )
+
+            simulator.outage = False
+            simulator.rate_limit = 1
+            await client.async_get_panel()
+            with pytest.raises(aiohttp.ClientResponseError) as rate_limited:
+                await client.async_get_panel()
+            assert rate_limited.value.status == 429
+
+
+@pytest.mark.asyncio
+async def test_entry_setup_and_arming_against_simulator(socket_enabled):
+    async with HKCCloudSimulator(
+        SimulatedPanel.build(user_codes=1, blocks=1, inputs=4)
+    ) as simulator, async_test_home_assistant() as hass:
+        entry = add_entry(hass, simulator)
+
+        with patch(
+            "custom_components.hkc_alarm.hkc_client.async_create_clientsession",
+            build_session,
+        ):
+            assert await hass.config_entries.async_setup(entry.entry_id)
+            await hass.async_block_till_done()
+        assert entry.state is ConfigEntryState.LOADED
+        # four inputs plus the cloud connection diagnostic sensor
+        assert len(hass.states.async_entity_ids("sensor")) == 5
+        assert hass.states.get("sensor.hkc_alarm_system_cloud_connection").state == "closed"
+
+        simulator.arm_delay = 0.5
+        status_requests = simulator.request_count("/AppV3/Device/Status")
+        keypad_requests = simulator.request_count("/AppV3/Device/RemoteKeypad")
+        input_requests = simulator.request_count("/AppV3/Device/Inputs")
+        with patch(
+            "custom_components.hkc_alarm.command_queue.COMMAND_CONFIRM_INITIAL_DELAY",
+            0.2,
+        ):
+            await hass.services.async_call(
+                "alarm_control_panel",
+                "alarm_arm_away",
+                {"entity_id": "alarm_control_panel.hkc_alarm_system"},
+                blocking=True,
+            )
+
+        state = hass.states.get("alarm_control_panel.hkc_alarm_system")
+        assert state.state == AlarmControlPanelState.ARMED_AWAY
+        assert state.attributes["Last Command Confirmed"] is True
+        assert simulator.request_count("/AppV3/Device/Arming") == 1
+        # Confirming only polls the status; keypad and inputs wait for the schedule
+        assert simulator.request_count("/AppV3/Device/Status") > status_requests
+        assert simulator.request_count("/AppV3/Device/RemoteKeypad") == keypad_requests
+        assert simulator.request_count("/AppV3/Device/Inputs") == input_requests
+
+        diagnostics = await async_get_config_entry_diagnostics(hass, entry)
+        assert diagnostics["entry"]["data"]["panel_password"] == "**REDACTED**"
+        assert diagnostics["metrics"]["command"]["count"] == 1
+        assert diagnostics["metrics"]["refresh"]["count"] >= 1
+        assert diagnostics["metrics"]["sensor_entity_update"]["count"] >= 4
+
+        assert await hass.config_entries.async_unload(entry.entry_id)
+        await hass.async_stop(force=True)
+
+
+@pytest.mark.asyncio
+async def test_cold_start_reuses_setup_statuses_for_first_refresh(socket_enabled):
+    async with HKCCloudSimulator(
+        SimulatedPanel.build(user_codes=2, blocks=2, inputs=4)
+    ) as simulator, async_test_home_assistant() as hass:
+        entry = add_entry(hass, simulator, ["1235"])
+
+        with patch(
+            "custom_components.hkc_alarm.hkc_client.async_create_clientsession",
+            build_session,
+        ), patch.object(
+            HKCPanelScheduler,
+            "_status_job",
+            autospec=True,
+            side_effect=HKCPanelScheduler._status_job,
+        ) as status_job:
+            assert await hass.config_entries.async_setup(entry.entry_id)
+            await hass.async_block_till_done()
+
+        assert entry.state is ConfigEntryState.LOADED
+        # The statuses fetched with the panel metadata feed the first refresh
+        status_job.assert_not_called()
+        assert hass.data[DOMAIN][entry.entry_id]["scheduler"].last_update is not None
+        assert await hass.config_entries.async_unload(entry.entry_id)
+        await hass.async_stop(force=True)
+
+
+@pytest.mark.asyncio
+async def test_warm_start_does_not_wait_for_the_cloud(socket_enabled):
+    async with HKCCloudSimulator(
+        SimulatedPanel.build(user_codes=1, blocks=1, inputs=4)
+    ) as simulator, async_test_home_assistant() as hass:
+        entry = add_entry(hass, simulator)
+
+        with patch(
+            "custom_components.hkc_alarm.hkc_client.async_create_clientsession",
+            build_session,
+        ):
+            # The first setup fills the metadata cache
+            assert await hass.config_entries.async_setup(entry.entry_id)
+            await hass.async_block_till_done()
+            assert await hass.config_entries.async_unload(entry.entry_id)
+
+            simulator.hold()
+            simulator.requests.clear()
+            assert await asyncio.wait_for(
+                hass.config_entries.async_setup(entry.entry_id), timeout=5
+            )
+            assert entry.state is ConfigEntryState.LOADED
+            assert len(hass.states.async_entity_ids("sensor")) == 5
+            scheduler = hass.data[DOMAIN][entry.entry_id]["scheduler"]
+            # The HKCAlarm is only built, and logged in, by the first refresh
+            assert scheduler.hkc_alarm is None
+            assert scheduler.client is None
+            assert (
+                hass.states.get("alarm_control_panel.hkc_alarm_system").state
+                == "unavailable"
+            )
+
+            # The login and first refresh complete in the background
+            simulator.release()
+            await hass.async_block_till_done(wait_background_tasks=True)
+
+        assert scheduler.hkc_alarm.device_id == simulator.device_id
+        assert scheduler.client is not None
+        assert (
+            hass.states.get("alarm_control_panel.hkc_alarm_system").state
+            == AlarmControlPanelState.DISARMED
+        )
+        assert simulator.request_count("/AppV3/App/GetDeviceId") == 1
+        assert await hass.config_entries.async_remove(entry.entry_id)
+        await hass.async_stop(force=True)
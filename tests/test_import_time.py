@@ -0,0 +1,64 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+# Generous enough for slow CI machines; the package imports in ~40 ms locally
+IMPORT_TIME_BUDGET_MS = 200
+# Only needed once a panel is logged in, so never loaded at import time
+LAZY_DEPENDENCIES = ("pyhkc", "tabulate", "tenacity", "pytz")
+PACKAGE = "custom_components.hkc_alarm"
+
+# Home Assistant has loaded these before any integration, so their cost is
+# not the integration's
+IMPORT_SCRIPT = f"""
+import homeassistant.components.alarm_control_panel
+import homeassistant.components.diagnostics
+import homeassistant.components.sensor
+import homeassistant.config_entries
+import homeassistant.helpers.aiohttp_client
+import homeassistant.helpers.config_validation
+import homeassistant.helpers.device_registry
+import homeassistant.helpers.storage
+import homeassistant.helpers.update_coordinator
+
+import {PACKAGE}
+import {PACKAGE}.alarm_control_panel
+import {PACKAGE}.config_flow
+import {PACKAGE}.diagnostics
+import {PACKAGE}.sensor
+
+import sys
+print(",".join(name for name in {LAZY_DEPENDENCIES!r} if name in sys.modules))
+"""
+
+
+def _import_package():
+    root = Path(__file__).resolve().parent.parent
+    env = {**os.environ, "PYTHONPATH": str(root)}
+    return subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", IMPORT_SCRIPT],
+        capture_output=True,
+        check=True,
+        cwd=root,
+        env=env,
+        text=True,
+    )
+
+
+def test_package_imports_within_budget_without_heavy_dependencies():
+    # The first run may still be writing bytecode caches
+    _import_package()
+    result = _import_package()
+
+    assert result.stdout.strip() == ""
+    package_time_us = 0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line.split("|")
+        # Nested imports are indented and already in their parent's total
+        name = name[1:].rstrip()
+        if name == PACKAGE or name.startswith(f"{PACKAGE}."):
+            package_time_us += int(cumulative)
+    assert 0 < package_time_us < IMPORT_TIME_BUDGET_MS * 1000
@@ -0,0 +1,57 @@
+import asyncio
+
+import pytest
+
+from custom_components.hkc_alarm import async_fetch_panel_metadata
+from .mock_common import get_mock_hass, get_mock_hkc_alarm
+
+
+def get_overlap_tracking_hass():
+    hass = get_mock_hass()
+    hass.data = {}
+    hass.in_flight = 0
+    hass.peak = 0
+
+    async def async_add_executor_job(func, *args):
+        hass.in_flight += 1
+        hass.peak = max(hass.peak, hass.in_flight)
+        await asyncio.sleep(0)
+        hass.in_flight -= 1
+        return func(*args)
+
+    hass.async_add_executor_job = async_add_executor_job
+    return hass
+
+
+@pytest.mark.asyncio
+async def test_panel_metadata_is_fetched_in_parallel():
+    hass = get_overlap_tracking_hass()
+    hkc_alarm = get_mock_hkc_alarm()
+
+    metadata, statuses = await async_fetch_panel_metadata(
+        hass, hkc_alarm, ["1234", "5678"]
+    )
+
+    assert hass.peak > 1
+    assert set(statuses) == {"1234", "5678"}
+    assert set(metadata["temporary_user_by_code"]) == {"1234", "5678"}
+    assert sorted(call for call in hkc_alarm.fetch_calls if call[0] == "status") == [
+        ("status", "1234"),
+        ("status", "5678"),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_panel_metadata_reuses_known_statuses():
+    hass = get_overlap_tracking_hass()
+    hkc_alarm = get_mock_hkc_alarm()
+    known_status = {"blocks": [], "userOptions": {}}
+
+    _, statuses = await async_fetch_panel_metadata(
+        hass, hkc_alarm, ["1234", "5678"], known_statuses={"1234": known_status}
+    )
+
+    assert statuses["1234"] is known_status
+    assert [call for call in hkc_alarm.fetch_calls if call[0] == "status"] == [
+        ("status", "5678")
+    ]
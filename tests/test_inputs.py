@@ -0,0 +1,43 @@
+from custom_components.hkc_alarm.helpers import build_input_index, input_identifier
+from custom_components.hkc_alarm.inputs import HKCInput, HKCInputPool
+
+PAYLOAD = {
+    "inputId": "3",
+    "input": 3,
+    "description": "Kitchen",
+    "inputState": 0,
+    "inputType": 1,
+    "timestamp": "2024-05-12T20:55:00Z",
+    "visibleUserCodes": [1234, 5678],
+    "areaName": "not read by the integration",
+}
+
+
+def test_input_record_reads_like_the_payload():
+    record = HKCInput.from_payload(PAYLOAD)
+
+    assert record["description"] == "Kitchen"
+    assert record.get("cameraId") is None
+    assert "cameraId" not in record
+    assert "areaName" not in record
+    assert record["visibleUserCodes"] == (1234, 5678)
+    assert input_identifier(record) == "3"
+    assert record == {key: value for key, value in PAYLOAD.items() if key != "areaName"} | {
+        "visibleUserCodes": (1234, 5678)
+    }
+    assert not hasattr(record, "__dict__")
+    assert HKCInput.from_payload(record) is record
+
+
+def test_pool_shares_records_between_users_and_refreshes():
+    pool = HKCInputPool()
+    changed = {**PAYLOAD, "inputState": 1}
+
+    first = pool.intern({"1234": [dict(PAYLOAD)], "5678": [dict(PAYLOAD)]})
+    second = pool.intern({"1234": [dict(PAYLOAD)], "5678": [changed]})
+
+    assert first["1234"][0] is first["5678"][0]
+    assert second["1234"][0] is first["1234"][0]
+    assert second["5678"][0] != second["1234"][0]
+    assert second["5678"][0]["inputState"] == 1
+    assert build_input_index(second)["5678"]["3"] is second["5678"][0]
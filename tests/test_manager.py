@@ -0,0 +1,99 @@
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from custom_components.hkc_alarm.const import LOGIN_HANDOFF_TTL, POLL_SPREAD
+from custom_components.hkc_alarm.manager import HKCConnectionManager, credential_key
+from .mock_common import get_mock_hass, get_mock_hkc_alarm
+
+
+def test_panel_can_only_be_claimed_by_one_entry():
+    manager = HKCConnectionManager(get_mock_hass())
+
+    assert manager.async_claim_panel("entry_1", "100")
+    assert manager.async_claim_panel("entry_1", "100")
+    assert not manager.async_claim_panel("entry_2", "100")
+
+
+@pytest.mark.asyncio
+async def test_login_is_not_kept_across_setups():
+    manager = HKCConnectionManager(get_mock_hass())
+    build = MagicMock(side_effect=lambda: object())
+    credentials = credential_key("100", "secret", "1234")
+
+    first, _ = await manager.async_get_alarm("entry_1", "100", credentials, build)
+    await manager.async_release("entry_1")
+
+    # A reload logs in afresh, so a stale session does not survive it
+    assert (await manager.async_get_alarm("entry_1", "100", credentials, build))[0] is not first
+    assert build.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_config_flow_login_is_handed_to_setup_once():
+    manager = HKCConnectionManager(get_mock_hass())
+    build = MagicMock(side_effect=lambda: object())
+    credentials = credential_key("100", "secret", "1234")
+    flow_alarm = object()
+    manager.async_offer_login("100", credentials, flow_alarm, {"1234": {"userOptions": {}}})
+
+    hkc_alarm, statuses = await manager.async_get_alarm(
+        "entry_1", "100", credentials, build
+    )
+
+    assert hkc_alarm is flow_alarm
+    assert statuses == {"1234": {"userOptions": {}}}
+    build.assert_not_called()
+    assert (await manager.async_get_alarm("entry_1", "100", credentials, build))[1] == {}
+    build.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_login_handoff_needs_matching_credentials_and_expires():
+    manager = HKCConnectionManager(get_mock_hass())
+    build = MagicMock(side_effect=lambda: object())
+    credentials = credential_key("100", "secret", "1234")
+    manager.async_offer_login("100", credential_key("100", "other", "1234"), object(), {})
+    await manager.async_get_alarm("entry_1", "100", credentials, build)
+
+    manager.async_offer_login("200", credentials, object(), {})
+    with patch(
+        "custom_components.hkc_alarm.manager.time.monotonic",
+        return_value=time.monotonic() + LOGIN_HANDOFF_TTL + 1,
+    ):
+        await manager.async_get_alarm("entry_2", "200", credentials, build)
+
+    assert build.call_count == 2
+
+
+def test_poll_offsets_use_distinct_slots():
+    manager = HKCConnectionManager(get_mock_hass())
+
+    offsets = [manager.async_poll_offset(f"entry_{i}", 60) for i in range(3)]
+
+    assert offsets == [0, POLL_SPREAD, 2 * POLL_SPREAD]
+    assert manager.async_poll_offset("entry_1", 60) == POLL_SPREAD
+
+
+@pytest.mark.asyncio
+async def test_panels_share_one_session_until_the_last_is_released():
+    manager = HKCConnectionManager(get_mock_hass())
+    session = MagicMock(closed=False, close=AsyncMock())
+    hkc_alarm = get_mock_hkc_alarm()
+    for attribute in ("base_url", "headers", "hardware_id", "device_id", "panel_password", "user_code"):
+        setattr(hkc_alarm, attribute, None)
+
+    with patch(
+        "custom_components.hkc_alarm.manager.build_client_session",
+        return_value=session,
+    ) as build_session:
+        first = manager.async_get_client("entry_1", hkc_alarm)
+        second = manager.async_get_client("entry_2", hkc_alarm)
+
+    assert build_session.call_count == 1
+    assert first._session is second._session is session
+    await manager.async_release("entry_1")
+    session.close.assert_not_called()
+    await manager.async_release("entry_2")
+    session.close.assert_awaited_once()
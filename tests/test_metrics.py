@@ -0,0 +1,48 @@
+import pytest
+
+from custom_components.hkc_alarm.metrics import CallStats, HKCMetrics
+
+
+def test_call_stats_histogram_and_percentiles():
+    stats = CallStats()
+    for duration in (0.002, 0.02, 0.02, 0.3, 45):
+        stats.add(duration)
+
+    assert stats.count == 5
+    assert stats.max == 45
+    assert stats.percentile(0.5) == 0.05
+    assert stats.percentile(0.95) == 45
+    summary = stats.as_dict()
+    assert summary["histogram"]["le_0.005s"] == 1
+    assert summary["histogram"]["le_0.05s"] == 2
+    assert summary["histogram"]["inf"] == 1
+    assert summary["last_ms"] == 45000
+
+
+def test_timed_counts_errors_and_reraises():
+    metrics = HKCMetrics()
+
+    with metrics.timed("status"):
+        pass
+    with pytest.raises(RuntimeError):
+        with metrics.timed("status"):
+            raise RuntimeError
+
+    assert metrics.stats["status"].count == 2
+    assert metrics.stats["status"].errors == 1
+
+
+@pytest.mark.asyncio
+async def test_timed_job_and_combined():
+    metrics = HKCMetrics()
+
+    async def job():
+        return "done"
+
+    assert await metrics.timed_job("inputs", job)() == "done"
+    metrics.record("status", 0.5, ok=False)
+
+    combined = metrics.combined(("status", "inputs", "panel"))
+    assert combined.count == 2
+    assert combined.errors == 1
+    assert sum(combined.buckets) == 2
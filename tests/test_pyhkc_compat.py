@@ -0,0 +1,70 @@
+from unittest.mock import patch
+
+from custom_components.hkc_alarm import pyhkc_compat
+from custom_components.hkc_alarm.pyhkc_compat import (
+    build_block_alarm_command,
+    build_user_access_summary,
+    get_capabilities,
+    get_status_for_user,
+)
+from .mock_common import MockHKCAlarm, get_mock_hkc_alarm
+
+
+class LegacyHKCAlarm:
+    panel_id = "legacy"
+
+    def get_system_status(self):
+        return {"legacy": True}
+
+    def disarm(self):
+        return {"resultCode": 5}
+
+
+def test_capabilities_detect_multi_user_and_block_support():
+    capabilities = get_capabilities(get_mock_hkc_alarm())
+
+    assert capabilities.multi_user_status is True
+    assert capabilities.multi_user_inputs is True
+    assert capabilities.block_commands is True
+    assert capabilities.multi_user_block_commands is True
+    assert capabilities.entity_map is False
+    assert capabilities.temporary_user is False
+
+
+def test_capabilities_detect_legacy_client():
+    capabilities = get_capabilities(LegacyHKCAlarm())
+
+    assert capabilities.multi_user_status is False
+    assert capabilities.block_commands is False
+    assert get_status_for_user(LegacyHKCAlarm(), "1234") == {"legacy": True}
+
+
+def test_capabilities_are_probed_once_per_class():
+    pyhkc_compat._probe_capabilities.cache_clear()
+    with patch.object(
+        pyhkc_compat, "_supports_keyword", wraps=pyhkc_compat._supports_keyword
+    ) as supports_keyword:
+        first = get_capabilities(MockHKCAlarm())
+        calls = supports_keyword.call_count
+        get_status_for_user(MockHKCAlarm(), "1234")
+        build_block_alarm_command(MockHKCAlarm(), "disarm", "1234", "1234", 2)
+
+    assert get_capabilities(MockHKCAlarm()) is first
+    assert supports_keyword.call_count == calls
+
+
+def test_access_summary_treats_missing_user_allowed_as_denied():
+    status = {
+        "blocks": [
+            {"isEnabled": True, "armState": 0, "userAllowed": True},
+            {"isEnabled": True, "armState": 0},
+            {"isEnabled": False, "armState": 0, "userAllowed": True},
+        ],
+        "descriptions": {"block1": "House"},
+    }
+
+    summary = build_user_access_summary(["1234"], {"1234": status})[1234]
+
+    assert [block["block"] for block in summary["allowedBlocks"]] == [1]
+    assert [block["block"] for block in summary["deniedBlocks"]] == [2]
+    assert summary["allowedBlocks"][0]["description"] == "House"
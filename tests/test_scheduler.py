@@ -0,0 +1,457 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock
+
+import pytest
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_test_home_assistant,
+)
+
+from custom_components.hkc_alarm import HKCSensorCoordinator
+
+from custom_components.hkc_alarm.circuit_breaker import (
+    STATE_CLOSED,
+    STATE_HALF_OPEN,
+    STATE_OPEN,
+)
+from custom_components.hkc_alarm.const import (
+    BREAKER_FAILURE_THRESHOLD,
+    FAST_UPDATE_INTERVAL,
+    DOMAIN,
+    IDLE_BACKOFF_CYCLES,
+    MAX_CONCURRENT_REQUESTS,
+)
+from custom_components.hkc_alarm.scheduler import HKCPanelScheduler
+from .mock_common import get_mock_hass, get_mock_hkc_alarm
+
+
+class StubCoordinator:
+    def __init__(self):
+        self.async_handle_scheduler_refresh = MagicMock()
+        self.async_set_updated_data = MagicMock()
+        self.async_set_update_error = MagicMock()
+        self.async_update_listeners = MagicMock()
+
+    def build_data(self):
+        return "data"
+
+
+def build_scheduler(hkc_alarm, user_codes=("1234", "5678")):
+    scheduler = HKCPanelScheduler(get_mock_hass(), hkc_alarm, list(user_codes), 60)
+    alarm_coordinator = StubCoordinator()
+    sensor_coordinator = StubCoordinator()
+    scheduler.async_add_coordinator(alarm_coordinator)
+    scheduler.async_add_coordinator(sensor_coordinator)
+    return scheduler, alarm_coordinator, sensor_coordinator
+
+
+@pytest.mark.asyncio
+async def test_refresh_fetches_everything_once_and_pushes_to_other_coordinators():
+    hkc_alarm = get_mock_hkc_alarm()
+    scheduler, alarm_coordinator, sensor_coordinator = build_scheduler(hkc_alarm)
+
+    await scheduler.async_refresh(requester=alarm_coordinator)
+
+    assert sorted(hkc_alarm.fetch_calls, key=str) == sorted(
+        [
+            ("status", "1234"),
+            ("status", "5678"),
+            ("panel", None),
+            ("inputs", "1234"),
+            ("inputs", "5678"),
+        ],
+        key=str,
+    )
+    assert set(scheduler.inputs_by_user) == {"1234", "5678"}
+    alarm_coordinator.async_handle_scheduler_refresh.assert_called_once()
+    sensor_coordinator.async_handle_scheduler_refresh.assert_called_once()
+    alarm_coordinator.async_set_updated_data.assert_not_called()
+    sensor_coordinator.async_set_updated_data.assert_called_once_with("data")
+
+
+@pytest.mark.asyncio
+async def test_first_refresh_builds_the_alarm_and_retries_a_failed_login():
+    hkc_alarm = get_mock_hkc_alarm()
+    build_alarm = MagicMock(side_effect=[RuntimeError("login failed"), hkc_alarm])
+    build_client = MagicMock(return_value=None)
+    scheduler = HKCPanelScheduler(
+        get_mock_hass(),
+        None,
+        ["1234"],
+        60,
+        panel_id=100000,
+        build_alarm=build_alarm,
+        build_client=build_client,
+    )
+
+    with pytest.raises(RuntimeError):
+        await scheduler.async_refresh()
+    assert scheduler.hkc_alarm is None
+    assert scheduler.panel_id == 100000
+
+    await scheduler.async_refresh()
+    assert scheduler.hkc_alarm is hkc_alarm
+    assert scheduler.panel_id == 100000
+    build_client.assert_called_once_with(hkc_alarm)
+    assert scheduler.last_update is not None
+
+
+@pytest.mark.asyncio
+async def test_status_refresh_fetches_only_the_given_users_statuses():
+    hkc_alarm = get_mock_hkc_alarm()
+    scheduler, alarm_coordinator, sensor_coordinator = build_scheduler(hkc_alarm)
+    await scheduler.async_refresh()
+    hkc_alarm.fetch_calls.clear()
+    alarm_coordinator.async_handle_scheduler_refresh.reset_mock()
+    alarm_coordinator.async_set_updated_data.reset_mock()
+    sensor_coordinator.async_handle_scheduler_refresh.reset_mock()
+    sensor_coordinator.async_set_updated_data.reset_mock()
+    hkc_alarm.get_system_status = lambda user_code=None: {"blocks": [{"armState": 3}]}
+
+    await scheduler.async_refresh_statuses({"5678", "9999"}, alarm_coordinator)
+
+    assert scheduler.status_by_user["5678"] == {"blocks": [{"armState": 3}]}
+    assert scheduler.status_by_user["1234"]["blocks"][0]["armState"] == 0
+    assert hkc_alarm.fetch_calls == []
+    alarm_coordinator.async_handle_scheduler_refresh.assert_called_once()
+    alarm_coordinator.async_set_updated_data.assert_called_once_with("data")
+    sensor_coordinator.async_handle_scheduler_refresh.assert_not_called()
+    sensor_coordinator.async_set_updated_data.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_refresh_runs_status_and_panel_calls_in_parallel_with_a_cap():
+    in_flight = 0
+    peak = 0
+
+    async def cloud_call(result, *args):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0)
+        in_flight -= 1
+        return result
+
+    client = MagicMock()
+    client.async_get_system_status = lambda code: cloud_call({"blocks": []})
+    client.async_get_panel = lambda: cloud_call({"display": ""})
+    client.async_get_all_inputs = lambda code: cloud_call([])
+    user_codes = [str(code) for code in range(1000, 1006)]
+    scheduler = HKCPanelScheduler(
+        get_mock_hass(), get_mock_hkc_alarm(), user_codes, 60, client
+    )
+
+    await scheduler.async_refresh()
+
+    assert peak == MAX_CONCURRENT_REQUESTS
+    assert set(scheduler.status_by_user) == set(user_codes)
+
+
+@pytest.mark.asyncio
+async def test_refresh_is_debounced_unless_forced():
+    hkc_alarm = get_mock_hkc_alarm()
+    scheduler, _, _ = build_scheduler(hkc_alarm, user_codes=("1234",))
+
+    await scheduler.async_refresh()
+    await scheduler.async_refresh()
+    assert len(hkc_alarm.fetch_calls) == 3
+
+    await scheduler.async_refresh(force=True)
+    assert len(hkc_alarm.fetch_calls) == 6
+
+
+@pytest.mark.asyncio
+async def test_initial_statuses_are_reused_once():
+    hkc_alarm = get_mock_hkc_alarm()
+    scheduler, _, _ = build_scheduler(hkc_alarm, user_codes=("1234",))
+    scheduler.async_set_initial_statuses({"1234": {"blocks": []}})
+
+    await scheduler.async_refresh()
+
+    assert ("status", "1234") not in hkc_alarm.fetch_calls
+    assert scheduler.status_by_user == {"1234": {"blocks": []}}
+
+
+@pytest.mark.asyncio
+async def test_failed_refresh_is_reported_to_every_coordinator():
+    hkc_alarm = get_mock_hkc_alarm()
+    hkc_alarm.get_panel = MagicMock(side_effect=RuntimeError("cloud down"))
+    scheduler, alarm_coordinator, sensor_coordinator = build_scheduler(hkc_alarm)
+
+    await scheduler.async_update_coordinators()
+
+    alarm_coordinator.async_set_update_error.assert_called_once()
+    sensor_coordinator.async_set_update_error.assert_called_once()
+    assert scheduler.last_update is None
+
+
+@pytest.mark.asyncio
+async def test_fixed_interval_without_adaptive_polling():
+    scheduler, _, _ = build_scheduler(get_mock_hkc_alarm())
+
+    scheduler.async_note_command()
+
+    assert scheduler.current_interval == timedelta(seconds=60)
+
+
+@pytest.mark.asyncio
+async def test_adaptive_polling_speeds_up_after_command_and_backs_off_when_idle():
+    hkc_alarm = get_mock_hkc_alarm()
+    scheduler, _, _ = build_scheduler(hkc_alarm, user_codes=("1234",))
+    scheduler.adaptive_polling = True
+
+    scheduler.async_note_command()
+    assert scheduler.current_interval == timedelta(seconds=FAST_UPDATE_INTERVAL)
+
+    scheduler._fast_until = None
+    for _ in range(IDLE_BACKOFF_CYCLES + 1):
+        await scheduler.async_refresh(force=True)
+    assert scheduler.current_interval == timedelta(seconds=120)
+
+
+@pytest.mark.asyncio
+async def test_adaptive_polling_stays_fast_while_in_alarm():
+    hkc_alarm = get_mock_hkc_alarm()
+    hkc_alarm.get_system_status = lambda user_code=None: {
+        "blocks": [{"armState": 3, "isEnabled": True, "inAlarm": True}]
+    }
+    scheduler, _, _ = build_scheduler(hkc_alarm, user_codes=("1234",))
+    scheduler.adaptive_polling = True
+
+    await scheduler.async_refresh()
+
+    assert scheduler.fast_polling is True
+    assert scheduler.current_interval == timedelta(seconds=FAST_UPDATE_INTERVAL)
+
+
+@pytest.mark.asyncio
+async def test_refresh_records_call_and_refresh_metrics():
+    hkc_alarm = get_mock_hkc_alarm()
+    scheduler, _, _ = build_scheduler(hkc_alarm)
+
+    await scheduler.async_refresh()
+
+    stats = scheduler.metrics.stats
+    assert stats["status"].count == 2
+    assert stats["inputs"].count == 2
+    assert stats["panel"].count == 1
+    assert stats["refresh"].count == 1
+
+
+@pytest.mark.asyncio
+async def test_outage_serves_stale_data_and_opens_breaker():
+    hkc_alarm = get_mock_hkc_alarm()
+    scheduler, alarm_coordinator, sensor_coordinator = build_scheduler(
+        hkc_alarm, user_codes=("1234",)
+    )
+    await scheduler.async_refresh()
+    get_panel = hkc_alarm.get_panel
+    hkc_alarm.get_panel = MagicMock(side_effect=RuntimeError("cloud down"))
+
+    for _ in range(BREAKER_FAILURE_THRESHOLD + 2):
+        await scheduler.async_update_coordinators(force=True)
+
+    # no more cloud calls once the breaker is open
+    assert hkc_alarm.get_panel.call_count == BREAKER_FAILURE_THRESHOLD
+    assert scheduler.breaker.state == STATE_OPEN
+    assert scheduler.stale_since is not None
+    alarm_coordinator.async_set_update_error.assert_not_called()
+    assert sensor_coordinator.async_update_listeners.call_count == (
+        BREAKER_FAILURE_THRESHOLD + 2
+    )
+
+    # a single half-open probe closes the breaker once the cloud is back
+    hkc_alarm.get_panel = get_panel
+    scheduler.breaker.retry_at = 0
+    await scheduler.async_update_coordinators(force=True)
+
+    assert scheduler.breaker.state == STATE_CLOSED
+    assert scheduler.stale_since is None
+
+
+@pytest.mark.asyncio
+async def test_cancelled_probe_does_not_leave_the_breaker_half_open():
+    hkc_alarm = get_mock_hkc_alarm()
+    scheduler, _, _ = build_scheduler(hkc_alarm, user_codes=("1234",))
+    get_panel = hkc_alarm.get_panel
+    hkc_alarm.get_panel = MagicMock(side_effect=RuntimeError("cloud down"))
+    for _ in range(BREAKER_FAILURE_THRESHOLD):
+        await scheduler.async_update_coordinators(force=True)
+    assert scheduler.breaker.state == STATE_OPEN
+
+    probe_started = asyncio.Event()
+
+    async def hanging_panel():
+        probe_started.set()
+        await asyncio.Event().wait()
+
+    scheduler.breaker.retry_at = 0
+    scheduler._panel_job = lambda: hanging_panel
+    probe = asyncio.create_task(scheduler.async_refresh(force=True))
+    await probe_started.wait()
+    assert scheduler.breaker.state == STATE_HALF_OPEN
+    probe.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await probe
+
+    # The next refresh probes again instead of being refused forever
+    del scheduler._panel_job
+    hkc_alarm.get_panel = get_panel
+    await scheduler.async_refresh(force=True)
+    assert scheduler.breaker.state == STATE_CLOSED
+
+
+@pytest.mark.asyncio
+async def test_outage_without_usable_data_marks_coordinators_failed():
+    hkc_alarm = get_mock_hkc_alarm()
+    scheduler, alarm_coordinator, _ = build_scheduler(hkc_alarm, user_codes=("1234",))
+    await scheduler.async_refresh()
+    scheduler.last_update -= timedelta(hours=1)
+    hkc_alarm.get_panel = MagicMock(side_effect=RuntimeError("cloud down"))
+
+    await scheduler.async_update_coordinators(force=True)
+
+    alarm_coordinator.async_set_update_error.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_sensor_coordinator_only_wakes_changed_inputs():
+    hkc_alarm = get_mock_hkc_alarm()
+    # The mock keypad shows 12 May 20:55 of the current year
+    timestamp = f"{datetime.now(timezone.utc).year}-05-12T20:55:00Z"
+    inputs = [
+        {"inputId": "1", "inputState": 0, "timestamp": timestamp},
+        {"inputId": "2", "inputState": 0, "timestamp": timestamp},
+    ]
+    hkc_alarm.get_all_inputs = lambda user_code=None: [dict(i) for i in inputs]
+
+    async with async_test_home_assistant() as hass:
+        entry = MockConfigEntry(domain=DOMAIN)
+        scheduler = HKCPanelScheduler(hass, hkc_alarm, ["1234"], 60)
+        coordinator = HKCSensorCoordinator(hass, entry, scheduler)
+        zone_1, zone_2, other = MagicMock(), MagicMock(), MagicMock()
+        coordinator.async_add_listener(zone_1, ("1234", "1"))
+        # unknown user codes fall back to the primary user's inputs
+        coordinator.async_add_listener(zone_2, ("9999", "2"))
+        coordinator.async_add_listener(other)
+
+        async def refresh():
+            await scheduler.async_update_coordinators(force=True)
+            calls = (zone_1.call_count, zone_2.call_count, other.call_count)
+            for listener in (zone_1, zone_2, other):
+                listener.reset_mock()
+            return calls
+
+        assert await refresh() == (1, 1, 1)
+        # the first snapshot counts as a change for every input
+        assert set(coordinator._recent_changes) == {("1234", "1"), ("1234", "2")}
+        coordinator._recent_changes.clear()
+        assert await refresh() == (0, 0, 1)
+
+        inputs[1]["inputState"] = 1
+        assert await refresh() == (0, 1, 1)
+        # recently changed inputs keep waking while the open window runs
+        assert await refresh() == (0, 1, 1)
+        coordinator._recent_changes.clear()
+        assert await refresh() == (0, 0, 1)
+
+        coordinator.async_set_update_error(Exception("down"))
+        assert (zone_1.call_count, zone_2.call_count) == (1, 1)
+
+        await hass.async_stop(force=True)
+
+
+@pytest.mark.asyncio
+async def test_sensor_coordinator_wakes_triggered_input_until_panel_clock_passes():
+    hkc_alarm = get_mock_hkc_alarm()
+    year = datetime.now(timezone.utc).year
+    inputs = [{"inputId": "1", "inputState": 0, "timestamp": "0001-01-01T00:00:00"}]
+    display = {"display": "Mon 12 May 20:55"}
+    hkc_alarm.get_all_inputs = lambda user_code=None: [dict(i) for i in inputs]
+    hkc_alarm.get_panel = lambda: dict(display)
+
+    async with async_test_home_assistant() as hass:
+        entry = MockConfigEntry(domain=DOMAIN)
+        # Polls further apart than a triggered zone stays open
+        scheduler = HKCPanelScheduler(hass, hkc_alarm, ["1234"], 300)
+        coordinator = HKCSensorCoordinator(hass, entry, scheduler)
+        zone = MagicMock()
+        coordinator.async_add_listener(zone, ("1234", "1"))
+        await scheduler.async_update_coordinators(force=True)
+        zone.reset_mock()
+
+        inputs[0]["timestamp"] = f"{year}-05-12T20:55:00Z"
+        await scheduler.async_update_coordinators(force=True)
+        assert zone.call_count == 1
+
+        # Five minutes on the input is unchanged, but no longer reads as open
+        display["display"] = "Mon 12 May 21:00"
+        await scheduler.async_update_coordinators(force=True)
+        assert zone.call_count == 2
+        assert not coordinator._recent_changes
+
+        display["display"] = "Mon 12 May 21:05"
+        await scheduler.async_update_coordinators(force=True)
+        assert zone.call_count == 2
+
+        await hass.async_stop(force=True)
+
+
+def visible_inputs(user_code=None, with_visibility=True):
+    inputs = [
+        {"inputId": "1", "description": "Hall", "visibleUserCodes": [1234, 5678]},
+        {"inputId": "2", "description": "Garage", "visibleUserCodes": [1234]},
+    ]
+    if not with_visibility:
+        for input_data in inputs:
+            del input_data["visibleUserCodes"]
+    return [
+        input_data
+        for input_data in inputs
+        if user_code is None or int(user_code) in input_data.get("visibleUserCodes", [int(user_code)])
+    ]
+
+
+def input_fetches(hkc_alarm):
+    calls = [code for kind, code in hkc_alarm.fetch_calls if kind == "inputs"]
+    hkc_alarm.fetch_calls.clear()
+    return sorted(calls)
+
+
+@pytest.mark.asyncio
+async def test_inputs_are_fetched_once_and_split_by_visible_user_codes():
+    hkc_alarm = get_mock_hkc_alarm()
+    hkc_alarm.get_all_inputs = lambda user_code=None: (
+        hkc_alarm.fetch_calls.append(("inputs", user_code)) or visible_inputs(user_code)
+    )
+    scheduler, _, _ = build_scheduler(hkc_alarm)
+
+    await scheduler.async_refresh(force=True)
+    assert input_fetches(hkc_alarm) == ["1234", "5678"]
+    assert scheduler.inputs_source == "1234"
+
+    await scheduler.async_refresh(force=True)
+    assert input_fetches(hkc_alarm) == ["1234"]
+    assert [i["inputId"] for i in scheduler.inputs_by_user["5678"]] == ["1"]
+    assert [i["inputId"] for i in scheduler.inputs_by_user["1234"]] == ["1", "2"]
+
+
+@pytest.mark.asyncio
+async def test_inputs_fall_back_to_per_user_fetches_without_visible_user_codes():
+    hkc_alarm = get_mock_hkc_alarm()
+    with_visibility = True
+    hkc_alarm.get_all_inputs = lambda user_code=None: (
+        hkc_alarm.fetch_calls.append(("inputs", user_code))
+        or visible_inputs(user_code, with_visibility)
+    )
+    scheduler, _, _ = build_scheduler(hkc_alarm)
+    await scheduler.async_refresh(force=True)
+    input_fetches(hkc_alarm)
+
+    with_visibility = False
+    await scheduler.async_refresh(force=True)
+
+    assert input_fetches(hkc_alarm) == ["1234", "1234", "5678"]
+    assert scheduler.inputs_source is None
+    assert len(scheduler.inputs_by_user["5678"]) == 2
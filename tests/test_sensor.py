@@ -3,11 +3,11 @@ from unittest.mock import patch
 import pytest
 
 from custom_components.hkc_alarm.const import DOMAIN
-from custom_components.hkc_alarm.sensor import HKCSensor
+from custom_components.hkc_alarm.sensor import HKCDiagnosticSensor, HKCSensor
 from .mock_common import (
+    PANEL_ID,
     get_mock_alarm_coordinator,
     get_mock_hass,
-    get_mock_hkc_alarm,
     get_mock_sensor_coordinator,
 )
 
@@ -42,7 +42,7 @@ def build_view(user_code="1234", label="HKC Alarm System", multi_view=False):
 async def test_hkc_sensor_state():
     with patch.object(HKCSensor, "async_write_ha_state", return_value=None):
         sensor = HKCSensor(
-            get_mock_hkc_alarm(),
+            PANEL_ID,
             mock_sensor_data,
             get_mock_alarm_coordinator(),
             mock_sensor_coordinator := get_mock_sensor_coordinator(),
@@ -60,7 +60,7 @@ async def test_hkc_sensor_state():
 async def test_hkc_sensor_tampered_state():
     with patch.object(HKCSensor, "async_write_ha_state", return_value=None):
         sensor = HKCSensor(
-            get_mock_hkc_alarm(),
+            PANEL_ID,
             mock_tampered_sensor_data,
             get_mock_alarm_coordinator(),
             mock_sensor_coordinator := get_mock_sensor_coordinator(),
@@ -78,7 +78,7 @@ async def test_hkc_sensor_tampered_state():
 async def test_hkc_sensor_invalid_timestamp():
     with patch.object(HKCSensor, "async_write_ha_state", return_value=None):
         sensor = HKCSensor(
-            get_mock_hkc_alarm(),
+            PANEL_ID,
             mock_sensor_data,
             get_mock_alarm_coordinator(),
             mock_sensor_coordinator := get_mock_sensor_coordinator(),
@@ -95,7 +95,7 @@ async def test_hkc_sensor_invalid_timestamp():
 @pytest.mark.asyncio
 async def test_device_info():
     sensor = HKCSensor(
-        get_mock_hkc_alarm(),
+        PANEL_ID,
         mock_sensor_data,
         get_mock_alarm_coordinator(),
         get_mock_sensor_coordinator(),
@@ -114,7 +114,7 @@ async def test_device_info():
 @pytest.mark.asyncio
 async def test_name():
     sensor = HKCSensor(
-        get_mock_hkc_alarm(),
+        PANEL_ID,
         mock_sensor_data,
         get_mock_alarm_coordinator(),
         get_mock_sensor_coordinator(),
@@ -126,7 +126,7 @@ async def test_name():
 @pytest.mark.asyncio
 async def test_should_poll():
     sensor = HKCSensor(
-        get_mock_hkc_alarm(),
+        PANEL_ID,
         mock_sensor_data,
         get_mock_alarm_coordinator(),
         get_mock_sensor_coordinator(),
@@ -139,7 +139,7 @@ async def test_should_poll():
 async def test_handle_sensor_coordinator_update():
     with patch.object(HKCSensor, "async_write_ha_state", return_value=None):
         sensor = HKCSensor(
-            get_mock_hkc_alarm(),
+            PANEL_ID,
             mock_sensor_data,
             get_mock_alarm_coordinator(),
             mock_sensor_coordinator := get_mock_sensor_coordinator(),
@@ -162,7 +162,7 @@ async def test_handle_sensor_coordinator_update():
 @pytest.mark.asyncio
 async def test_multi_view_sensor_unique_id_is_namespaced():
     sensor = HKCSensor(
-        get_mock_hkc_alarm(),
+        PANEL_ID,
         mock_sensor_data,
         get_mock_alarm_coordinator(),
         get_mock_sensor_coordinator(),
@@ -174,7 +174,7 @@ async def test_multi_view_sensor_unique_id_is_namespaced():
 @pytest.mark.asyncio
 async def test_async_update():
     sensor = HKCSensor(
-        get_mock_hkc_alarm(),
+        PANEL_ID,
         mock_sensor_data,
         get_mock_alarm_coordinator(),
         mock_sensor_coordinator := get_mock_sensor_coordinator(),
@@ -182,3 +182,57 @@ async def test_async_update():
     )
     await sensor.async_update()
     mock_sensor_coordinator.async_request_refresh.assert_called()
+
+
+@pytest.mark.asyncio
+async def test_unchanged_sensor_skips_state_write():
+    with patch.object(HKCSensor, "async_write_ha_state", return_value=None) as write_state:
+        sensor = HKCSensor(
+            PANEL_ID,
+            mock_sensor_data,
+            get_mock_alarm_coordinator(),
+            mock_sensor_coordinator := get_mock_sensor_coordinator(),
+            build_view(),
+        )
+        sensor.hass = get_mock_hass()
+        mock_sensor_coordinator.inputs_by_user = {"1234": [dict(mock_sensor_data)]}
+        sensor._handle_coordinator_update()
+        mock_sensor_coordinator.inputs_by_user = {"1234": [dict(mock_sensor_data)]}
+        sensor._handle_coordinator_update()
+        assert write_state.call_count == 1
+
+        mock_sensor_coordinator.inputs_by_user = {
+            "1234": [{**mock_sensor_data, "inputState": 0}]
+        }
+        sensor._handle_coordinator_update()
+        assert write_state.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_panel_display_sensor_keeps_keypad_out_of_the_recorder():
+    sensor = HKCDiagnosticSensor(
+        PANEL_ID,
+        get_mock_alarm_coordinator(),
+        "panel_display",
+        "HKC Alarm System",
+    )
+
+    # The state stays put while the clock ticks; the text is not recorded
+    assert sensor.native_value == "clock"
+    assert sensor.extra_state_attributes["Display"] == "Mon 12 May 20:55"
+    assert sensor.extra_state_attributes["Blink"] == "0000000000000100"
+    assert not sensor.entity_registry_enabled_default
+    assert {
+        "Display",
+        "Green LED",
+        "Cursor Index",
+        "Blink",
+    } <= sensor._unrecorded_attributes
+
+    coordinator = get_mock_alarm_coordinator()
+    coordinator.panel_data = {**coordinator.panel_data, "display": "Zone 3 open"}
+    sensor = HKCDiagnosticSensor(
+        PANEL_ID, coordinator, "panel_display", "HKC Alarm System"
+    )
+    assert sensor.native_value == "message"
+    assert sensor.extra_state_attributes["Display"] == "Zone 3 open"
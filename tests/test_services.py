@@ -0,0 +1,160 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+import voluptuous as vol
+from homeassistant.exceptions import ServiceValidationError
+
+from custom_components.hkc_alarm.const import MAX_CONCURRENT_REQUESTS
+from custom_components.hkc_alarm.services import SET_BLOCKS_SCHEMA, async_set_blocks
+from .mock_common import get_mock_alarm_coordinator, get_mock_hass, get_mock_hkc_alarm
+
+
+def get_entry_data(hkc_client=None, require_user_pin=False, hkc_alarm=None):
+    coordinator = get_mock_alarm_coordinator(hkc_alarm)
+    coordinator.hkc_client = hkc_client
+    coordinator.async_note_command = MagicMock()
+    coordinator.access_summary = {
+        1234: {"allowedBlocks": [{"block": 1}]},
+        5678: {"allowedBlocks": [{"block": 1}, {"block": 2}]},
+    }
+    return {
+        "configured_user_codes": ["1234", "5678"],
+        "require_user_pin": require_user_pin,
+        "alarm_coordinator": coordinator,
+    }
+
+
+def get_services_hass():
+    hass = get_mock_hass()
+    hass.async_create_background_task = MagicMock(
+        side_effect=lambda target, name: target.close()
+    )
+    return hass
+
+
+@pytest.mark.asyncio
+async def test_blocks_are_sent_concurrently_with_a_bounded_limit():
+    in_flight = 0
+    peak = 0
+
+    async def send_command(command_name, user_code, block_number):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0)
+        in_flight -= 1
+        return {"resultCode": 5}
+
+    client = MagicMock()
+    client.async_send_command = AsyncMock(side_effect=send_command)
+    hass = get_services_hass()
+    entry_data = get_entry_data(client)
+    blocks = [{"block": number, "state": "armed_away"} for number in range(1, 7)]
+
+    results = await async_set_blocks(hass, entry_data, blocks)
+
+    assert 1 < peak <= MAX_CONCURRENT_REQUESTS
+    assert [result["block"] for result in results] == list(range(1, 7))
+    assert all(result["acknowledged"] for result in results)
+    assert all(result["result_code"] == 5 for result in results)
+    assert all(result["latency"] >= 0 for result in results)
+    entry_data["alarm_coordinator"].async_note_command.assert_called_once()
+    hass.async_create_background_task.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_each_block_reports_its_own_result():
+    hass = get_services_hass()
+    hkc_alarm = get_mock_hkc_alarm()
+    responses = {0: {"resultCode": 4}, 1: {"resultCode": 5}}
+
+    def arm_or_disarm(command=None, block=None, user_code=None):
+        hkc_alarm.command_calls.append((command, user_code, block))
+        if block == 2:
+            raise RuntimeError("cloud down")
+        return responses[block]
+
+    hkc_alarm._arm_or_disarm = arm_or_disarm
+    entry_data = get_entry_data(hkc_alarm=hkc_alarm)
+
+    results = await async_set_blocks(
+        hass,
+        entry_data,
+        [
+            {"block": 1, "state": "disarmed"},
+            {"block": 2, "state": "armed_home"},
+            {"block": 3, "state": "armed_night"},
+        ],
+    )
+
+    # Block 2 is only allowed for the second configured user
+    assert sorted(hkc_alarm.command_calls) == [(0, "1234", 0), (1, "5678", 1), (2, "1234", 2)]
+    assert [(result["result"], result["acknowledged"]) for result in results] == [
+        ("already_in_state", True),
+        ("acknowledged", True),
+        ("error", False),
+    ]
+    assert results[2]["error"] == "cloud down"
+
+
+@pytest.mark.asyncio
+async def test_invalid_requests_are_rejected_before_sending():
+    hass = get_services_hass()
+    client = MagicMock()
+    client.async_send_command = AsyncMock(return_value={"resultCode": 5})
+
+    with pytest.raises(ServiceValidationError):
+        await async_set_blocks(
+            hass,
+            get_entry_data(client),
+            [{"block": 1, "state": "armed_away"}, {"block": 1, "state": "disarmed"}],
+        )
+    with pytest.raises(ServiceValidationError):
+        await async_set_blocks(
+            hass, get_entry_data(client), [{"block": 1, "state": "armed_away"}], "9999"
+        )
+    with pytest.raises(ServiceValidationError):
+        await async_set_blocks(
+            hass,
+            get_entry_data(client, require_user_pin=True),
+            [{"block": 1, "state": "armed_away"}],
+        )
+    client.async_send_command.assert_not_awaited()
+
+
+def test_schema_accepts_blocks_and_target_states():
+    data = SET_BLOCKS_SCHEMA({"blocks": [{"block": "2", "state": "armed_night"}]})
+
+    assert data["blocks"] == [{"block": 2, "state": "armed_night"}]
+    with pytest.raises(vol.Invalid):
+        SET_BLOCKS_SCHEMA({"blocks": [{"block": 1, "state": "triggered"}]})
+    with pytest.raises(vol.Invalid):
+        SET_BLOCKS_SCHEMA({"blocks": []})
+
+
+@pytest.mark.asyncio
+async def test_blocks_are_confirmed_from_their_sending_users_status():
+    client = MagicMock()
+    client.async_send_command = AsyncMock(return_value={"resultCode": 5})
+    hass = get_services_hass()
+    entry_data = get_entry_data(client)
+    coordinator = entry_data["alarm_coordinator"]
+    coordinator.command_queue.async_confirm = MagicMock()
+
+    await async_set_blocks(
+        hass,
+        entry_data,
+        [{"block": 1, "state": "armed_away"}, {"block": 2, "state": "armed_home"}],
+    )
+
+    is_confirmed, user_codes = coordinator.command_queue.async_confirm.call_args.args
+    assert user_codes == {"1234", "5678"}
+    coordinator.status_by_user = {
+        "1234": {"blocks": [{"armState": 3}, {"armState": 0}]},
+        "5678": {"blocks": [{"armState": 0}, {"armState": 0}]},
+    }
+    # Block 2 was sent as 5678, so the primary user's status does not count
+    assert not is_confirmed()
+    coordinator.status_by_user["5678"] = {"blocks": [{"armState": 3}, {"armState": 1}]}
+    assert is_confirmed()